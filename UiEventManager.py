@@ -1,5 +1,9 @@
 import pygame
 import math
+
+from portfolio_manager import new_position
+
+
 class UiEventManager:
     def __init__(self, state):
         self.state = state
@@ -186,7 +190,7 @@ class UiEventManager:
             )
 
             if choice == "quit":
-                state.autosave()
+                state.quit_save()
                 return "quit"
             elif choice == "toggle_crt":
                 self.crt_enabled = not self.crt_enabled
@@ -581,12 +585,7 @@ class UiEventManager:
                         else:
                             print("NOT ENOUGH CASH FOR LIMIT")
                     else:
-                        state.open_orders.append({
-                            "ticker": ticker,
-                            "side": "buy",
-                            "qty": qty,
-                            "limit_price": limit_price
-                        })
+                        state.open_orders.place(ticker, "buy", qty, limit_price)
                         print(f"BUY LIMIT PLACED {qty} {ticker} @ {limit_price}")
                     return
 
@@ -607,12 +606,7 @@ class UiEventManager:
                         state.portfolio_mgr.sell_stock(ticker, qty)
                         print(f"SELL LIMIT EXECUTED {qty} {ticker}")
                     else:
-                        state.open_orders.append({
-                            "ticker": ticker,
-                            "side": "sell",
-                            "qty": qty,
-                            "limit_price": limit_price
-                        })
+                        state.open_orders.place(ticker, "sell", qty, limit_price)
                         print(f"SELL LIMIT PLACED {qty} {ticker} @ {limit_price}")
 
                     return
@@ -709,7 +703,7 @@ class UiEventManager:
                         self.state.selected_stock = new_stock
                         # ensure portfolio entry exists
                         if new_stock not in state.portfolio:
-                            state.portfolio[new_stock] = {"shares": 0, "bought_at": [], "sell_qty": 0}
+                            state.portfolio[new_stock] = new_position()
 
                         # Start the normal "snap UP" animation
                         ui = self.state.ui
@@ -730,8 +724,9 @@ class UiEventManager:
                     # CASE 3 — switching to a new stock
                     ui = self.state.ui
 
-                    # store old chart to slide OUT
-                    ui.old_chart_surface = ui.current_chart_surface
+                    # store old chart to slide OUT (copy: the chart surfaces are reused)
+                    ui.old_chart_surface = (ui.current_chart_surface.copy()
+                                            if ui.current_chart_surface is not None else None)
 
                     # phase 1 → old chart OUT
                     ui.chart_direction = "out"
@@ -785,7 +780,8 @@ class UiEventManager:
                 # CASE 3 — selecting a *different* stock
                 ui = self.state.ui
 
-                ui.old_chart_surface = ui.current_chart_surface  # animate old OUT
+                ui.old_chart_surface = (ui.current_chart_surface.copy()
+                                        if ui.current_chart_surface is not None else None)  # animate old OUT
                 ui.chart_direction = "out"
                 ui.chart_slide_y = 0
                 ui.chart_animating = True
@@ -794,7 +790,7 @@ class UiEventManager:
                 self.state.selected_stock = new_stock  # <<< REQUIRED
 
                 if new_stock not in state.portfolio:
-                    state.portfolio[new_stock] = {"shares": 0, "bought_at": [], "sell_qty": 0}
+                    state.portfolio[new_stock] = new_position()
                 else:
                     state.portfolio[new_stock]["sell_qty"] = 0
 
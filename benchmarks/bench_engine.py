@@ -0,0 +1,316 @@
+# ================================================
+# benchmarks/bench_engine.py (TICK ENGINE BENCHMARKS)
+# ================================================
+#
+#   python -m benchmarks.bench_engine                      # default grid
+#   python -m benchmarks.bench_engine --tickers 19,1000 --history 0,2000
+#   python -m benchmarks.bench_engine --compare benchmarks/results/engine-<commit>.json
+#
+#   Run from the repo root. Each case (tickers x candles of history per
+#   ticker) builds a synthetic game.db and runs in its own process, so
+#   peak RSS belongs to that case alone. Per case:
+#
+#     load_s / load_history_s    MarketState startup / CandleManager.load_all
+#     aggregate_ms               CandleStore.timeframe() build per timeframe
+#     stock_apply_tick           Stock.apply_tick over the universe
+#     add_price                  CandleManager.add_price over the universe
+#     tick_stock / tick_vector   apply_tick_price, per-Stock and MarketEngine
+#     alloc_*                    tracemalloc: transient peak and retained
+#                                memory per apply_tick_price
+#     save                       autosave delta: collect + SQLite write
+#     snapshot                   binary snapshot write, and MarketState
+#                                startup from it (vs load_s from SQLite)
+#     peak_rss_mib
+#
+#   Ticks are kept inside market hours (the clock skips to the next
+#   open at the close) so every tick does the full amount of work.
+#
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import (
+    ROOT, build_universe, compare, default_out, open_clock, peak_rss_mib, run_meta,
+    summarize, write_results,
+)
+
+DEFAULT_CASES = [
+    # tick scaling over universe size
+    (19, 0), (100, 0), (1000, 0), (10000, 0), (100000, 0),
+    # load / aggregate / save scaling over history length
+    (19, 500), (19, 2000), (19, 5000), (1000, 2000),
+]
+
+TIMEFRAMES = (15, 60, 240, 1440)
+
+COMPARE_METRICS = (
+    "load_s",
+    "load_history_s",
+    "tick_stock.ticks_per_sec",
+    "tick_stock.ns_per_ticker_tick",
+    "tick_vector.ticks_per_sec",
+    "tick_vector.ns_per_ticker_tick",
+    "add_price.ns_per_call",
+    "save.write_s",
+    "snapshot.write_s",
+    "snapshot.load_s",
+    "peak_rss_mib",
+)
+
+
+# ====================================================
+# ONE CASE (runs in the child process)
+# ====================================================
+def _timed_ticks(state, n, budget, min_ticks, max_ticks):
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_ticks and (
+            len(samples) < min_ticks or time.perf_counter() - start < budget):
+        open_clock(state)
+        t0 = time.perf_counter()
+        state.apply_tick_price()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+
+    stats = summarize(samples)
+    stats["ticks_per_sec"] = 1000.0 / stats["mean_ms"]
+    stats["ns_per_ticker_tick"] = stats["mean_ms"] * 1e6 / n
+    return stats
+
+
+def _timed_rounds(state, n, body, budget, min_rounds, max_rounds):
+    """body() once per round on a freshly advanced (open) clock."""
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_rounds and (
+            len(samples) < min_rounds or time.perf_counter() - start < budget):
+        open_clock(state)
+        state._advance_clock()
+        t0 = time.perf_counter()
+        body()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+
+    stats = summarize(samples)
+    stats["ns_per_call"] = stats["mean_ms"] * 1e6 / n
+    return stats
+
+
+def _allocations(state, ticks=3):
+    """
+    CPython has no allocation counter, so this reports what tracemalloc
+    sees per apply_tick_price: the transient peak above the starting
+    point and what is still allocated afterwards.
+    """
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(ticks):
+            open_clock(state)
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            state.apply_tick_price()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kib_per_tick": sum(peaks) / len(peaks) / 1024,
+        "retained_kib_per_tick": sum(retained) / len(retained) / 1024,
+    }
+
+
+def _aggregate(state, sample=8):
+    """ms to build each timeframe level from the 5-minute candles."""
+    stores = [s.day_history for s in list(state.tickers_obj.values())[:sample]]
+    stores[0].timeframe(TIMEFRAMES[0])    # warm-up, not timed
+    out = {}
+    for minutes in TIMEFRAMES:
+        samples = []
+        for store in stores:
+            store.levels.pop(minutes, None)
+            t0 = time.perf_counter()
+            store.timeframe(minutes)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        out[str(minutes)] = sum(samples) / len(samples)
+    return out
+
+
+def run_case(n, history, workdir, budget=2.0, min_ticks=3, max_ticks=500, stock_limit=20000):
+    from market_state import MarketState
+
+    db_path = os.path.join(workdir, "bench.db")
+    result = {"case": f"{n}x{history}", "tickers": n, "history": history}
+
+    t0 = time.perf_counter()
+    build_universe(db_path, n, history)
+    result["build_s"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    state = MarketState(db_path)
+    result["load_s"] = time.perf_counter() - t0
+
+    try:
+        if history:
+            t0 = time.perf_counter()
+            state.candles.load_all(state.tickers, current_day=state.game_day)
+            result["load_history_s"] = time.perf_counter() - t0
+            result["aggregate_ms"] = _aggregate(state)
+
+        stocks = list(state.tickers_obj.values())
+
+        # ---------------------------------
+        # PER-STOCK PATH
+        # ---------------------------------
+        if n <= stock_limit:
+            def apply_ticks():
+                for stock in stocks:
+                    stock.apply_tick(state)
+
+            def add_prices():
+                for stock in stocks:
+                    state.candles.add_price(
+                        state.tickers[stock.ticker], day=state.game_day, time=state.market_time,
+                        price=stock.current_price, volume=stock.volume
+                    )
+
+            result["stock_apply_tick"] = _timed_rounds(state, n, apply_ticks, budget,
+                                                       min_ticks, max_ticks)
+            result["add_price"] = _timed_rounds(state, n, add_prices, budget,
+                                                min_ticks, max_ticks)
+            result["tick_stock"] = _timed_ticks(state, n, budget, min_ticks, max_ticks)
+            result["alloc_stock"] = _allocations(state)
+        else:
+            result["skipped"] = f"per-Stock path skipped above {stock_limit} tickers"
+
+        # ---------------------------------
+        # VECTOR ENGINE
+        # ---------------------------------
+        state.enable_market_engine()
+        result["tick_vector"] = _timed_ticks(state, n, budget, min_ticks, max_ticks)
+        result["alloc_vector"] = _allocations(state)
+
+        # ---------------------------------
+        # AUTOSAVE (everything is dirty by now)
+        # ---------------------------------
+        t0 = time.perf_counter()
+        delta = state.collect_save_delta()
+        t1 = time.perf_counter()
+        state.write_save_delta(delta)
+        t2 = time.perf_counter()
+        result["save"] = {
+            "collect_s": t1 - t0,
+            "write_s": t2 - t1,
+            "ticker_rows": len(delta["tickers"]),
+            "candle_rows": len(delta["candles"]),
+        }
+
+        # ---------------------------------
+        # SNAPSHOT (in step with the save above, so startup uses it)
+        # ---------------------------------
+        snap_path = os.path.join(workdir, "bench.snap")
+        t0 = time.perf_counter()
+        state.save_snapshot(snap_path)
+        t1 = time.perf_counter()
+        restored = MarketState(db_path, snapshot=snap_path)
+        t2 = time.perf_counter()
+        restored.price_board.close()
+        result["snapshot"] = {
+            "write_s": t1 - t0,
+            "load_s": t2 - t1,
+            "mib": os.path.getsize(snap_path) / (1024 * 1024),
+        }
+    finally:
+        state.db.close()
+        state.price_board.close()
+
+    result["peak_rss_mib"] = peak_rss_mib()
+    return result
+
+
+# ====================================================
+# DRIVER
+# ====================================================
+def _int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def _run_in_child(n, history, args):
+    with tempfile.TemporaryDirectory() as workdir:
+        out = os.path.join(workdir, "result.json")
+        cmd = [
+            sys.executable, "-m", "benchmarks.bench_engine",
+            "--case", f"{n}x{history}", "--case-out", out, "--workdir", workdir,
+            "--budget", str(args.budget), "--min-ticks", str(args.min_ticks),
+            "--max-ticks", str(args.max_ticks), "--stock-limit", str(args.stock_limit),
+        ]
+        # the game's own prints (news, migrations) would drown the report
+        proc = subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL)
+        if proc.returncode != 0 or not os.path.exists(out):
+            return {"case": f"{n}x{history}", "tickers": n, "history": history,
+                    "error": f"exit status {proc.returncode}"}
+        with open(out) as f:
+            return json.load(f)
+
+
+def _report(r):
+    if "error" in r:
+        return f"{r['case']:<12} FAILED ({r['error']})"
+
+    def rate(key):
+        t = r.get(key)
+        return f"{t['ticks_per_sec']:>9.1f}/s {t['ns_per_ticker_tick']:>9.0f} ns" if t else f"{'-':>23}"
+
+    return (f"{r['case']:<12} load {r['load_s']:>7.3f}s  stock {rate('tick_stock')}"
+            f"  vector {rate('tick_vector')}  save {r['save']['write_s']:>7.3f}s"
+            f"  snap load {r['snapshot']['load_s']:>7.3f}s"
+            f"  rss {r['peak_rss_mib']:>7.1f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tick engines on synthetic universes.")
+    parser.add_argument("--tickers", type=_int_list, help="comma-separated universe sizes")
+    parser.add_argument("--history", type=_int_list, help="comma-separated candles per ticker")
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per timed phase")
+    parser.add_argument("--min-ticks", type=int, default=3)
+    parser.add_argument("--max-ticks", type=int, default=500)
+    parser.add_argument("--stock-limit", type=int, default=20000,
+                        help="skip the per-Stock path above this many tickers")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/engine-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--case-out", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        n, history = (int(x) for x in args.case.split("x"))
+        result = run_case(n, history, args.workdir, args.budget, args.min_ticks,
+                          args.max_ticks, args.stock_limit)
+        with open(args.case_out, "w") as f:
+            json.dump(result, f)
+        return
+
+    if args.tickers or args.history:
+        cases = [(n, h) for n in (args.tickers or [19]) for h in (args.history or [0])]
+    else:
+        cases = DEFAULT_CASES
+
+    meta = run_meta()
+    results = []
+    for n, history in cases:
+        r = _run_in_child(n, history, args)
+        results.append(r)
+        print(_report(r), flush=True)
+
+    write_results(args.out or default_out("engine", meta), "engine", meta, results)
+    if args.compare:
+        compare(args.compare, results, COMPARE_METRICS)
+
+
+if __name__ == "__main__":
+    main()
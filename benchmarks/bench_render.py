@@ -0,0 +1,337 @@
+# ================================================
+# benchmarks/bench_render.py (OFF-SCREEN RENDER BENCHMARK)
+# ================================================
+#
+#   python -m benchmarks.bench_render                      # 19 tickers, 7 days of candles
+#   python -m benchmarks.bench_render --frames 240 --tickers 100
+#   python -m benchmarks.bench_render --compare benchmarks/results/render-<commit>.json
+#
+#   Run from the repo root (it needs assets/ like the game does). Drives
+#   main.py's render_game_screen() / present_frame() on SDL's dummy video
+#   and audio drivers against a synthetic game.db and replays a fixed
+#   scenario, one step at a time:
+#
+#     idle            nothing selected
+#     select, switch  click a ticker, then another (chart slide out / in)
+#     zoom            mouse-wheel steps in to the closest zoom and back out
+#     tf_<n>m         hold each candle timeframe, chart layer redrawn per frame
+#     pan             drag the window left and right
+#     volume, candles the info panel toggles
+#     drawer          drag the order drawer open
+#     portfolio, visualize
+#     crt_on, crt_off
+#
+#   Frames are not paced (no clock.tick) and a market tick lands every
+#   --tick-every frames, as it would at 120 FPS with a 2 s tick. Every
+#   frame's spans (FrameProfiler, instrumented like main.py plus the
+#   chart-layer internals) are summarized per step.
+#
+#   The dummy driver keeps no real mouse: pygame.mouse.get_pos() stays
+#   at (0, 0), so the chart tooltip never shows and drags set
+#   chart_offset the way update_chart_layer() would. Screen switches
+#   skip screen_transition(), whose fade waits on its own clock.
+#
+import argparse
+import contextlib
+import os
+import tempfile
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from benchmarks.common import (
+    CANDLES_PER_DAY, ROOT, build_universe, compare, default_out, open_clock, peak_rss_mib,
+    run_meta, summarize, write_results,
+)
+
+DT = 1 / 120                     # seconds per frame handed to animations
+TIMEFRAMES = (5, 15, 30, 60, 120, 240, 1440)
+# pixels per candle inside each band of GameGUI.select_timeframe_from_dx()
+TIMEFRAME_DX = {5: 8.0, 15: 4.0, 30: 2.0, 60: 1.0, 120: 0.5, 240: 0.3, 1440: 0.1}
+
+SPANS = (
+    "frame", "render_screen", "render_header", "render_tickers", "render_side_bar",
+    "render_chart_to_surface", "update_chart_layer", "_draw_chart_data", "chart_transition",
+    "render_info_panel", "render_portfolio_screen", "render_visualize_screen",
+    "news.update_and_draw", "apply_tick_price", "present", "crt_post", "display_flip",
+)
+
+COMPARE_METRICS = tuple(
+    f"spans.{span}.{stat}" for span in SPANS for stat in ("p50_ms", "p95_ms")
+)
+
+
+class RenderBench:
+    def __init__(self, db_path, seed=0, tick_every=240):
+        import pygame
+        import main
+        from profiler import FrameProfiler
+
+        self.pygame = pygame
+        self.main = main
+
+        pygame.init()
+        pygame.mixer.init()
+        # SCALED needs a renderer, which the dummy driver doesn't have
+        self.screen = pygame.display.set_mode((1920, 1080))
+
+        self.state = main.GameState(db_path)
+        self.state.reseed(seed)
+        self.assets = main.GameAssets()
+        self.gui = main.GameGUI()
+        self.state.gui = self.gui
+
+        self.scanlines = self.gui.layers.scanlines(1920, 1080, 3, 45)
+        self.pixel_surface = pygame.Surface((1920, 1080))
+
+        self.profiler = FrameProfiler(window=1_000_000)
+        main.instrument_frame(self.profiler, self.state, self.gui)
+        self.profiler.instrument(self.gui, "update_chart_layer", "_draw_chart_data")
+
+        self.tick_every = tick_every
+        self.frames = 0
+        self.sidebar_data = None
+        self.click_zones = None
+
+    def close(self):
+        self.state.db.close()
+        self.state.price_board.close()
+        self.pygame.quit()
+
+    # ----------------------------------------------------
+    # ONE FRAME (main.py's normal branch, minus events + pacing)
+    # ----------------------------------------------------
+    def frame(self):
+        pygame, state, profiler = self.pygame, self.state, self.profiler
+        profiler.begin_frame()
+
+        self.frames += 1
+        if self.tick_every and self.frames % self.tick_every == 0:
+            open_clock(state)
+            state.apply_tick_price()
+        state.portfolio_value = state.portfolio_mgr.get_portfolio_value()
+        phase = self.frames % self.tick_every / self.tick_every if self.tick_every else 0.0
+        time_left = state.tick_interval * (1 - phase)
+
+        with profiler.span("render_screen"):
+            game_surface = pygame.Surface((1920, 1080))
+            game_surface.fill((0, 0, 0))
+            self.sidebar_data, self.click_zones = self.main.render_game_screen(
+                self.gui, state, self.assets, game_surface, time_left, DT
+            )
+
+        with profiler.span("crt_post" if state.ui.crt_enabled else "present"):
+            self.main.present_frame(self.screen, game_surface, state.ui.crt_enabled,
+                                    self.pixel_surface, self.scanlines)
+
+        with profiler.span("display_flip"):
+            pygame.display.flip()
+        pygame.event.pump()
+        profiler.end_frame()
+
+    # ----------------------------------------------------
+    # INPUT (what main.py hands UiEventManager)
+    # ----------------------------------------------------
+    def click(self, rect):
+        self.state.ui.handle_mouse(rect.centerx, rect.centery, self.sidebar_data, self.click_zones)
+
+    def wheel(self, y):
+        state = self.state
+        state.prev_chart_zoom = state.chart_zoom
+        state.chart_zoom *= (1.15 if y > 0 else 1 / 1.15)
+        state.chart_zoom = max(0.1, min(200.0, state.chart_zoom))
+
+    def chart_window(self):
+        """(candles in the 7-day window, candles on screen) at the current zoom."""
+        history = self.state.tickers_obj[self.state.selected_stock].day_history
+        total = len(history) - history.day_window_start(7)
+        zoom = max(0.1, min(20.0, self.state.chart_zoom))
+        return total, max(10, min(total, int(total / zoom)))
+
+    def nudge(self):
+        """Move the window by one candle so the chart layer is redrawn."""
+        total, visible = self.chart_window()
+        if total > visible:
+            offset = self.state.chart_offset
+            self.state.chart_offset = offset + 1 if offset < total - visible else offset - 1
+
+    def timeframe(self):
+        key = self.gui.chart_cache.get("key")
+        return key[7] if key else None
+
+    # ----------------------------------------------------
+    # SCENARIO (each step yields once per frame)
+    # ----------------------------------------------------
+    def steps(self, frames):
+        state, ui = self.state, self.state.ui
+        tickers = list(state.tickers)
+
+        def hold(n=frames, each=None):
+            for _ in range(n):
+                if each is not None:
+                    each()
+                yield
+
+        yield "idle", None, hold()
+
+        def select(ticker):
+            self.click(self.click_zones[ticker])
+            yield from hold()
+        yield "select", None, select(tickers[0])
+        yield "switch", None, select(tickers[1])
+
+        def zoom():
+            state.chart_zoom = state.prev_chart_zoom = 1.0
+            for y in (1, -1):
+                for _ in range(22):      # 1.15 ** 22 > 20, the chart's zoom cap
+                    self.wheel(y)
+                    yield
+        yield "zoom", None, zoom()
+
+        for minutes in TIMEFRAMES:
+            total, _ = self.chart_window()
+            zoom = TIMEFRAME_DX[minutes] * total / self.gui.CHART_WIDTH
+            state.chart_zoom = state.prev_chart_zoom = zoom
+            _, visible = self.chart_window()
+            state.chart_offset = (total - visible) // 2
+            self.frame()
+            if self.timeframe() != minutes:
+                yield f"tf_{minutes}m", f"not reachable in the 7-day window (zoom {zoom:.2f})", None
+                continue
+            yield f"tf_{minutes}m", None, hold(each=self.nudge)
+
+        def pan():
+            state.chart_zoom = state.prev_chart_zoom = 4.0
+            total, visible = self.chart_window()
+            state.chart_offset = total - visible
+            step = max(1, (total - visible) // (frames // 2 or 1))
+            for i in range(frames):
+                delta = -step if i < frames // 2 else step
+                state.chart_offset = max(0, min(total - visible, state.chart_offset + delta))
+                yield
+        yield "pan", None, pan()
+
+        def toggle(rect_name):
+            self.click(getattr(state, rect_name))
+            yield from hold(each=self.nudge)
+        yield "volume", None, toggle("toggle_volume_rect")
+        yield "candles", None, toggle("toggle_candles_rect")
+
+        def drawer():
+            rect = ui.drawer_handle_rect
+            self.click(rect)
+            x = rect.centerx
+            for i in range(frames):
+                if ui.drawer_dragging:
+                    x -= 15
+                    ui.handle_mouse_motion(x, rect.centery, (1, 0, 0))
+                    if ui.drawer_x <= ui.drawer_open_x:
+                        ui.handle_mouse_motion(x, rect.centery, (0, 0, 0))
+                yield
+        yield "drawer", None, drawer()
+
+        def screen(name):
+            ui.current_screen = name
+            yield from hold()
+            ui.current_screen = "normal"
+        yield "portfolio", None, screen("portfolio")
+        yield "visualize", None, screen("visualize")
+
+        def crt(enabled):
+            ui.crt_enabled = enabled
+            yield from hold()
+        yield "crt_on", None, crt(True)
+        yield "crt_off", None, crt(False)
+
+    def run(self, frames):
+        results = []
+        for name, skipped, body in self.steps(frames):
+            if skipped:
+                results.append({"case": name, "skipped": skipped})
+                continue
+
+            first = self.profiler.frame_number
+            seen = set()
+            for _ in body:
+                self.frame()
+                if self.state.selected_stock is not None:
+                    seen.add(self.timeframe())
+            results.append(self._step_result(name, first, seen))
+
+        everything = self._step_result("all", 0, set())
+        everything["peak_rss_mib"] = peak_rss_mib()
+        results.append(everything)
+        return results
+
+    def _step_result(self, name, first, timeframes):
+        per_span = {}
+        for n, spans in self.profiler.frames:
+            if n >= first:
+                for span, ms in spans.items():
+                    per_span.setdefault(span, []).append(ms)
+        result = {
+            "case": name,
+            "frames": len(per_span.get("frame", ())),
+            "spans": {span: summarize(ms) for span, ms in per_span.items()},
+        }
+        if timeframes - {None}:
+            result["timeframes"] = sorted(timeframes - {None})
+        return result
+
+
+# ====================================================
+# DRIVER
+# ====================================================
+def _report(r):
+    if "skipped" in r:
+        return f"{r['case']:<12} skipped ({r['skipped']})"
+
+    spans = r["spans"]
+    slowest = sorted((s for s in spans if s not in ("frame", "render_screen")),
+                     key=lambda s: -spans[s]["p95_ms"])[:3]
+    frame = spans["frame"]
+    return (f"{r['case']:<12} {r['frames']:>5} frames  p50 {frame['p50_ms']:>7.2f}"
+            f"  p95 {frame['p95_ms']:>7.2f}  p99 {frame['p99_ms']:>7.2f} ms   "
+            + "  ".join(f"{s} {spans[s]['p95_ms']:.2f}" for s in slowest))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the renderer off-screen on a scripted scenario.")
+    parser.add_argument("--tickers", type=int, default=19)
+    parser.add_argument("--history", type=int, default=7 * CANDLES_PER_DAY,
+                        help="5-minute candles per ticker (default: the chart's 7-day window)")
+    parser.add_argument("--frames", type=int, default=120, help="frames per scenario step")
+    parser.add_argument("--tick-every", type=int, default=240, help="frames between market ticks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="result file (default: benchmarks/results/render-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    meta = run_meta()
+    meta.update(tickers=args.tickers, history=args.history, frames=args.frames,
+                tick_every=args.tick_every, video_driver=os.environ["SDL_VIDEODRIVER"])
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "bench.db")
+        build_universe(db_path, args.tickers, args.history, seed=args.seed)
+
+        # the game's own prints (clicks, news, migrations) would drown the report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            bench = RenderBench(db_path, args.seed, args.tick_every)
+            try:
+                results = bench.run(args.frames)
+            finally:
+                bench.close()
+
+    for r in results:
+        print(_report(r))
+
+    write_results(args.out or default_out("render", meta), "render", meta, results)
+    if args.compare:
+        compare(args.compare, results, COMPARE_METRICS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# ================================================
+# benchmarks/common.py (SYNTHETIC UNIVERSES + RESULT FILES)
+# ================================================
+#
+#   Shared by the benchmark scripts: builds a game.db with N tickers and
+#   H candles each, gathers run metadata, summarizes samples and reads /
+#   writes / compares the JSON result files.
+#
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import game_config
+from database import (
+    ACCOUNT_TABLE_SQL, CANDLES_TABLE_SQL, NEWS_TABLE_SQL, PORTFOLIO_TABLE_SQL, TICKERS_TABLE_SQL,
+    SCHEMA_VERSION, set_schema_version,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+CANDLES_PER_DAY = 1440 // 5
+
+
+# ====================================================
+# SYNTHETIC UNIVERSE
+# ====================================================
+def template_tickers():
+    return list(game_config.load(os.path.join(ROOT, "game"), "tickers").values())
+
+
+def build_universe(path, n_tickers, history=0, seed=0):
+    """
+    Write a fresh game.db at `path`: n_tickers tickers cloned from
+    game/tickers.json with jittered prices, `history` 5-minute candles
+    each (random walks on the days before today) and the clock at
+    today's market open. Returns the game_day the account is on.
+    """
+    rng = np.random.default_rng(seed)
+    templates = template_tickers()
+    days = -(-history // CANDLES_PER_DAY)
+    game_day = days + 1
+    if game_day > 40:
+        raise ValueError("history must fit in one in-game year (39 days of candles)")
+
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    for sql in (TICKERS_TABLE_SQL, CANDLES_TABLE_SQL, PORTFOLIO_TABLE_SQL,
+                ACCOUNT_TABLE_SQL, NEWS_TABLE_SQL):
+        conn.execute(sql)
+
+    names = [t["ticker"] for t in templates[:n_tickers]]
+    names += [f"S{i:06d}" for i in range(n_tickers - len(names))]
+    scale = rng.uniform(0.5, 2.0, n_tickers)
+    scale[:len(templates)] = 1.0
+
+    ticker_rows = []
+    for i, name in enumerate(names):
+        t = templates[i % len(templates)]
+        price = round(t["current_price"] * scale[i], 2)
+        ticker_rows.append((
+            name, t["name"], t["sector"], price, price, round(t["base_price"] * scale[i], 2),
+            t["volatility"], t["gravity"], t["trend"], price, price, 0,
+            t["volume"], t["avg_volume"],
+        ))
+    conn.executemany("INSERT INTO tickers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     ticker_rows)
+    conn.executemany("INSERT INTO portfolio VALUES (?, 0, '[]', 0)", [(n,) for n in names])
+    conn.execute("""
+        INSERT INTO account (id, money, market_time, market_open, market_close, market_day)
+        VALUES (1, 1000000, 570, 570, 960, ?)
+    """, (game_day,))
+
+    if history:
+        # newest `history` slots before today, oldest first
+        slots = np.arange(days * CANDLES_PER_DAY - history, days * CANDLES_PER_DAY)
+        day = (slots // CANDLES_PER_DAY + 1).tolist()
+        minute = (slots % CANDLES_PER_DAY * 5).tolist()
+        for i, name in enumerate(names):
+            steps = rng.normal(0.0, 0.004, history)
+            # random walk that ends on the ticker's current price
+            close = ticker_rows[i][3] * np.exp(np.cumsum(steps) - steps.sum())
+            open_ = np.concatenate(([close[0]], close[:-1]))
+            wick = np.abs(rng.normal(0.0, 0.002, history)) * close
+            high = np.maximum(open_, close) + wick
+            low = np.minimum(open_, close) - wick
+            volume = rng.integers(1000, 50000, history)
+            conn.executemany(
+                "INSERT INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                zip([name] * history, day, minute,
+                    np.round(open_, 2).tolist(), np.round(high, 2).tolist(),
+                    np.round(low, 2).tolist(), np.round(close, 2).tolist(), volume.tolist())
+            )
+
+    set_schema_version(conn, SCHEMA_VERSION)
+    conn.commit()
+    conn.close()
+    return game_day
+
+
+# ====================================================
+# MEASUREMENT HELPERS
+# ====================================================
+def open_clock(state):
+    """Make the next _advance_clock() land inside market hours."""
+    if state.market_time + state.minutes_per_tick > state.market_close:
+        state._advance_game_day()
+        state.market_time = state.market_open - state.minutes_per_tick
+    elif state.market_time + state.minutes_per_tick < state.market_open:
+        state.market_time = state.market_open - state.minutes_per_tick
+
+
+def peak_rss_mib():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def summarize(samples_ms):
+    """count / mean / p50 / p95 / p99 / max of a list of millisecond samples."""
+    a = np.asarray(samples_ms, dtype=np.float64)
+    if not len(a):
+        return None
+    p50, p95, p99 = np.percentile(a, (50, 95, 99)).tolist()
+    return {
+        "count": len(a),
+        "mean_ms": float(a.mean()),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": float(a.max()),
+    }
+
+
+def run_meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# ====================================================
+# RESULT FILES
+# ====================================================
+def default_out(kind, meta):
+    return os.path.join(RESULTS_DIR, f"{kind}-{meta['commit'] or 'nogit'}.json")
+
+
+def write_results(path, kind, meta, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"kind": kind, "meta": meta, "results": results}, f, indent=2)
+    print(f"Wrote {path}")
+
+
+def compare(old_path, new_results, metrics, key="case"):
+    """Print new/old ratios for `metrics` of every case in both runs."""
+    with open(old_path) as f:
+        old = {r[key]: r for r in json.load(f)["results"]}
+
+    print(f"\n{'case':<24}{'metric':<30}{'old':>12}{'new':>12}{'new/old':>9}")
+    for r in new_results:
+        before = old.get(r[key])
+        if before is None:
+            continue
+        for metric in metrics:
+            a, b = _lookup(before, metric), _lookup(r, metric)
+            if a is None or b is None:
+                continue
+            ratio = f"{b / a:>9.2f}" if a else f"{'-':>9}"
+            print(f"{r[key]:<24}{metric:<30}{a:>12.4g}{b:>12.4g}{ratio}")
+
+
+def _lookup(result, dotted):
+    value = result
+    for part in dotted.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, (int, float)) else None
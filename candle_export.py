@@ -0,0 +1,397 @@
+# ================================================
+# candle_export.py (COLUMNAR CANDLE EXPORT)
+# ================================================
+#
+#   python candle_export.py                          # game.db -> exports/candles/
+#   python candle_export.py --db other.db --out /tmp/candles --compression none
+#
+#   Streams the candles table into one compressed columnar file per
+#   game day plus a manifest.json, and reads them back: as numpy
+#   columns for analysis (pd.DataFrame(read_columns(path)) works as is)
+#   or straight into CandleStores for the chart.
+#
+#   The export is a generator pipeline over one SQLite cursor walking
+#   the (ticker, day, time) key, so nothing is sorted:
+#
+#     candle_rows -> day_groups -> encoded_blocks -> PartitionWriter
+#
+#   Memory holds one (ticker, day) group at a time (at most a day of
+#   candles for one ticker) plus each open partition's index, however
+#   big the table is.
+#
+#   Partition file (day-NNN.candles):
+#
+#     MAGIC
+#     per ticker: time, open, high, low, close, volume blocks
+#                 (<i8 / <f8 columns, each block padded to 8 bytes)
+#     footer      JSON {day, compression, columns, tickers: {t: [rows, [[offset, len], ...]]}}
+#     trailer     footer length (<u8) + MAGIC
+#
+#   "zlib" blocks are byte-shuffled before compressing (every value's
+#   byte 0, then every byte 1, ...), which lines up the slowly changing
+#   high bytes of prices and times. "none" blocks are stored raw and
+#   the reader hands out numpy views straight into the memory map.
+#
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from candle_store import COLUMNS, CandleStore
+from database import get_database
+
+MAGIC = b"TSCNDL01"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+COMPRESSIONS = ("zlib", "none")
+ZLIB_LEVEL = 6
+
+BLOCK_COLUMNS = COLUMNS[1:]          # the day is the partition
+DTYPES = {name: "<i8" if name in ("time", "volume") else "<f8" for name in BLOCK_COLUMNS}
+ITEMSIZE = 8
+
+_TRAILER = struct.Struct("<Q8s")
+
+
+def partition_name(day):
+    return f"day-{day:03d}.candles"
+
+
+# ====================================================
+# COLUMN ENCODING
+# ====================================================
+def encode_column(values, dtype, compression):
+    raw = np.ascontiguousarray(values, dtype=dtype).tobytes()
+    if compression == "zlib":
+        shuffled = np.frombuffer(raw, np.uint8).reshape(-1, ITEMSIZE).T.tobytes()
+        return zlib.compress(shuffled, ZLIB_LEVEL)
+    return raw
+
+
+def decode_column(buf, offset, length, dtype, rows, compression):
+    """One column of `rows` values from buf[offset:offset + length]."""
+    if compression == "zlib":
+        shuffled = np.frombuffer(zlib.decompress(buf[offset:offset + length]), np.uint8)
+        return shuffled.reshape(ITEMSIZE, -1).T.copy().view(dtype).reshape(rows)
+    return np.frombuffer(buf, dtype=dtype, count=rows, offset=offset)
+
+
+# ====================================================
+# EXPORT PIPELINE
+# ====================================================
+def candle_rows(conn, tickers=None, batch=8192):
+    """(ticker, day, time, o, h, l, c, v) rows in key order, fetched `batch` at a time."""
+    where, params = "", ()
+    if tickers:
+        where = f"WHERE ticker IN ({','.join('?' * len(tickers))})"
+        params = tuple(tickers)
+
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT ticker, day, time, open, high, low, close, volume
+        FROM candles
+        {where}
+        ORDER BY ticker, day, time
+    """, params)
+    while True:
+        rows = cur.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+def day_groups(rows):
+    """Runs of rows sharing (ticker, day) -> (ticker, day, [(time, o, h, l, c, v)])."""
+    key, group = None, []
+    for row in rows:
+        if (row[0], row[1]) != key:
+            if group:
+                yield key[0], key[1], group
+            key, group = (row[0], row[1]), []
+        group.append(row[2:])
+    if group:
+        yield key[0], key[1], group
+
+
+def encoded_blocks(groups, compression):
+    """(ticker, day, rows) groups -> (ticker, day, row count, [column block bytes])."""
+    for ticker, day, rows in groups:
+        blocks = [encode_column(values, DTYPES[name], compression)
+                  for name, values in zip(BLOCK_COLUMNS, zip(*rows))]
+        yield ticker, day, len(rows), blocks
+
+
+class PartitionWriter:
+    """One day's partition, written to a .tmp file and renamed by close()."""
+
+    def __init__(self, path, day, compression):
+        self.path = path
+        self.day = day
+        self.compression = compression
+        self.index = {}
+        self.rows = 0
+        self.file = open(path + ".tmp", "wb")
+        self.file.write(MAGIC)
+
+    def write(self, ticker, rows, blocks):
+        spans = []
+        for block in blocks:
+            spans.append([self.file.tell(), len(block)])
+            self.file.write(block)
+            self.file.write(b"\0" * (-len(block) % ITEMSIZE))
+        self.index[ticker] = [rows, spans]
+        self.rows += rows
+
+    def close(self):
+        footer = json.dumps({
+            "format": FORMAT_VERSION,
+            "day": self.day,
+            "compression": self.compression,
+            "columns": {name: DTYPES[name] for name in BLOCK_COLUMNS},
+            "tickers": self.index,
+        }).encode()
+        self.file.write(footer)
+        self.file.write(_TRAILER.pack(len(footer), MAGIC))
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+        return os.path.getsize(self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.path + ".tmp")
+
+
+def export_candles(db_path, out_dir, compression="zlib", tickers=None, batch=8192):
+    """
+    Write the candles table of `db_path` to `out_dir`, one partition per
+    day, then manifest.json (last, so a half-written export has the
+    previous manifest or none). Partitions of an earlier export that
+    the new one doesn't have are removed. Returns the manifest.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"unknown compression: {compression}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    conn = get_database(db_path).reader()
+    row = conn.execute("SELECT market_day FROM account WHERE id = 1").fetchone()
+    current_day = row[0] if row else None
+
+    writers = {}
+    blocks = encoded_blocks(day_groups(candle_rows(conn, tickers, batch)), compression)
+    try:
+        for ticker, day, rows, columns in blocks:
+            writer = writers.get(day)
+            if writer is None:
+                path = os.path.join(out_dir, partition_name(day))
+                writer = writers[day] = PartitionWriter(path, day, compression)
+            writer.write(ticker, rows, columns)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    partitions = []
+    for day, writer in sorted(writers.items()):
+        size = writer.close()
+        partitions.append({"day": day, "file": partition_name(day), "rows": writer.rows,
+                           "tickers": len(writer.index), "bytes": size})
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "columns": list(COLUMNS),
+        "compression": compression,
+        "current_day": current_day,
+        "partitions": partitions,
+    }
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+
+    keep = {p["file"] for p in partitions}
+    for name in os.listdir(out_dir):
+        if name.endswith(".candles") and name not in keep:
+            os.remove(os.path.join(out_dir, name))
+    return manifest
+
+
+# ====================================================
+# READER
+# ====================================================
+class CandlePartition:
+    """One day's partition file, memory-mapped read-only."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        size = len(self.map)
+        footer_len, magic = _TRAILER.unpack_from(self.map, size - _TRAILER.size)
+        if self.map[:len(MAGIC)] != MAGIC or magic != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path}: not a candle partition")
+
+        start = size - _TRAILER.size - footer_len
+        footer = json.loads(self.map[start:start + footer_len])
+        if footer["format"] != FORMAT_VERSION:
+            self.map.close()
+            raise ValueError(f"{path}: partition format {footer['format']}, expected {FORMAT_VERSION}")
+
+        self.day = footer["day"]
+        self.compression = footer["compression"]
+        self.index = footer["tickers"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, ticker):
+        return ticker in self.index
+
+    @property
+    def tickers(self):
+        return list(self.index)
+
+    def columns(self, ticker, copy=False):
+        """
+        One ticker's candles as a dict of numpy columns (COLUMNS order).
+        Uncompressed partitions give read-only views into the map unless
+        `copy` is set; those must not outlive the partition.
+        """
+        rows, spans = self.index[ticker]
+        cols = {"day": np.full(rows, self.day, dtype=np.int64)}
+        for name, (offset, length) in zip(BLOCK_COLUMNS, spans):
+            col = decode_column(self.map, offset, length, DTYPES[name], rows, self.compression)
+            cols[name] = col.copy() if copy and self.compression == "none" else col
+        return cols
+
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:
+            pass    # numpy views still point into it; unmapped once they go
+
+
+def read_manifest(export_dir):
+    with open(os.path.join(export_dir, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest["format"] != FORMAT_VERSION:
+        raise ValueError(f"{export_dir}: export format {manifest['format']}, expected {FORMAT_VERSION}")
+    return manifest
+
+
+def partition_days(manifest):
+    """
+    Days in time order. Like CandleManager.load_all, days after the
+    export's current_day are left over from last in-game year and
+    come first.
+    """
+    days = sorted(p["day"] for p in manifest["partitions"])
+    current = manifest.get("current_day")
+    if current is None:
+        return days
+    return [d for d in days if d > current] + [d for d in days if d <= current]
+
+
+def iter_partitions(export_dir, days=None, newest_first=False):
+    """Open each partition in time order, closing it when the caller moves on."""
+    manifest = read_manifest(export_dir)
+    order = partition_days(manifest)
+    if newest_first:
+        order.reverse()
+    for day in order:
+        if days is not None and day not in days:
+            continue
+        with CandlePartition(os.path.join(export_dir, partition_name(day))) as part:
+            yield part
+
+
+def read_columns(export_dir, tickers=None, days=None):
+    """
+    Candles of the whole export (or some tickers / days) as one dict of
+    numpy columns, "ticker" first, sorted by ticker then time.
+    """
+    chunks = {}
+    for part in iter_partitions(export_dir, days):
+        for ticker in (tickers if tickers is not None else part.tickers):
+            if ticker in part:
+                chunks.setdefault(ticker, []).append(part.columns(ticker, copy=True))
+
+    out = {"ticker": [], **{name: [] for name in COLUMNS}}
+    for ticker in sorted(chunks):
+        for cols in chunks[ticker]:
+            out["ticker"].append(np.full(len(cols["day"]), ticker))
+            for name in COLUMNS:
+                out[name].append(cols[name])
+    return {name: np.concatenate(parts) if parts else np.zeros(0) for name, parts in out.items()}
+
+
+def load_stores(export_dir, stores):
+    """
+    Fill each CandleStore in `stores` (ticker -> store) with that
+    ticker's newest candles, up to the store's capacity. Partitions are
+    read newest first, each once, and reading stops as soon as every
+    store is full.
+    """
+    chunks = {ticker: [] for ticker in stores}
+    counts = dict.fromkeys(stores, 0)
+    pending = set(stores)
+
+    for part in iter_partitions(export_dir, newest_first=True):
+        for ticker in [t for t in pending if t in part]:
+            cols = part.columns(ticker, copy=True)
+            chunks[ticker].append(cols)
+            counts[ticker] += len(cols["day"])
+            if counts[ticker] >= stores[ticker].capacity:
+                pending.discard(ticker)
+        if not pending:
+            break
+
+    for ticker, store in stores.items():
+        parts = chunks[ticker][::-1]
+        store.load_columns({
+            name: np.concatenate([cols[name] for cols in parts]) if parts else np.zeros(0)
+            for name in COLUMNS
+        })
+    return stores
+
+
+def load_store(export_dir, ticker, store=None):
+    """One ticker's newest candles from an export, as a CandleStore."""
+    store = store if store is not None else CandleStore()
+    return load_stores(export_dir, {ticker: store})[ticker]
+
+
+# ====================================================
+# COMMAND LINE
+# ====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the candles table to columnar day partitions.")
+    parser.add_argument("--db", default="game.db")
+    parser.add_argument("--out", default=os.path.join("exports", "candles"))
+    parser.add_argument("--compression", choices=COMPRESSIONS, default="zlib")
+    parser.add_argument("--tickers", help="comma-separated tickers (default: all)")
+    args = parser.parse_args(argv)
+
+    tickers = [t for t in args.tickers.split(",") if t] if args.tickers else None
+    t0 = time.perf_counter()
+    manifest = export_candles(args.db, args.out, args.compression, tickers)
+    elapsed = time.perf_counter() - t0
+
+    rows = sum(p["rows"] for p in manifest["partitions"])
+    size = sum(p["bytes"] for p in manifest["partitions"])
+    print(f"Exported {rows} candles into {len(manifest['partitions'])} partitions "
+          f"({size / 1024:.1f} KiB, {args.compression}) -> {args.out} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
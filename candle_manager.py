@@ -1,74 +1,190 @@
 # candle_manager.py
 
-import sqlite3
+from collections import OrderedDict
+
+from candle_store import CandleStore
+from database import get_database
 
 class CandleManager:
-    MAX_CANDLES = 2000
+    MAX_CANDLES = CandleStore.CAPACITY
+
+    # full histories kept in RAM (least recently viewed gets evicted)
+    MAX_LOADED = 8
+    # candles an unviewed ticker keeps once everything is saved
+    TAIL_CANDLES = 32
 
     def __init__(self, db_path="game.db"):
         self.db_path = db_path
+        self.db = get_database(db_path)
+
+        # ticker -> CandleStore.appended count already handed to a save
+        self.saved_counts = {}
+
+        # ticker -> CandleStore.appended count committed to SQLite; lags
+        # saved_counts while the save worker still has the rows
+        self.committed_counts = {}
+
+        # tickers whose history has been paged in, oldest view first
+        self.loaded = OrderedDict()
 
     # ----------------------------------------------------
-    # SAVE ALL CANDLES (used inside GameState.autosave)
+    # INCREMENTAL SAVE (used by MarketState.collect_save_delta)
     # ----------------------------------------------------
-    def save_all(self, tickers_obj):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
+    def new_candle_rows(self, tickers_obj):
+        """
+        Rows for every candle appended since the previous call, plus
+        the append marks they bring each ticker up to (hand those to
+        mark_committed() once the rows are in SQLite). Candles only
+        ever get appended, so the store's running append count says how
+        many of the newest candles are unsaved. Advances the saved
+        marker.
+        """
+        rows = []
+        marks = {}
 
         for name, stock in tickers_obj.items():
+            history = stock.day_history
+
+            # unviewed tickers only keep a tail, plus anything not yet
+            # committed: ensure_loaded() cannot read that from SQLite
+            if name not in self.loaded and len(history) > self.TAIL_CANDLES:
+                uncommitted = history.appended - self.committed_counts.get(name, 0)
+                keep = max(uncommitted, self.TAIL_CANDLES)
+                if keep < len(history):
+                    history.trim(keep)
 
-            # Trim RAM first
-            stock.day_history = stock.day_history[-self.MAX_CANDLES:]
-
-            # Clear old candles for this ticker
-            cur.execute("DELETE FROM candles WHERE ticker = ?", (name,))
-
-            # Insert current candle history
-            for c in stock.day_history:
-                cur.execute("""
-                    INSERT INTO candles 
-                    (ticker, day, time, open, high, low, close, volume)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    name,
-                    c["day"],
-                    c["time"],
-                    c["open"],
-                    c["high"],
-                    c["low"],
-                    c["close"],
-                    c["volume"]
-                ))
-
-        conn.commit()
-        conn.close()
+            unsaved = min(history.appended - self.saved_counts.get(name, 0), len(history))
+
+            if unsaved > 0:
+                rows.extend((name,) + row for row in history.tuples(len(history) - unsaved))
+                marks[name] = history.appended
+
+            self.saved_counts[name] = history.appended
+
+        return rows, marks
+
+    def mark_committed(self, marks):
+        """Record save marks whose rows are now committed (any thread)."""
+        self.committed_counts.update(marks)
+
+    def insert_rows(self, conn, rows):
+        """Append candle rows; caller owns the transaction."""
+        conn.executemany("""
+            INSERT OR REPLACE INTO candles
+            (ticker, day, time, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
 
     # ----------------------------------------------------
-    # LOAD ALL CANDLES (used inside GameState.load_from_db)
+    # LOAD ALL CANDLES (eager; startup uses ensure_loaded instead)
     # ----------------------------------------------------
-    def load_all(self, tickers_dict):
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-
-        rows = cur.execute("""
-            SELECT ticker, day, time, open, high, low, close, volume
-            FROM candles
-            ORDER BY ticker, day, time
-        """).fetchall()
-
-        for ticker, day, time, o, h, l, c, vol in rows:
-            if ticker in tickers_dict:
-                tickers_dict[ticker]["day_history"].append({
-                    "day": day,
-                    "time": time,
-                    "open": o,
-                    "high": h,
-                    "low": l,
-                    "close": c,
-                    "volume": vol
-                })
-
-        conn.close()
+    def load_all(self, tickers_dict, current_day=None):
+        """
+        current_day = today's game_day. Slots after it are left over from
+        last in-game year, so they are read first to keep history in
+        time order across the day-counter wrap. Both reads walk the
+        (ticker, day, time) key in order.
+        """
+        cur = self.db.reader().cursor()
+
+        if current_day is None:
+            ranges = [("1", ())]
+        else:
+            ranges = [("day > ?", (current_day,)), ("day <= ?", (current_day,))]
+
+        by_ticker = {}
+        for where, params in ranges:
+            rows = cur.execute(f"""
+                SELECT ticker, day, time, open, high, low, close, volume
+                FROM candles
+                WHERE {where}
+                ORDER BY ticker, day, time
+            """, params).fetchall()
+
+            for row in rows:
+                by_ticker.setdefault(row[0], []).append(row[1:])
+
+        # SQLite keeps the full history; RAM keeps the newest MAX_CANDLES
+        for ticker, d in tickers_dict.items():
+            history = d["day_history"] = CandleStore.coerce(d.get("day_history"), self.MAX_CANDLES)
+            history.load_rows(by_ticker.get(ticker, []))
+            self.saved_counts[ticker] = history.appended
+            self.committed_counts[ticker] = history.appended
+            self.loaded[ticker] = True
+
+    # ----------------------------------------------------
+    # LAZY LOAD (one ticker, when the chart needs it)
+    # ----------------------------------------------------
+    def ensure_loaded(self, name, tickers_obj, current_day=None):
+        """
+        Page in the newest MAX_CANDLES of `name` from SQLite, in front of
+        whatever the simulation has appended since startup. Marks the
+        ticker most recently used and evicts the least recently used
+        history past MAX_LOADED.
+        """
+        if name in self.loaded:
+            self.loaded.move_to_end(name)
+            return
+
+        history = tickers_obj[name].day_history
+        need = history.capacity - len(history)
+
+        if need > 0:
+            rows = self.read_recent(name, need + len(history), current_day)
+
+            # candles already in RAM may or may not be on disk yet
+            # (the save worker can lag behind), so match them by slot;
+            # nothing uncommitted has been trimmed, so there is no gap
+            live = set(zip(history.column("day").tolist(),
+                           history.column("time").tolist()))
+            older = [row for row in rows if (row[0], row[1]) not in live]
+
+            # prepending shifts every append mark by the rows taken
+            added = history.prepend_rows(older)
+            self.saved_counts[name] = self.saved_counts.get(name, 0) + added
+            self.committed_counts[name] = self.committed_counts.get(name, 0) + added
+
+        self.loaded[name] = True
+
+        while len(self.loaded) > self.MAX_LOADED:
+            old, _ = self.loaded.popitem(last=False)
+            self.evict(old, tickers_obj)
+
+    def evict(self, name, tickers_obj):
+        """Shrink a ticker back to its tail, keeping anything not yet committed."""
+        self.loaded.pop(name, None)
+        history = tickers_obj[name].day_history
+        uncommitted = history.appended - self.committed_counts.get(name, 0)
+        history.trim(max(uncommitted, self.TAIL_CANDLES))
+
+    def read_recent(self, name, limit, current_day=None):
+        """
+        Newest `limit` candles of one ticker, oldest first. Both reads
+        walk the (ticker, day, time) key backwards from the newest slot;
+        slots after current_day are last in-game year and come first.
+        """
+        cur = self.db.reader().cursor()
+
+        if current_day is None:
+            ranges = [("1", ())]
+        else:
+            ranges = [("day <= ?", (current_day,)), ("day > ?", (current_day,))]
+
+        newest_first = []
+        for where, params in ranges:
+            remaining = limit - len(newest_first)
+            if remaining <= 0:
+                break
+            newest_first += cur.execute(f"""
+                SELECT day, time, open, high, low, close, volume
+                FROM candles
+                WHERE ticker = ? AND {where}
+                ORDER BY day DESC, time DESC
+                LIMIT ?
+            """, (name, *params, remaining)).fetchall()
+
+        newest_first.reverse()
+        return newest_first
 
     def add_price(self, stock_dict, day, time, price, volume, base_minutes=5):
         """
@@ -88,20 +204,8 @@ class CandleManager:
 
         # If no candles yet OR new bucket → start new candle
         if not candles or candles[-1]["time"] != bucket or candles[-1]["day"] != day:
-            candles.append({
-                "day": day,
-                "time": bucket,
-                "open": price,
-                "high": price,
-                "low": price,
-                "close": price,
-                "volume": volume
-            })
+            candles.append(day, bucket, price, price, price, price, volume)
             return
 
-        # Otherwise update the existing candle
-        c = candles[-1]
-        c["close"] = price
-        c["high"] = max(c["high"], price)
-        c["low"] = min(c["low"], price)
-        c["volume"] += volume
+        # Otherwise update the existing candle (and its higher timeframes)
+        candles.merge_last(price, volume)
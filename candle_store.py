@@ -0,0 +1,427 @@
+# ================================================
+# candle_store.py (COLUMNAR CANDLE HISTORY)
+# ================================================
+#
+#   Replaces the list-of-dicts day_history. Each column lives in a
+#   buffer of up to twice the capacity: appends write at the end and,
+#   once the end is reached, the buffer doubles (while it is still
+#   small) or the live window is copied back to the front. That keeps
+#   appends O(1) amortized, the live window contiguous (columns()/slices
+#   are plain numpy views) and short histories cheap to hold.
+#
+#   Higher timeframes (15m ... 1D) are built on first request from the
+#   5m columns and then kept current on every append/merge_last, so the
+#   chart only has to slice them.
+#
+#   Candles arrive in time order, so append order *is* the sorted
+#   order. day_runs records where each day starts, which makes "the
+#   last N days" a constant-time lookup.
+#
+from collections import deque
+
+import numpy as np
+
+COLUMNS = ("day", "time", "open", "high", "low", "close", "volume")
+INT_COLUMNS = ("day", "time", "volume", "first_seq")
+
+BASE_MINUTES = 5
+TIMEFRAMES = (15, 30, 60, 120, 240, 1440)
+
+
+def rows_from_columns(cols, start=0, stop=None):
+    """List of plain candle dicts for cols[start:stop] (used by the chart)."""
+    return [
+        {"day": d, "time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for d, t, o, h, l, c, v in zip(
+            *(cols[name][start:stop].tolist() for name in COLUMNS)
+        )
+    ]
+
+
+class CandleView:
+    """
+    Dict-like handle on one candle in a CandleStore.
+    Reads and writes go straight to the columns, so
+    `history[-1]["close"] = price` works like it did on the dicts.
+    """
+    __slots__ = ("store", "seq")
+
+    def __init__(self, store, seq):
+        self.store = store
+        self.seq = seq
+
+    def __getitem__(self, key):
+        return self.store._column(key)[self.store._phys(self.seq)].item()
+
+    def __setitem__(self, key, value):
+        self.store._column(key)[self.store._phys(self.seq)] = value
+
+    def __contains__(self, key):
+        return key in COLUMNS
+
+    def get(self, key, default=None):
+        return self[key] if key in COLUMNS else default
+
+    def keys(self):
+        return list(COLUMNS)
+
+    def items(self):
+        return [(k, self[k]) for k in COLUMNS]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"CandleView({self.to_dict()})"
+
+
+class CandleStore:
+    """
+    Fixed-capacity ring of candles kept as int64/float64 columns.
+    Oldest candles fall off once `capacity` is reached.
+    """
+    CAPACITY = 2000
+    MIN_BUFFER = 64
+
+    def __init__(self, capacity=CAPACITY, extra=()):
+        self.capacity = capacity
+        self.names = COLUMNS + tuple(extra)
+        self.cols = None             # allocated on first append
+        self.size = 0                # physical buffer length
+        self.start = 0
+        self.end = 0
+        self.appended = 0            # total candles ever appended
+
+        # minutes -> aggregated CandleStore (with a first_seq column
+        # pointing at the first 5m candle of each bucket)
+        self.levels = {}
+
+        # [day, seq of its first candle], oldest first
+        self.day_runs = deque()
+
+    @classmethod
+    def coerce(cls, history, capacity=CAPACITY):
+        """Accept an existing store or a legacy list of candle dicts."""
+        if isinstance(history, cls):
+            return history
+        store = cls(capacity)
+        for c in history or []:
+            store.append(c["day"], c["time"], c["open"], c["high"],
+                         c["low"], c["close"], c["volume"])
+        return store
+
+    # ----------------------------------------------------
+    # INTERNALS
+    # ----------------------------------------------------
+    def _allocate(self, size):
+        size = min(max(size, self.MIN_BUFFER), self.capacity * 2)
+        self.size = size
+        self.cols = {
+            name: np.zeros(size, dtype=np.int64 if name in INT_COLUMNS else np.float64)
+            for name in self.names
+        }
+
+    def _resize(self, size):
+        """Move the live window to the front of a fresh `size` buffer."""
+        old = self.cols
+        n = self.end - self.start
+        self._allocate(size)
+        for name, col in self.cols.items():
+            col[:n] = old[name][self.start:self.end]
+        self.start = 0
+        self.end = n
+
+    def _compact(self):
+        n = self.end - self.start
+        for col in self.cols.values():
+            col[:n] = col[self.start:self.end]
+        self.start = 0
+        self.end = n
+
+    def _column(self, key):
+        if self.cols is None or key not in self.cols:
+            raise KeyError(key)
+        return self.cols[key]
+
+    def _phys(self, seq):
+        first = self.appended - len(self)
+        if seq < first or seq >= self.appended:
+            raise IndexError("candle no longer in history")
+        return self.start + (seq - first)
+
+    # ----------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------
+    def append(self, day, time, open_, high, low, close, volume):
+        if self.cols is None:
+            self._allocate(self.MIN_BUFFER)
+        elif self.end == self.size:
+            if self.size < self.capacity * 2:
+                self._resize(self.size * 2)
+            else:
+                self._compact()
+
+        i = self.end
+        cols = self.cols
+        cols["day"][i] = day
+        cols["time"][i] = time
+        cols["open"][i] = open_
+        cols["high"][i] = high
+        cols["low"][i] = low
+        cols["close"][i] = close
+        cols["volume"][i] = volume
+
+        self.end += 1
+        self.appended += 1
+        if self.end - self.start > self.capacity:
+            self.start += 1
+
+        seq = self.appended - 1
+        runs = self.day_runs
+        if not runs or runs[-1][0] != day:
+            runs.append((day, seq))
+        # drop days that have scrolled out of the ring entirely
+        first_live = seq + 1 - (self.end - self.start)
+        while len(runs) > 1 and runs[1][1] <= first_live:
+            runs.popleft()
+
+        for minutes, level in self.levels.items():
+            bucket = (time // minutes) * minutes
+            if level.end > level.start:
+                last = level.end - 1
+                lc = level.cols
+                if lc["day"][last] == day and lc["time"][last] == bucket:
+                    lc["close"][last] = close
+                    if high > lc["high"][last]:
+                        lc["high"][last] = high
+                    if low < lc["low"][last]:
+                        lc["low"][last] = low
+                    lc["volume"][last] += volume
+                    continue
+            level.append(day, bucket, open_, high, low, close, volume)
+            level.cols["first_seq"][level.end - 1] = seq
+
+    def merge_last(self, price, volume):
+        """Fold another trade into the newest candle (and its buckets)."""
+        for store in (self, *self.levels.values()):
+            i = store.end - 1
+            c = store.cols
+            c["close"][i] = price
+            if price > c["high"][i]:
+                c["high"][i] = price
+            if price < c["low"][i]:
+                c["low"][i] = price
+            c["volume"][i] += volume
+
+    def load_rows(self, rows):
+        """Bulk-replace contents with (day, time, o, h, l, c, v) rows, oldest first."""
+        rows = rows[-self.capacity:]
+        self.start = self.end = 0
+        self.day_runs = deque()
+        self.levels = {}
+        if not rows:
+            return
+
+        n = len(rows)
+        self._allocate(n * 2)
+        for name, values in zip(COLUMNS, zip(*rows)):
+            self.cols[name][:n] = values
+        self._loaded(n)
+
+    def load_columns(self, cols):
+        """
+        Bulk-replace contents with equal-length column arrays (one per
+        name in COLUMNS), oldest first. No per-row conversion.
+        """
+        n = min(len(cols["day"]), self.capacity)
+        self.start = self.end = 0
+        self.day_runs = deque()
+        self.levels = {}
+        if n == 0:
+            return
+
+        self._allocate(n * 2)
+        for name in COLUMNS:
+            self.cols[name][:n] = cols[name][len(cols[name]) - n:]
+        self._loaded(n)
+
+    def _loaded(self, n):
+        self.end = n
+        self.appended += n
+
+        # rebuilt from the new columns on next request
+        self.levels = {}
+
+        day = self.cols["day"][:n]
+        starts = np.concatenate(([0], np.flatnonzero(day[1:] != day[:-1]) + 1))
+        base = self.appended - n
+        self.day_runs = deque(zip(day[starts].tolist(), (starts + base).tolist()))
+
+    def prepend_rows(self, rows):
+        """
+        Put older (day, time, o, h, l, c, v) rows in front of the live
+        candles, as many as still fit. The existing candles keep their
+        position relative to `appended`, which grows by the number of
+        rows taken. Returns that number.
+        """
+        room = self.capacity - len(self)
+        rows = list(rows[-room:]) if room > 0 else []
+        if not rows:
+            return 0
+
+        appended = self.appended
+        combined = rows + self.tuples()
+        # load_rows adds len(combined); land on appended + len(rows)
+        self.appended = appended + len(rows) - len(combined)
+        self.load_rows(combined)
+        return len(rows)
+
+    def trim(self, keep):
+        """Drop all but the newest `keep` candles and shrink the buffer."""
+        n = min(keep, len(self))
+        self.levels = {}
+        if n == 0:
+            self.cols = None
+            self.size = 0
+            self.start = self.end = 0
+            self.day_runs = deque()
+            return
+
+        self.start = self.end - n
+        self._resize(n * 2)
+
+        runs = self.day_runs
+        first_live = self.appended - n
+        while len(runs) > 1 and runs[1][1] <= first_live:
+            runs.popleft()
+
+    # ----------------------------------------------------
+    # TIMEFRAME PYRAMID
+    # ----------------------------------------------------
+    def timeframe(self, minutes):
+        """
+        Candles aggregated into `minutes` buckets (aligned to the clock,
+        one bucket per day for 1440). Built once, then maintained by
+        append/merge_last.
+        """
+        if minutes == BASE_MINUTES:
+            return self
+
+        level = self.levels.get(minutes)
+        if level is not None:
+            return level
+
+        ratio = max(1, minutes // BASE_MINUTES)
+        level = CandleStore(self.capacity // ratio + 2, extra=("first_seq",))
+
+        n = len(self)
+        if n:
+            cols = self.columns()
+            day = cols["day"]
+            bucket = (cols["time"] // minutes) * minutes
+            change = (day[1:] != day[:-1]) | (bucket[1:] != bucket[:-1])
+            starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+            ends = np.concatenate((starts[1:], [n])) - 1
+
+            high = np.maximum.reduceat(cols["high"], starts)
+            low = np.minimum.reduceat(cols["low"], starts)
+            volume = np.add.reduceat(cols["volume"], starts)
+
+            # keep only the newest buckets that fit
+            keep = slice(-level.capacity, None)
+            starts, ends = starts[keep], ends[keep]
+            k = len(starts)
+
+            level._allocate(k * 2)
+            lc = level.cols
+            lc["day"][:k] = day[starts]
+            lc["time"][:k] = bucket[starts]
+            lc["open"][:k] = cols["open"][starts]
+            lc["high"][:k] = high[keep]
+            lc["low"][:k] = low[keep]
+            lc["close"][:k] = cols["close"][ends]
+            lc["volume"][:k] = volume[keep]
+            lc["first_seq"][:k] = self.appended - n + starts
+            level.end = k
+            level.appended = k
+
+        self.levels[minutes] = level
+        return level
+
+    def bucket_range(self, minutes, start, stop):
+        """
+        Index range in timeframe(minutes) covering this store's
+        candles [start, stop). Partial buckets at either edge count.
+        """
+        level = self.timeframe(minutes)
+        if level is self:
+            return start, stop
+
+        first_seq = level.column("first_seq")
+        base = self.appended - len(self)
+        lo = int(np.searchsorted(first_seq, base + start, side="right")) - 1
+        hi = int(np.searchsorted(first_seq, base + stop, side="left"))
+        return max(lo, 0), hi
+
+    # ----------------------------------------------------
+    # DAY INDEX
+    # ----------------------------------------------------
+    def day_window_start(self, days):
+        """Index of the first candle of the last `days` days."""
+        runs = self.day_runs
+        if not runs:
+            return 0
+        first_seq = runs[max(len(runs) - days, 0)][1]
+        return max(0, first_seq - (self.appended - len(self)))
+
+    def day_offset(self, day):
+        """Index of the first candle of the newest run of `day`, or None."""
+        for d, seq in reversed(self.day_runs):
+            if d == day:
+                return max(0, seq - (self.appended - len(self)))
+        return None
+
+    # ----------------------------------------------------
+    # READ
+    # ----------------------------------------------------
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        n = len(self)
+        if isinstance(index, slice):
+            return [CandleView(self, self.appended - n + i)
+                    for i in range(*index.indices(n))]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("candle index out of range")
+        return CandleView(self, self.appended - n + index)
+
+    def __iter__(self):
+        first = self.appended - len(self)
+        for seq in range(first, self.appended):
+            yield CandleView(self, seq)
+
+    def column(self, name):
+        """Zero-copy view of one column, oldest first."""
+        if self.cols is None:
+            if name not in self.names:
+                raise KeyError(name)
+            return np.zeros(0, dtype=np.int64 if name in INT_COLUMNS else np.float64)
+        return self._column(name)[self.start:self.end]
+
+    def columns(self):
+        return {name: self.column(name) for name in COLUMNS}
+
+    def rows(self, start=0, stop=None):
+        """Plain dicts for history[start:stop]."""
+        return rows_from_columns(self.columns(), start, stop)
+
+    def tuples(self, start=0, stop=None):
+        """(day, time, o, h, l, c, v) tuples of Python scalars for history[start:stop]."""
+        cols = self.columns()
+        return list(zip(*(cols[name][start:stop].tolist() for name in COLUMNS)))
+
+    def __repr__(self):
+        return f"CandleStore({len(self)}/{self.capacity})"
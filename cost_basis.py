@@ -0,0 +1,94 @@
+# ================================================
+# cost_basis.py (POSITION COST-BASIS LOTS)
+# ================================================
+#
+#   A position's purchases as (qty, price) lots, oldest first, with a
+#   running share count and total cost so the average price is O(1).
+#   Selling consumes whole or partial lots from either end (FIFO or
+#   LIFO), touching only the lots it uses up. Buys at the same price as
+#   the newest lot are merged into it.
+#
+#   Stored in the portfolio table as JSON: [[qty, price], ...].
+#
+import json
+from collections import deque
+
+
+class Lots:
+    __slots__ = ("lots", "shares", "total_cost")
+
+    def __init__(self, lots=()):
+        self.lots = deque()
+        self.shares = 0
+        self.total_cost = 0.0
+        for qty, price in lots:
+            self.add(qty, price)
+
+    def __len__(self):
+        return len(self.lots)
+
+    def __repr__(self):
+        return f"Lots({list(map(tuple, self.lots))})"
+
+    @property
+    def avg_price(self):
+        return self.total_cost / self.shares if self.shares else 0.0
+
+    # ----------------------------------------------------
+    # BUY / SELL
+    # ----------------------------------------------------
+    def add(self, qty, price):
+        if qty <= 0:
+            return
+        if self.lots and self.lots[-1][1] == price:
+            self.lots[-1][0] += qty
+        else:
+            self.lots.append([qty, price])
+        self.shares += qty
+        self.total_cost += qty * price
+
+    def remove(self, qty, method="fifo"):
+        """
+        Take `qty` shares off the oldest ("fifo") or newest ("lifo") lots.
+        Returns the cost basis of the shares removed.
+        """
+        if method not in ("fifo", "lifo"):
+            raise ValueError(f"unknown lot method: {method}")
+
+        fifo = method == "fifo"
+        removed = 0.0
+        while qty > 0 and self.lots:
+            lot = self.lots[0] if fifo else self.lots[-1]
+            take = min(qty, lot[0])
+            removed += take * lot[1]
+            lot[0] -= take
+            qty -= take
+            self.shares -= take
+            if lot[0] == 0:
+                if fifo:
+                    self.lots.popleft()
+                else:
+                    self.lots.pop()
+
+        if self.lots:
+            self.total_cost -= removed
+        else:
+            # no float drift left behind once the position is closed
+            self.shares = 0
+            self.total_cost = 0.0
+        return removed
+
+    # ----------------------------------------------------
+    # STORAGE
+    # ----------------------------------------------------
+    def to_json(self):
+        return json.dumps([[qty, price] for qty, price in self.lots])
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text) if text else ())
+
+    @classmethod
+    def from_prices(cls, prices):
+        """Old format: one purchase price per share, oldest first."""
+        return cls((1, price) for price in prices)
@@ -1,30 +1,300 @@
+import json
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+from cost_basis import Lots
 
 # Path to your DB — update if yours is named differently
 DB_PATH = "game.db"
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
-
-print("Dropping old candles table (if exists)...")
-cur.execute("DROP TABLE IF EXISTS candles;")
+# Bump when adding a migration below
+SCHEMA_VERSION = 3
 
-print("Creating clean candles table...")
-cur.execute("""
-CREATE TABLE candles (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    ticker TEXT,
-    day INTEGER,
-    time INTEGER,
+# Candles are clustered on (ticker, day, time): per-ticker reads and
+# deletes are range scans and ORDER BY ticker, day, time needs no sort.
+# game_day wraps every in-game year, so writers use INSERT OR REPLACE and
+# the table keeps the newest candle for each slot.
+CANDLES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS candles (
+    ticker TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    time INTEGER NOT NULL,
     open REAL,
     high REAL,
     low REAL,
     close REAL,
-    volume INTEGER
+    volume INTEGER,
+    PRIMARY KEY (ticker, day, time)
+) WITHOUT ROWID;
+"""
+
+TICKERS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    name TEXT,
+    sector TEXT,
+    current_price REAL,
+    last_price REAL,
+    base_price REAL,
+    volatility TEXT,
+    gravity REAL,
+    trend REAL,
+    ath REAL,
+    atl REAL,
+    buy_qty INTEGER,
+    volume INTEGER,
+    avg_volume INTEGER
+);
+"""
+
+ACCOUNT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS account (
+    id INTEGER PRIMARY KEY,
+    money REAL,
+    market_time INTEGER,
+    market_open INTEGER,
+    market_close INTEGER,
+    market_day INTEGER,
+    rng_seed INTEGER      -- master seed for the per-ticker RNG streams
 );
-""")
+"""
+
+NEWS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT,
+    message TEXT,
+    color TEXT,
+    timestamp INTEGER
+);
+"""
+
+# lots: cost basis as JSON [[qty, price], ...], oldest first (cost_basis.Lots)
+PORTFOLIO_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS portfolio (
+    ticker TEXT PRIMARY KEY,
+    shares INTEGER,
+    lots TEXT,
+    sell_qty INTEGER
+);
+"""
+
+
+# ====================================================
+# SCHEMA VERSION / MIGRATIONS
+# ====================================================
+def _ensure_schema_version_table(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+
+
+def get_schema_version(conn):
+    _ensure_schema_version_table(conn)
+    row = conn.execute("SELECT version FROM schema_version").fetchone()
+    return row[0] if row else 0
+
+
+def set_schema_version(conn, version):
+    _ensure_schema_version_table(conn)
+    conn.execute("DELETE FROM schema_version")
+    conn.execute("INSERT INTO schema_version (version) VALUES (?)", (version,))
+
+
+def _migrate_1_candles_key(conn):
+    """
+    AUTOINCREMENT candles -> (ticker, day, time) WITHOUT ROWID.
+    Rows are copied in id order so the newest candle wins any slot
+    that repeats after the day counter wrapped.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='candles'"
+    ).fetchone()
+
+    if not exists:
+        conn.execute(CANDLES_TABLE_SQL)
+        return
+
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(candles)")]
+    if "id" not in columns:
+        return  # already on the new layout
+
+    conn.execute("ALTER TABLE candles RENAME TO candles_v0")
+    conn.execute(CANDLES_TABLE_SQL)
+    conn.execute("""
+        INSERT OR REPLACE INTO candles
+        (ticker, day, time, open, high, low, close, volume)
+        SELECT ticker, day, time, open, high, low, close, volume
+        FROM candles_v0
+        WHERE ticker IS NOT NULL AND day IS NOT NULL AND time IS NOT NULL
+        ORDER BY id
+    """)
+    conn.execute("DROP TABLE candles_v0")
+
+
+def _migrate_2_account_seed(conn):
+    """
+    Master seed for rng_streams. Left NULL here; MarketState picks one
+    on the next load and autosave stores it.
+    """
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(account)")]
+    if columns and "rng_seed" not in columns:
+        conn.execute("ALTER TABLE account ADD COLUMN rng_seed INTEGER")
+
+
+def _migrate_3_portfolio_lots(conn):
+    """
+    portfolio.bought_at (JSON list, one price per share) -> lots
+    (JSON [[qty, price], ...]). Runs of equal prices become one lot.
+    """
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(portfolio)")]
+    if not columns:
+        conn.execute(PORTFOLIO_TABLE_SQL)
+        return
+    if "bought_at" not in columns:
+        return  # already on the new layout
+
+    conn.execute("ALTER TABLE portfolio RENAME TO portfolio_v2")
+    conn.execute(PORTFOLIO_TABLE_SQL)
+    rows = conn.execute("SELECT ticker, shares, bought_at, sell_qty FROM portfolio_v2")
+    conn.executemany(
+        "INSERT INTO portfolio (ticker, shares, lots, sell_qty) VALUES (?, ?, ?, ?)",
+        [(ticker, shares, Lots.from_prices(json.loads(bought_at or "[]")).to_json(), sell_qty)
+         for ticker, shares, bought_at, sell_qty in rows.fetchall()]
+    )
+    conn.execute("DROP TABLE portfolio_v2")
+
+
+MIGRATIONS = {
+    1: _migrate_1_candles_key,
+    2: _migrate_2_account_seed,
+    3: _migrate_3_portfolio_lots,
+}
+
+
+def migrate(db_path=DB_PATH):
+    """Bring an existing (or empty) database up to SCHEMA_VERSION."""
+    # autocommit mode so each migration (DDL included) runs inside
+    # one explicit BEGIN ... COMMIT and rolls back as a whole
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        version = get_schema_version(conn)
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            conn.execute("BEGIN")
+            try:
+                MIGRATIONS[target](conn)
+                set_schema_version(conn, target)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"Migrated {db_path} to schema v{target}")
+    finally:
+        conn.close()
+
+
+# ====================================================
+# SHARED CONNECTIONS
+# ====================================================
+class Database:
+    """
+    Long-lived connections to one SQLite file: a single writer (shared
+    by the frame thread and the save worker, serialized by a lock) and
+    one reader per thread. In WAL mode readers never wait on the writer,
+    so chart loads keep going while an autosave commits.
+    """
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        # WAL + NORMAL only fsyncs at checkpoints; a crash can lose the
+        # last commits but never corrupts the file
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-16384",      # 16 MiB page cache per connection
+        "PRAGMA mmap_size=268435456",    # 256 MiB memory-mapped reads
+        "PRAGMA temp_store=MEMORY",
+    )
+    BUSY_TIMEOUT = 5.0
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.write_lock = threading.Lock()
+        self._writer = None
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+
+    def _open(self):
+        # connections may be closed from another thread (close()),
+        # but each one is only ever used by one thread at a time
+        conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT,
+                               check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def reader(self):
+        """This thread's read connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def write(self):
+        """
+        The writer connection inside one transaction:
+        committed on success, rolled back on error.
+        """
+        with self.write_lock:
+            if self._writer is None:
+                self._writer = self._open()
+            with self._writer:
+                yield self._writer
+
+    def close(self):
+        """Close every connection; they reopen on next use."""
+        with self.write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+        self._local = threading.local()
+
+
+_DATABASES = {}
+_DATABASES_LOCK = threading.Lock()
+
+
+def get_database(path=DB_PATH):
+    """The shared Database for `path` (one per file per process)."""
+    key = os.path.abspath(path)
+    with _DATABASES_LOCK:
+        db = _DATABASES.get(key)
+        if db is None:
+            db = _DATABASES[key] = Database(path)
+        return db
+
+
+# ====================================================
+# RESET CANDLES (run this file directly)
+# ====================================================
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+
+    print("Dropping old candles table (if exists)...")
+    cur.execute("DROP TABLE IF EXISTS candles;")
+
+    print("Creating clean candles table...")
+    cur.execute(CANDLES_TABLE_SQL)
+    set_schema_version(conn, SCHEMA_VERSION)
 
-conn.commit()
-conn.close()
+    conn.commit()
+    conn.close()
 
-print("✔ Done. candles table reset successfully.")
+    print("✔ Done. candles table reset successfully.")
@@ -1,5 +1,10 @@
 import sqlite3
 
+from database import (
+    ACCOUNT_TABLE_SQL, CANDLES_TABLE_SQL, NEWS_TABLE_SQL, PORTFOLIO_TABLE_SQL, TICKERS_TABLE_SQL,
+    migrate,
+)
+
 # Create / connect to DB
 conn = sqlite3.connect("game.db")
 cur = conn.cursor()
@@ -8,67 +13,14 @@ cur = conn.cursor()
 # MAIN TABLES
 # ============================
 
-cur.execute("""
-CREATE TABLE IF NOT EXISTS tickers (
-    ticker TEXT PRIMARY KEY,
-    name TEXT,
-    sector TEXT,
-    current_price REAL,
-    last_price REAL,
-    base_price REAL,
-    volatility TEXT,
-    gravity REAL,
-    trend REAL,
-    ath REAL,
-    atl REAL,
-    buy_qty INTEGER,
-    volume INTEGER,
-    avg_volume INTEGER
-);
-""")
+cur.execute(TICKERS_TABLE_SQL)
 
-cur.execute("""
-CREATE TABLE IF NOT EXISTS candles (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    ticker TEXT,
-    day INTEGER,
-    time INTEGER,
-    open REAL,
-    high REAL,
-    low REAL,
-    close REAL,
-    volume INTEGER
-);
-""")
+cur.execute(CANDLES_TABLE_SQL)
 
-cur.execute("""
-CREATE TABLE IF NOT EXISTS portfolio (
-    ticker TEXT PRIMARY KEY,
-    shares INTEGER,
-    bought_at TEXT,       -- JSON string
-    sell_qty INTEGER
-);
-""")
-cur.execute("""
-CREATE TABLE IF NOT EXISTS account (
-    id INTEGER PRIMARY KEY,
-    money REAL,
-    market_time INTEGER,
-    market_open INTEGER,
-    market_close INTEGER,
-    market_day INTEGER
-);
-""")
+cur.execute(PORTFOLIO_TABLE_SQL)
+cur.execute(ACCOUNT_TABLE_SQL)
 
-cur.execute("""
-CREATE TABLE IF NOT EXISTS news (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    symbol TEXT,
-    message TEXT,
-    color TEXT,
-    timestamp INTEGER
-);
-""")
+cur.execute(NEWS_TABLE_SQL)
 
 cur.execute("""
     INSERT OR REPLACE INTO account
@@ -78,3 +30,6 @@ cur.execute("""
 print("Database created successfully.")
 conn.commit()
 conn.close()
+
+# stamps the schema version (and upgrades an older candles table)
+migrate("game.db")
@@ -0,0 +1,314 @@
+# ================================================
+# game_config.py (VALIDATED, CACHED JSON CONFIG)
+# ================================================
+#
+#   game_config.load("game", "tickers")            # {ticker: record}
+#   game_config.load("game", "company_events")     # EventTable
+#   python game_config.py                          # check + compile every file
+#
+#   The JSON under game/ and player/ is checked against the schemas
+#   below the first time it is read, then compiled (candle lists into
+#   numpy columns, event lists into EventTables indexed by ticker and
+#   sector) and pickled to <dir>/.cache/<name>.bin. Later loads compare
+#   the file's size and mtime with the cache key and unpickle instead of
+#   parsing; if only the mtime moved, a matching sha256 still counts.
+#   Editing a file recompiles it on the next load.
+#
+import hashlib
+import json
+import os
+import pickle
+import struct
+import sys
+import time
+
+import numpy as np
+
+from candle_store import COLUMNS, INT_COLUMNS
+from market_engine import MarketEngine
+
+CACHE_DIR = ".cache"
+CACHE_MAGIC = b"TSCONFIG"
+CACHE_VERSION = 1       # bump when a schema or a compiled layout changes
+_CACHE_PREFIX = struct.Struct("<8sI")
+
+NUMBER = (int, float)
+
+
+class ConfigError(ValueError):
+    """A config file that does not match its schema."""
+
+
+# ====================================================
+# SCHEMAS (field -> accepted types)
+# ====================================================
+TICKER_FIELDS = {
+    "ticker": str, "name": str, "sector": str, "volatility": str,
+    "current_price": NUMBER, "last_price": NUMBER, "base_price": NUMBER,
+    "gravity": NUMBER, "trend": NUMBER, "ath": NUMBER, "atl": NUMBER,
+    "buy_qty": int, "volume": int, "avg_volume": int,
+}
+TICKER_OPTIONAL = {
+    "volume_cap": NUMBER, "volume_history": list, "day_history": list,
+    "ohlc_buffer": list, "history": list,
+}
+CANDLE_FIELDS = {name: int if name in INT_COLUMNS else NUMBER for name in COLUMNS}
+
+ACCOUNT_FIELDS = {
+    "money": NUMBER, "market_time": int, "market_open": int,
+    "market_close": int, "market_day": int,
+}
+POSITION_FIELDS = {"shares": int, "bought_at": list, "sell_qty": int}
+
+# an event hits one ticker, a sector (or several), or the whole market
+EVENT_FIELDS = {"headline": str, "impact": NUMBER}
+EVENT_OPTIONAL = {
+    "id": str, "ticker": str, "tickers": list, "sector": str, "sectors": list,
+    "duration": int, "weight": NUMBER,
+}
+
+
+def _type_name(types):
+    if types is NUMBER:
+        return "number"
+    return types.__name__
+
+
+def _check_value(where, value, types):
+    # bool is an int subclass; true/false is never a valid number here
+    if isinstance(value, bool) or not isinstance(value, types):
+        raise ConfigError(f"{where}: expected {_type_name(types)}, got {type(value).__name__}")
+
+
+def _check_fields(where, obj, required, optional=None):
+    if not isinstance(obj, dict):
+        raise ConfigError(f"{where}: expected object, got {type(obj).__name__}")
+    for field, types in required.items():
+        if field not in obj:
+            raise ConfigError(f"{where}: missing {field}")
+        _check_value(f"{where}.{field}", obj[field], types)
+    for field, types in (optional or {}).items():
+        if field in obj:
+            _check_value(f"{where}.{field}", obj[field], types)
+
+
+def _check_list(where, values, types):
+    for i, value in enumerate(values):
+        _check_value(f"{where}[{i}]", value, types)
+
+
+# ====================================================
+# COMPILERS (parsed JSON -> what the game uses)
+# ====================================================
+def compile_tickers(data, path):
+    """
+    {ticker: record}: the scalar fields, volume_cap filled in, the
+    candle list as numpy columns (CandleStore.load_columns) and
+    volume_history as a float64 array.
+    """
+    _check_fields(path, data, {})
+    tickers = {}
+    for key, info in data.items():
+        where = f"{path}: {key}"
+        _check_fields(where, info, TICKER_FIELDS, TICKER_OPTIONAL)
+        if info["ticker"] != key:
+            raise ConfigError(f"{where}.ticker: {info['ticker']!r} does not match its key")
+        if info["volatility"] not in MarketEngine.VOLATILITY_BUCKETS:
+            raise ConfigError(f"{where}.volatility: expected one of "
+                              f"{', '.join(MarketEngine.VOLATILITY_BUCKETS)}, got {info['volatility']!r}")
+
+        candles = info.get("day_history", [])
+        for i, candle in enumerate(candles):
+            _check_fields(f"{where}.day_history[{i}]", candle, CANDLE_FIELDS)
+        volume_history = info.get("volume_history", [])
+        _check_list(f"{where}.volume_history", volume_history, NUMBER)
+        ohlc_buffer = info.get("ohlc_buffer", [])
+        _check_list(f"{where}.ohlc_buffer", ohlc_buffer, NUMBER)
+
+        record = {field: info[field] for field in TICKER_FIELDS}
+        record["volume_cap"] = info.get("volume_cap", info["avg_volume"] * 12)
+        record["day_history"] = {
+            name: np.array([c[name] for c in candles],
+                           dtype=np.int64 if name in INT_COLUMNS else np.float64)
+            for name in COLUMNS
+        }
+        record["volume_history"] = np.array(volume_history, dtype=np.float64)
+        record["ohlc_buffer"] = list(ohlc_buffer)
+        tickers[key] = record
+    return tickers
+
+
+def compile_account(data, path):
+    _check_fields(path, data, ACCOUNT_FIELDS)
+    return dict(data)
+
+
+def compile_portfolio(data, path):
+    _check_fields(path, data, {})
+    for ticker, position in data.items():
+        _check_fields(f"{path}: {ticker}", position, POSITION_FIELDS)
+        _check_list(f"{path}: {ticker}.bought_at", position["bought_at"], NUMBER)
+    return dict(data)
+
+
+def compile_events(data, path):
+    _check_fields(path, data, {"events": list})
+    for i, event in enumerate(data["events"]):
+        where = f"{path}: events[{i}]"
+        _check_fields(where, event, EVENT_FIELDS, EVENT_OPTIONAL)
+        _check_list(f"{where}.tickers", event.get("tickers", []), str)
+        _check_list(f"{where}.sectors", event.get("sectors", []), str)
+    return EventTable(data["events"])
+
+
+COMPILERS = {
+    "tickers": compile_tickers,
+    "account": compile_account,
+    "portfolio": compile_portfolio,
+    "global_events": compile_events,
+    "company_events": compile_events,
+}
+
+FILES = (
+    ("game", "tickers"),
+    ("game", "global_events"),
+    ("game", "company_events"),
+    ("player", "account"),
+    ("player", "portfolio"),
+)
+
+
+class EventTable:
+    """
+    Events indexed by what they hit: their tickers if any are given,
+    else their sectors, else the whole market. Lookups return tuples in
+    file order.
+    """
+    def __init__(self, events):
+        self.events = tuple(events)
+        by_ticker, by_sector, market_wide = {}, {}, []
+
+        for event in self.events:
+            tickers = event.get("tickers") or ([event["ticker"]] if "ticker" in event else [])
+            sectors = event.get("sectors") or ([event["sector"]] if "sector" in event else [])
+            if tickers:
+                for ticker in tickers:
+                    by_ticker.setdefault(ticker, []).append(event)
+            elif sectors:
+                for sector in sectors:
+                    by_sector.setdefault(sector, []).append(event)
+            else:
+                market_wide.append(event)
+
+        self.by_ticker = {k: tuple(v) for k, v in by_ticker.items()}
+        self.by_sector = {k: tuple(v) for k, v in by_sector.items()}
+        self.market_wide = tuple(market_wide)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def for_ticker(self, ticker, sector=None):
+        """Every event that can move `ticker`: its own, its sector's, market-wide."""
+        return (self.by_ticker.get(ticker, ()) + self.by_sector.get(sector, ())
+                + self.market_wide)
+
+    def for_sector(self, sector):
+        return self.by_sector.get(sector, ()) + self.market_wide
+
+
+# ====================================================
+# CACHE
+# ====================================================
+def cache_path(dir, name):
+    return os.path.join(dir, CACHE_DIR, f"{name}.bin")
+
+
+def _read_cache(path):
+    try:
+        with open(path, "rb") as f:
+            magic, version = _CACHE_PREFIX.unpack(f.read(_CACHE_PREFIX.size))
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, struct.error, pickle.UnpicklingError, AttributeError, ImportError) as e:
+        print(f"Ignoring config cache {path} ({e})")
+        return None
+
+
+def _write_cache(path, entry):
+    tmp = path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(_CACHE_PREFIX.pack(CACHE_MAGIC, CACHE_VERSION))
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        # read-only checkout etc.: the game still runs, just parses every time
+        print(f"Config cache {path} not written ({e})")
+
+
+def load(dir, name):
+    """
+    Compiled contents of <dir>/<name>.json, from the cache when the
+    file has not changed since it was compiled. Raises ConfigError if
+    the file does not match its schema.
+    """
+    compiler = COMPILERS.get(name)
+    if compiler is None:
+        raise ConfigError(f"no schema for {name}.json")
+
+    path = os.path.join(dir, f"{name}.json")
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+
+    cache = cache_path(dir, name)
+    entry = _read_cache(cache)
+    if entry is not None and entry["key"] == key:
+        return entry["data"]
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if entry is not None and entry["sha256"] == digest:
+        data = entry["data"]        # touched, not changed
+    else:
+        try:
+            parsed = json.loads(raw)
+        except ValueError as e:
+            raise ConfigError(f"{path}: {e}") from None
+        data = compiler(parsed, path)
+
+    _write_cache(cache, {"key": key, "sha256": digest, "data": data})
+    return data
+
+
+def main(argv=None):
+    """Check and compile every config file; exit status 1 on a schema error."""
+    root = argv[0] if argv else "."
+    failed = False
+    for dir, name in FILES:
+        path = os.path.join(root, dir, f"{name}.json")
+        if not os.path.exists(path):
+            continue
+        t0 = time.perf_counter()
+        try:
+            load(os.path.join(root, dir), name)
+        except ConfigError as e:
+            print(f"FAIL {e}")
+            failed = True
+            continue
+        print(f"ok   {path} ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    # run under the module's real name so cached EventTables unpickle in the game
+    import game_config
+    sys.exit(game_config.main(sys.argv[1:]))
@@ -4,25 +4,48 @@ import pygame
 import math
 import time
 
+from candle_store import rows_from_columns
+from text_cache import render_text
+from ui_layers import UILayerCache
+
 
 
 class GameGUI:
+    # chart plot area
+    CHART_X = 190
+    CHART_WIDTH = 1326
+    CHART_Y = 350
+    CHART_HEIGHT = 400
+    VOL_HEIGHT = 120
+
     def __init__(self):
-        # put shared GUI state here later if we want
-        pass
+        # cached chart layer: redrawn only when the chart cache key changes,
+        # chart_frame gets layer + tooltip on frames where the mouse is over it
+        self.chart_layer = None
+        self.chart_frame = None
+        self.chart_cache = {}
+
+        # pre-rendered gradients / masks / scanlines
+        self.layers = UILayerCache()
 
-    def render_tickers(self, font, tickers_obj, screen):
+    def render_tickers(self, font, board, screen):
+        """Ticker list straight off the shared price board."""
         mx, my = pygame.mouse.get_pos()
         y = 90
         x = 10
         click_zones = {}
 
-        for name, stock in tickers_obj.items():
+        prices = board.current_price
+        lasts = board.last_price
+
+        for i, name in enumerate(board.names):
+            price = prices[i]
+            last = lasts[i]
 
             # Determine price color
-            if stock.current_price > stock.last_price:
+            if price > last:
                 color = (0, 255, 0)
-            elif stock.current_price < stock.last_price:
+            elif price < last:
                 color = (255, 80, 80)
             else:
                 color = (255, 255, 255)
@@ -34,8 +57,8 @@ class GameGUI:
             if row_rect.collidepoint(mx, my):
                 pygame.draw.rect(screen, (104, 104, 104), row_rect)
 
-            text_surface = font.render(
-                f"{stock.ticker}: ${stock.current_price:.2f}", True, color
+            text_surface = render_text(
+                font, f"{name}: ${price:.2f}", True, color
             )
             text_rect = text_surface.get_rect()
             text_rect.centery = row_rect.centery
@@ -58,22 +81,16 @@ class GameGUI:
         top_w = 1920
         top_h = 80
 
-        for i in range(top_h):
-            shade = 50 + int(30 * (i / top_h))  # EXACT same gradient math as sidebar
-            pygame.draw.line(
-                screen,
-                (shade, 0, 90),
-                (top_x, top_y + i),
-                (top_x + top_w, top_y + i)
-            )
+        # EXACT same gradient math as sidebar (pre-rendered once)
+        screen.blit(self.layers.header(top_w, top_h), (top_x, top_y))
 
         # Title
-        title_surface = font.render(f"TRADER VIEW V0.4  |  Day {state.game_day}", True, (0, 0, 0))
+        title_surface = render_text(font, f"TRADER VIEW V0.4  |  Day {state.game_day}", True, (0, 0, 0))
         screen.blit(title_surface, (20, 30))
 
         # CASH
         cash_text = f"Cash: ${account['money']:.2f}"
-        cash_surface = font.render(cash_text, True, (51, 255, 0))
+        cash_surface = render_text(font, cash_text, True, (51, 255, 0))
         screen.blit(cash_surface, (500, 30))
 
         # ===========================
@@ -89,21 +106,21 @@ class GameGUI:
             status_color = (0,255,0) if is_open else (255,80,80)
 
             clock_text = f"{current_time}  ({status})"
-            clock_surface = font.render(clock_text, True, status_color)
+            clock_surface = render_text(font, clock_text, True, status_color)
             screen.blit(clock_surface, (1000, 15))
 
             hours_text = f"{open_time} - {close_time}"
-            hours_surface = font.render(hours_text, True, (200,200,255))
+            hours_surface = render_text(font, hours_text, True, (200,200,255))
             screen.blit(hours_surface, (1000, 45))
         else:
             # fallback if state is missing
             tick_text = f"Next Tick: {time_left:.2f}s"
-            tick_surface = font.render(tick_text, True, (255, 176, 0))
+            tick_surface = render_text(font, tick_text, True, (255, 176, 0))
             screen.blit(tick_surface, (1000, 30))
 
         # PORTFOLIO VALUE
         portfolio_text = f"Portfolio Value:${portfolio_value:.2f}"
-        portfolio_surface = font.render(portfolio_text, True, (51, 255, 0))
+        portfolio_surface = render_text(font, portfolio_text, True, (51, 255, 0))
         screen.blit(portfolio_surface, (1400, 30))
 
     # =====================================================
@@ -115,6 +132,7 @@ class GameGUI:
             return
 
         stock_name = state.ui.selected_stock
+        state.ensure_history(stock_name)
         stock = state.tickers_obj[stock_name]
         portfolio = state.portfolio_mgr.portfolio
 
@@ -169,15 +187,14 @@ class GameGUI:
 
         # Update ATH/ATL based on candle data
         if stock.day_history:
-            stock.ath = max(c["high"] for c in stock.day_history)
-            stock.atl = min(c["low"] for c in stock.day_history)
+            stock.ath = float(stock.day_history.column("high").max())
+            stock.atl = float(stock.day_history.column("low").min())
 
         # -------------------------
         # Right Column
         # -------------------------
         if stock_name in portfolio and portfolio[stock_name]["shares"] > 0:
-            lst = portfolio[stock_name]["bought_at"]
-            avg_price = sum(lst) / len(lst)
+            avg_price = portfolio[stock_name]["lots"].avg_price
 
             right_lines = [
                 f"Shares Owned : {portfolio[stock_name]['shares']}",
@@ -192,7 +209,7 @@ class GameGUI:
             ]
 
         for line in right_lines:
-            surf = font.render(line, True, (255,255,255))
+            surf = render_text(font, line, True, (255,255,255))
             screen.blit(surf, (right_text_x, right_text_y + y_offset))
             right_text_y += 40
 
@@ -209,7 +226,7 @@ class GameGUI:
         ]
 
         for line in left_lines:
-            surf = font.render(line, True, (255,255,255))
+            surf = render_text(font, line, True, (255,255,255))
             screen.blit(surf, (text_x, text_y + y_offset))
             text_y += line_spacing
 
@@ -230,7 +247,7 @@ class GameGUI:
         button_data = []
         offset = 0
         for b in buttons:
-            surf = font.render(b["text"], True, (255, 255, 255))
+            surf = render_text(font, b["text"], True, (255, 255, 255))
             rect = surf.get_rect(center=(960, 450 + offset))
             offset += 120
             button_data.append({"surf": surf, "rect": rect, "action": b["action"]})
@@ -264,7 +281,7 @@ class GameGUI:
             # FLOATING TITLE ANIMATION
             # -----------------------------
             float_offset = math.sin(elapsed * 2) * 10
-            title = font.render("THIS GAME FUCKING SUCKS", True, (0, 200, 255))
+            title = render_text(font, "THIS GAME FUCKING SUCKS", True, (0, 200, 255))
             title_rect = title.get_rect(center=(960, 200 + float_offset))
             screen.blit(title, title_rect)
 
@@ -316,7 +333,7 @@ class GameGUI:
         button_data = []
         offset = 0
         for b in buttons:
-            surf = font.render(b["text"], True, (255, 255, 255))
+            surf = render_text(font, b["text"], True, (255, 255, 255))
             rect = surf.get_rect(center=(960, 540 + offset))
             offset += 120
             button_data.append({"surf": surf, "rect": rect, "action": b["action"]})
@@ -388,7 +405,7 @@ class GameGUI:
 
             # title float
             float_offset = math.sin(elapsed * 2) * 10
-            title = font.render("PAUSED", True, (255, 180, 0))
+            title = render_text(font, "PAUSED", True, (255, 180, 0))
             title_rect = title.get_rect(center=(960, 300 + float_offset))
             screen.blit(title, title_rect)
 
@@ -437,34 +454,12 @@ class GameGUI:
         else:
             return 1440  # 1 Day
 
-    def aggregate_candles(self, candle_list, base_minutes, target_minutes):
-        """Compress 5m candles into 15/30/60/etc."""
-        candles_per_bucket = target_minutes // base_minutes
-        aggregated = []
-        buffer = []
-
-        for c in candle_list:
-            buffer.append(c)
-            if len(buffer) == candles_per_bucket:
-                aggregated.append({
-                    "day": buffer[0]["day"],
-                    "time": buffer[0]["time"],
-                    "open": buffer[0]["open"],
-                    "high": max(x["high"] for x in buffer),
-                    "low": min(x["low"] for x in buffer),
-                    "close": buffer[-1]["close"],
-                    "volume": sum(x["volume"] for x in buffer)
-                })
-                buffer = []
-
-        return aggregated
-
     def draw_slider(self,screen,font):
         GRAY = (200, 200, 200)
         WHITE = (255, 255, 255)
 
         slider_rect = pygame.Rect(100, 80, 400, 10)
-        slider_text = font.render("SIM SPEED 1-10X",True,(0,0,0),(255,255,255))
+        slider_text = render_text(font, "SIM SPEED 1-10X",True,(0,0,0),(255,255,255))
         slider_text_rect = pygame.Rect(100,100,400,20)
         screen.blit(slider_text,slider_text_rect)
         handle_x = slider_rect.x
@@ -492,67 +487,64 @@ class GameGUI:
         return int((handle_x - slider_rect.x) / slider_rect.width * 100)  # Value from 0 to 100
 
     def render_chart(self, font, state, screen, time_font):
-        import pygame
-
+        """
+        Draws the chart onto `screen`: the cached chart layer, then the
+        crosshair/tooltip for this frame.
+        """
         if state.selected_stock is None:
             return
 
-        # ----------------------------------------
-        # CONSTANTS
-        # ----------------------------------------
-        chart_x = 190
-        chart_width = 1326
-        chart_y = 350
-        chart_height = 400
-        vol_height = 120
+        view = self.update_chart_layer(font, state, time_font)
+        if view is None:
+            self._draw_chart_panel(screen, font, state)
+            return {}
 
-        # ----------------------------------------
-        # PANEL BACKGROUND
-        # ----------------------------------------
-        panel_rect = pygame.Rect(chart_x - 8, 90, chart_width + 12, 350 + 330)
-        pygame.draw.rect(screen, (40, 0, 80), panel_rect)
+        screen.blit(self.chart_layer, (0, 0))
+        self._draw_chart_tooltip(screen, font, state, view)
 
-        # ----------------------------------------
-        # BUTTONS (Volume / Candles)
-        # ----------------------------------------
-        button_y = 310
-        button_x = 1040
+        return {
+            "toggle_volume": state.toggle_volume_rect,
+            "toggle_candles": state.toggle_candles_rect
+        }
 
-        volume_button_rect = pygame.Rect(button_x, button_y, 155, 30)
-        candle_button_rect = pygame.Rect(button_x + 200, button_y, 155, 30)
+    def update_chart_layer(self, font, state, time_font):
+        """
+        Works out the visible window (zoom, offset, dragging) and redraws
+        the chart layer only when what it shows has changed: new candle,
+        different window/timeframe, ticker or toggles.
+        Returns the cached view, or None when there is nothing to plot.
+        """
+        chart_x = self.CHART_X
+        chart_width = self.CHART_WIDTH
+        chart_y = self.CHART_Y
+        chart_height = self.CHART_HEIGHT
 
-        state.toggle_volume_rect = volume_button_rect
-        state.toggle_candles_rect = candle_button_rect
+        self._ensure_chart_surfaces()
 
-        pygame.draw.rect(screen, (80, 30, 120), volume_button_rect)
-        pygame.draw.rect(screen, (80, 30, 120), candle_button_rect)
-
-        screen.blit(
-            font.render(f"Volume: {'ON' if state.show_volume else 'OFF'}", True, (255, 255, 255)),
-            (volume_button_rect.x + 8, volume_button_rect.y + 5)
-        )
-        screen.blit(
-            font.render(f"Candles: {'ON' if state.show_candles else 'OFF'}", True, (255, 255, 255)),
-            (candle_button_rect.x + 8, candle_button_rect.y + 5)
-        )
+        # button rects are needed for clicks even on cached frames
+        button_y = 310
+        button_x = 1040
+        state.toggle_volume_rect = pygame.Rect(button_x, button_y, 155, 30)
+        state.toggle_candles_rect = pygame.Rect(button_x + 200, button_y, 155, 30)
 
         # ----------------------------------------
         # FETCH STOCK + HISTORY
         # ----------------------------------------
+        state.ensure_history(state.selected_stock)
         stock = state.tickers_obj[state.selected_stock]
-        history = sorted(stock.day_history, key=lambda e: (e["day"], e["time"]))
+        history = stock.day_history
 
         if len(history) < 2:
-            return
-
-        max_day = history[-1]["day"]
-        min_day = max_day - 6
+            return None
 
-        full_window = [e for e in history if min_day <= e["day"] <= max_day]
-        total_points = len(full_window)
+        # candles are stored in time order; the store indexes where each
+        # day starts, so the 7-day window is a lookup, not a sort + filter
+        first = history.day_window_start(7)
+        full_window = {name: col[first:] for name, col in history.columns().items()}
+        total_points = len(history) - first
 
         if total_points < 2:
-            return
+            return None
 
         # ----------------------------------------
         # ZOOM + OFFSET
@@ -572,11 +564,10 @@ class GameGUI:
             new_offset = int(mouse_index - new_visible * mouse_ratio)
             state.chart_offset = max(0, min(total_points - new_visible, new_offset))
 
-        visible_entries = full_window[state.chart_offset: state.chart_offset + new_visible]
         state.prev_chart_zoom = zoom
 
-        if not history or not visible_entries:
-            return {}
+        if state.chart_offset >= total_points:
+            return None
 
         # ----------------------------------------
         # DX
@@ -586,16 +577,17 @@ class GameGUI:
         # FIX OFFSET LIMIT BEFORE MAKING visible_entries SLICE
         # --------------------------------------------------
 
-        true_total = len(full_window)  # full 5m candles
+        true_total = total_points  # full 5m candles
         true_visible = new_visible  # visible candle count (aggregated)
 
         max_offset = max(0, true_total - true_visible)
         state.chart_offset = max(0, min(state.chart_offset, max_offset))
 
-        visible_entries = full_window[state.chart_offset: state.chart_offset + true_visible]
+        start = state.chart_offset
+        stop = min(start + true_visible, total_points)
 
         # ensure counts match actual slice
-        new_visible = len(visible_entries)
+        new_visible = stop - start
         dx = chart_width / max(new_visible, 1)
 
         # ====================================================
@@ -603,46 +595,58 @@ class GameGUI:
         # ====================================================
         tf_minutes = self.select_timeframe_from_dx(dx)
 
-        # Only compress candles if timeframe > 5m
-        if tf_minutes != 5:
-            visible_entries = self.aggregate_candles(visible_entries, 5, tf_minutes)
-            new_visible = len(visible_entries)
-            dx = chart_width / max(new_visible, 1)
-
         # ----------------------------------------
-        # PRICE RANGE
+        # CACHE KEY
         # ----------------------------------------
-        lowest_price = min(p["low"] for p in visible_entries)
-        highest_price = max(p["high"] for p in visible_entries)
-
-        if highest_price == lowest_price:
-            highest_price += 0.01
-
-        price_delta = highest_price - lowest_price
-
-        def price_to_y(p):
-            return chart_y + chart_height - ((p - lowest_price) / price_delta) * chart_height
-
-        def center_x(i):
-            return chart_x + i * dx + dx * 0.5
+        key = (
+            state.selected_stock,
+            history.appended,
+            history.column("close")[-1],
+            history.column("volume")[-1],
+            first, start, stop, tf_minutes,
+            state.show_volume,
+            state.show_candles
+        )
+        view = self.chart_cache
 
-        # ----------------------------------------
-        # GRID (min/mid/max)
-        # ----------------------------------------
-        grid_color = (120, 50, 170)
-        key_levels = [highest_price, (highest_price + lowest_price) / 2, lowest_price]
+        if key != view.get("key"):
+            if tf_minutes == 5:
+                visible_entries = rows_from_columns(full_window, start, stop)
+            else:
+                # slice the precomputed timeframe instead of re-aggregating
+                lo, hi = history.bucket_range(tf_minutes, first + start, first + stop)
+                visible_entries = rows_from_columns(history.timeframe(tf_minutes).columns(), lo, hi)
+
+            # aggregated timeframes have fewer, wider candles
+            if tf_minutes != 5:
+                new_visible = len(visible_entries)
+                dx = chart_width / max(new_visible, 1)
+
+            # ----------------------------------------
+            # PRICE RANGE
+            # ----------------------------------------
+            lowest_price = min(p["low"] for p in visible_entries)
+            highest_price = max(p["high"] for p in visible_entries)
+
+            if highest_price == lowest_price:
+                highest_price += 0.01
+
+            price_delta = highest_price - lowest_price
+
+            view.update(
+                key=key,
+                entries=visible_entries,
+                dx=dx,
+                lowest_price=lowest_price,
+                highest_price=highest_price,
+                price_delta=price_delta
+            )
 
-        for p in key_levels:
-            y = price_to_y(p)
-            pygame.draw.line(screen, grid_color, (chart_x, y), (chart_x + chart_width, y), 2)
-            screen.blit(font.render(f"${p:.2f}", True, grid_color),
-                        (chart_x + chart_width + 10, y - 10))
+            self.chart_layer.fill((0, 0, 0, 0))
+            self._draw_chart_panel(self.chart_layer, font, state)
+            self._draw_chart_data(self.chart_layer, font, state, time_font, view, tf_minutes)
 
-        # horizontal subdivisions
-        step = price_delta / 6
-        for i in range(7):
-            y = price_to_y(lowest_price + step * i)
-            pygame.draw.line(screen, grid_color, (chart_x, y), (chart_x + chart_width, y), 1)
+        dx = view["dx"]
 
         # ----------------------------------------
         # DRAGGING — correctly clamped
@@ -669,6 +673,76 @@ class GameGUI:
         else:
             state.chart_dragging = False
 
+        return view
+
+    def _draw_chart_panel(self, screen, font, state):
+        """Panel background and the Volume / Candles toggles."""
+        chart_x = self.CHART_X
+        chart_width = self.CHART_WIDTH
+
+        # ----------------------------------------
+        # PANEL BACKGROUND
+        # ----------------------------------------
+        panel_rect = pygame.Rect(chart_x - 8, 90, chart_width + 12, 350 + 330)
+        pygame.draw.rect(screen, (40, 0, 80), panel_rect)
+
+        # ----------------------------------------
+        # BUTTONS (Volume / Candles)
+        # ----------------------------------------
+        volume_button_rect = state.toggle_volume_rect
+        candle_button_rect = state.toggle_candles_rect
+
+        pygame.draw.rect(screen, (80, 30, 120), volume_button_rect)
+        pygame.draw.rect(screen, (80, 30, 120), candle_button_rect)
+
+        screen.blit(
+            render_text(font, f"Volume: {'ON' if state.show_volume else 'OFF'}", True, (255, 255, 255)),
+            (volume_button_rect.x + 8, volume_button_rect.y + 5)
+        )
+        screen.blit(
+            render_text(font, f"Candles: {'ON' if state.show_candles else 'OFF'}", True, (255, 255, 255)),
+            (candle_button_rect.x + 8, candle_button_rect.y + 5)
+        )
+
+
+    def _draw_chart_data(self, screen, font, state, time_font, view, tf_minutes):
+        """Grid, candles/line, time + day labels and volume bars."""
+        chart_x = self.CHART_X
+        chart_width = self.CHART_WIDTH
+        chart_y = self.CHART_Y
+        chart_height = self.CHART_HEIGHT
+        vol_height = self.VOL_HEIGHT
+
+        visible_entries = view["entries"]
+        dx = view["dx"]
+        lowest_price = view["lowest_price"]
+        highest_price = view["highest_price"]
+        price_delta = view["price_delta"]
+
+        def price_to_y(p):
+            return chart_y + chart_height - ((p - lowest_price) / price_delta) * chart_height
+
+        def center_x(i):
+            return chart_x + i * dx + dx * 0.5
+
+        # ----------------------------------------
+        # GRID (min/mid/max)
+        # ----------------------------------------
+        grid_color = (120, 50, 170)
+        key_levels = [highest_price, (highest_price + lowest_price) / 2, lowest_price]
+
+        for p in key_levels:
+            y = price_to_y(p)
+            pygame.draw.line(screen, grid_color, (chart_x, y), (chart_x + chart_width, y), 2)
+            screen.blit(render_text(font, f"${p:.2f}", True, grid_color),
+                        (chart_x + chart_width + 10, y - 10))
+
+        # horizontal subdivisions
+        step = price_delta / 6
+        for i in range(7):
+            y = price_to_y(lowest_price + step * i)
+            pygame.draw.line(screen, grid_color, (chart_x, y), (chart_x + chart_width, y), 1)
+
         # ----------------------------------------
         # CANDLES / LINE
         # ----------------------------------------
@@ -757,7 +831,7 @@ class GameGUI:
                 time_y = time_y_base + (20 if state.label_toggle else 0)
                 state.label_toggle = not state.label_toggle
 
-                tsurf = time_font.render(label, True, label_color)
+                tsurf = render_text(time_font, label, True, label_color)
                 trec = tsurf.get_rect(center=(x, time_y))
                 screen.blit(tsurf, trec)
 
@@ -814,7 +888,7 @@ class GameGUI:
                     time_y = time_y_base + (20 if state.label_toggle else 0)
                     state.label_toggle = not state.label_toggle
 
-                    tsurf = time_font.render(label, True, label_color)
+                    tsurf = render_text(time_font, label, True, label_color)
                     trec = tsurf.get_rect(center=(x, time_y))
                     screen.blit(tsurf, trec)
                     pygame.draw.line(screen, label_color, (x, time_y - 14), (x, time_y - 6), 2)
@@ -851,7 +925,7 @@ class GameGUI:
                     time_y = time_y_base + (20 if state.label_toggle else 0)
                     state.label_toggle = not state.label_toggle
 
-                    tsurf = time_font.render(label, True, label_color)
+                    tsurf = render_text(time_font, label, True, label_color)
                     trec = tsurf.get_rect(center=(x, time_y))
                     screen.blit(tsurf, trec)
 
@@ -879,7 +953,7 @@ class GameGUI:
             ) #DAY LINE
 
             day_label = f"Day {e['day']}"
-            d_surf = time_font.render(day_label, True, day_color)
+            d_surf = render_text(time_font, day_label, True, day_color)
             d_rect = d_surf.get_rect(center=(x, time_y_base + 45))
             screen.blit(d_surf, d_rect)
         # ----------------------------------------
@@ -907,6 +981,34 @@ class GameGUI:
                 color = (0, 180, 0) if e["close"] >= e["open"] else (200, 60, 60)
 
                 pygame.draw.rect(screen, color, (left, top, bar_w, h))
+
+    def _ensure_chart_surfaces(self):
+        if self.chart_layer is None:
+            self.chart_layer = pygame.Surface((1920, 1080), pygame.SRCALPHA)
+            self.chart_frame = pygame.Surface((1920, 1080), pygame.SRCALPHA)
+
+    def _chart_hovered(self):
+        mx, my = pygame.mouse.get_pos()
+        return (self.CHART_X <= mx <= self.CHART_X + self.CHART_WIDTH and
+                self.CHART_Y <= my <= self.CHART_Y + self.CHART_HEIGHT)
+
+    def _draw_chart_tooltip(self, screen, font, state, view):
+        """Crosshair, close marker and OHLC tooltip under the mouse."""
+        chart_x = self.CHART_X
+        chart_width = self.CHART_WIDTH
+        chart_y = self.CHART_Y
+        chart_height = self.CHART_HEIGHT
+
+        visible_entries = view["entries"]
+        dx = view["dx"]
+        lowest_price = view["lowest_price"]
+        price_delta = view["price_delta"]
+
+        def price_to_y(p):
+            return chart_y + chart_height - ((p - lowest_price) / price_delta) * chart_height
+
+        mx, my = pygame.mouse.get_pos()
+
         # ----------------------------------------
         # TOOLTIP
         # ----------------------------------------
@@ -937,7 +1039,7 @@ class GameGUI:
             pygame.draw.circle(screen, (255, 255, 0), (mx, int(close_y)), 6)
 
             padding = 8
-            w = max(font.render(t, True, (255, 255, 255)).get_width() for t in lines) + padding * 2
+            w = max(render_text(font, t, True, (255, 255, 255)).get_width() for t in lines) + padding * 2
             h = len(lines) * font.get_height() + padding * 2
             r = pygame.Rect(mx + 20, my + 20, w, h)
 
@@ -946,14 +1048,9 @@ class GameGUI:
 
             ty = r.y + padding
             for t in lines:
-                screen.blit(font.render(t, True, (255, 255, 255)), (r.x + padding, ty))
+                screen.blit(render_text(font, t, True, (255, 255, 255)), (r.x + padding, ty))
                 ty += font.get_height()
 
-        return {
-            "toggle_volume": volume_button_rect,
-            "toggle_candles": candle_button_rect
-        }
-
     def render_side_bar(self, screen, font, state):
         """
         Draws the main fixed sidebar
@@ -963,11 +1060,7 @@ class GameGUI:
         # ===============================================================
         # 0. STATIC SIDEBAR BACKGROUND
         # ===============================================================
-        pygame.draw.rect(screen, (45, 0, 70), (1620, 80, 300, 940))
-
-        for y in range(80, 1020):
-            shade = 45 + ((y - 80) / 940) * 20
-            pygame.draw.line(screen, (shade, 0, shade), (1620, y), (1920, y))
+        screen.blit(self.layers.sidebar_background(300, 940), (1620, 80))
 
         # ===============================================================
         # 1. SIDEBAR BUTTONS
@@ -989,15 +1082,10 @@ class GameGUI:
         for entry in buttons:
             rect = pygame.Rect(bar_x, bar_y, bar_w, bar_h)
 
-            # gradient fill
-            for i in range(bar_h):
-                shade = 50 + int(30 * (i / bar_h))
-                pygame.draw.line(screen, (shade, 0, 90),
-                                 (bar_x, bar_y + i), (bar_x + bar_w, bar_y + i))
-
-            pygame.draw.rect(screen, (200, 200, 255), rect, 2, border_radius=6)
+            # gradient fill + outline
+            screen.blit(self.layers.button(bar_w, bar_h, 50, 30), (bar_x, bar_y))
 
-            text_surf = font.render(entry["text"], True, (255, 255, 255))
+            text_surf = render_text(font, entry["text"], True, (255, 255, 255))
             screen.blit(text_surf, text_surf.get_rect(center=rect.center))
 
             sidebar_rects.append({"rect": rect, "action": entry["action"]})
@@ -1017,41 +1105,12 @@ class GameGUI:
 
         # shadow
         if drawer_x < 1920:
-            shadow = pygame.Surface((drawer_w, drawer_h), pygame.SRCALPHA)
-            pygame.draw.rect(shadow, (0, 0, 0, 160),
-                             shadow.get_rect(),
-                             border_radius=drawer_radius)
-            screen.blit(shadow, (drawer_x + 4, drawer_y + 4))
-
-        # gradient panel
-        panel = pygame.Surface((drawer_w, drawer_h), pygame.SRCALPHA)
-        temp = pygame.Surface((drawer_w, drawer_h))
-
-        for i in range(drawer_h):
-            pct = i / drawer_h
-            text_rect_bg = int(200 - pct * 70)
-            g = int(185 - pct * 85)
-            b = int(255 - pct * 40)
-            pygame.draw.line(temp, (text_rect_bg, g, b), (0, i), (drawer_w, i))
-
-        mask = pygame.Surface((drawer_w, drawer_h), pygame.SRCALPHA)
-        pygame.draw.rect(mask, (255, 255, 255), mask.get_rect(),
-                         border_radius=drawer_radius)
-
-        panel.blit(temp, (0, 0))
-        panel.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
-
-        # scanlines
-        scan = pygame.Surface((drawer_w, drawer_h), pygame.SRCALPHA)
-        for y in range(0, drawer_h, 4):
-            pygame.draw.line(scan, (0, 0, 0, 40), (0, y), (drawer_w, y))
-        panel.blit(scan, (0, 0))
-
-        # outer border
-        pygame.draw.rect(panel, (0, 0, 0), panel.get_rect(),
-                         3, border_radius=drawer_radius)
-
-        screen.blit(panel, (drawer_x, drawer_y))
+            screen.blit(self.layers.drawer_shadow(drawer_w, drawer_h, drawer_radius),
+                        (drawer_x + 4, drawer_y + 4))
+
+        # gradient panel (rounded mask, scanlines and border baked in)
+        screen.blit(self.layers.drawer_panel(drawer_w, drawer_h, drawer_radius),
+                    (drawer_x, drawer_y))
 
         # ===============================================================
         # 3. HANDLE (radius 4 — NEVER warped, always accurate)
@@ -1077,25 +1136,9 @@ class GameGUI:
         # 3. METALLIC HANDLE LOOK
         # ---------------------------------------------------------------
 
-        # vertical metallic gradient
-        for i in range(draw_handle_rect.w):
-            shade = 160 + int(40 * (i / draw_handle_rect.w))
-            pygame.draw.line(screen, (shade, shade, shade),
-                             (draw_handle_rect.x + i, draw_handle_rect.y),
-                             (draw_handle_rect.x + i, draw_handle_rect.y + draw_handle_rect.h))
-
-        # top highlight
-        pygame.draw.line(screen, (255, 255, 255),
-                         (draw_handle_rect.x + 2, draw_handle_rect.y + 3),
-                         (draw_handle_rect.x + draw_handle_rect.w - 2, draw_handle_rect.y + 3), 2)
-
-        # bottom highlight
-        pygame.draw.line(screen, (200, 200, 200),
-                         (draw_handle_rect.x + 2, draw_handle_rect.y + draw_handle_rect.h - 4),
-                         (draw_handle_rect.x + draw_handle_rect.w - 2, draw_handle_rect.y + draw_handle_rect.h - 4), 2)
-
-        # border
-        pygame.draw.rect(screen, (0, 0, 0), draw_handle_rect, 3, border_radius=4)
+        # vertical metallic gradient, highlights and border
+        screen.blit(self.layers.drawer_handle(draw_handle_rect.w, draw_handle_rect.h),
+                    draw_handle_rect.topleft)
 
         # ===============================================================
         # 4. DRAWER CONTENT (Qty / Limit / Keypad / Confirm)
@@ -1126,7 +1169,7 @@ class GameGUI:
 
             qt = state.ui.qty_text if state.ui.qty_text else "Qty"
             qc = (0, 0, 0) if state.ui.qty_text else (140, 140, 140)
-            screen.blit(label_font.render(qt, True, qc),
+            screen.blit(render_text(label_font, qt, True, qc),
                         (qty_rect.x + 10, qty_rect.y + 12))
 
             state.ui.qty_rect = qty_rect
@@ -1151,7 +1194,7 @@ class GameGUI:
 
                 lt = state.ui.limit_text if state.ui.limit_text else "Limit Price"
                 lc = (0, 0, 0) if state.ui.limit_text else (140, 140, 140)
-                screen.blit(label_font.render(lt, True, lc),
+                screen.blit(render_text(label_font, lt, True, lc),
                             (limit_rect.x + 10, limit_rect.y + 12))
 
             state.ui.limit_rect = limit_rect
@@ -1203,16 +1246,9 @@ class GameGUI:
                 text_rect_bg = pygame.Rect(x, y, (70 * 3) + (10 * 2), 50)
 
                 # glossy button
-                for k in range(50):
-                    shade = 60 + int(40 * (k / 50))
-                    pygame.draw.line(screen, (shade, 0, 90),
-                                     (text_rect_bg.x, y + k),
-                                     (text_rect_bg.x + text_rect_bg.w, y + k))
-
-                pygame.draw.rect(screen, (200, 200, 255),
-                                 text_rect_bg, 2, border_radius=6)
+                screen.blit(self.layers.button(text_rect_bg.w, 50, 60, 40), (x, y))
 
-                txt = font.render(btn["text"], True, (255, 255, 255))
+                txt = render_text(font, btn["text"], True, (255, 255, 255))
                 screen.blit(txt, txt.get_rect(center=text_rect_bg.center))
 
                 num_pad_rects.append({"rect": text_rect_bg,
@@ -1228,15 +1264,9 @@ class GameGUI:
 
             text_rect_bg = pygame.Rect(x, y, 70, 50)
 
-            for k in range(50):
-                shade = 60 + int(40 * (k / 50))
-                pygame.draw.line(screen, (shade, 0, 90),
-                                 (x, y + k), (x + 70, y + k))
-
-            pygame.draw.rect(screen, (200, 200, 255),
-                             text_rect_bg, 2, border_radius=6)
+            screen.blit(self.layers.button(70, 50, 60, 40), (x, y))
 
-            txt = font.render(btn["text"], True, (255, 255, 255))
+            txt = render_text(font, btn["text"], True, (255, 255, 255))
             screen.blit(txt, txt.get_rect(center=text_rect_bg.center))
 
             num_pad_rects.append({"rect": text_rect_bg,
@@ -1265,7 +1295,7 @@ class GameGUI:
                          2, border_radius=pending_radius)
 
         # HEADER
-        header = label_font.render("Pending Orders", True, (0, 0, 0))
+        header = render_text(label_font, "Pending Orders", True, (0, 0, 0))
         screen.blit(header, (pending_x + 10, pending_y + 8))
 
         # ----------------------------
@@ -1286,13 +1316,13 @@ class GameGUI:
 
         for order in orders:
             txt = f"{order['side'].upper()} {order['qty']} {order['ticker']} @ {order['limit_price']}"
-            line = label_font.render(txt, True, (30, 0, 50))
+            line = render_text(label_font, txt, True, (30, 0, 50))
             scroll_surf.blit(line, (0, line_y))
             line_y += 22
 
         # No orders case
         if len(orders) == 0:
-            msg = label_font.render("None", True, (120, 120, 120))
+            msg = render_text(label_font, "None", True, (120, 120, 120))
             scroll_surf.blit(msg, (0, line_y))
 
         # Now blit the scrolled surface but clipped inside panel area
@@ -1312,26 +1342,12 @@ class GameGUI:
 
         confirm_rect = pygame.Rect(confirm_x, confirm_y, confirm_w, confirm_h)
 
-        # Gradient background
-        for i in range(confirm_h):
-            shade = 120 + int(40 * (i / confirm_h))
-            pygame.draw.line(
-                screen,
-                (shade, shade, 255),
-                (confirm_x, confirm_y + i),
-                (confirm_x + confirm_w, confirm_y + i)
-            )
-
-        # Border
-        pygame.draw.rect(screen, (0, 0, 0), confirm_rect, 3, border_radius=confirm_radius)
-
-        # Glow
-        crt_glow = pygame.Surface((confirm_w, confirm_h), pygame.SRCALPHA)
-        pygame.draw.rect(crt_glow, (100, 120, 255, 80), crt_glow.get_rect(), border_radius=confirm_radius)
-        screen.blit(crt_glow, (confirm_x, confirm_y))
+        # Gradient background, border and glow
+        screen.blit(self.layers.confirm_button(confirm_w, confirm_h, confirm_radius),
+                    (confirm_x, confirm_y))
 
         # TEXT (centered)
-        confirm_text = font.render("CONFIRM", True, (0, 0, 0))
+        confirm_text = render_text(font, "CONFIRM", True, (0, 0, 0))
         text_rect = confirm_text.get_rect(center=confirm_rect.center)
         screen.blit(confirm_text, text_rect)
 
@@ -1353,7 +1369,7 @@ class GameGUI:
         pygame.draw.rect(screen, (0, 0, 0), dropdown_rect, 2, border_radius=6)
 
         # Draw selected order type text INSIDE the dropdown box
-        dropdown_label = label_font.render(state.ui.order_type, True, (0, 0, 0))
+        dropdown_label = render_text(label_font, state.ui.order_type, True, (0, 0, 0))
         screen.blit(dropdown_label, (dropdown_rect.x + 10, dropdown_rect.y + 8))
 
         option_rects = []
@@ -1384,7 +1400,7 @@ class GameGUI:
                 pygame.draw.rect(screen, (0, 0, 0), r, 2, border_radius=6)
 
                 # Draw option text
-                opt_label = label_font.render(opt, True, (0, 0, 0))
+                opt_label = render_text(label_font, opt, True, (0, 0, 0))
                 screen.blit(opt_label, (r.x + 10, r.y + 8))
 
                 option_rects.append((opt, r))
@@ -1401,7 +1417,7 @@ class GameGUI:
 
         pygame.draw.rect(screen, (10, 0, 30), (0, 0, 1920, 1080))
 
-        title_surf = font.render("PORTFOLIO", True, (255, 255, 255))
+        title_surf = render_text(font, "PORTFOLIO", True, (255, 255, 255))
         title_rect = title_surf.get_rect(center=(1920 // 2, 60))
         screen.blit(title_surf, title_rect)
 
@@ -1409,27 +1425,19 @@ class GameGUI:
         col_x = [200, 400, 600, 800, 1000, 1300]
 
         for i, h in enumerate(headers):
-            txt = font.render(h, True, (200, 200, 200))
+            txt = render_text(font, h, True, (200, 200, 200))
             screen.blit(txt, (col_x[i], 120))
 
         start_y = 170
         row_h = 50
         pad = 10
 
-        for stock, data in state.portfolio_mgr.portfolio.items():
-            shares = data["shares"]
-            if shares <= 0:
-                continue
-
-            if len(data["bought_at"]) > 0:
-                avg_price = sum(data["bought_at"]) / len(data["bought_at"])
-            else:
-                avg_price = 0
-
-            current = state.tickers[stock]["current_price"]
-            value = current * shares
-            cost_basis = avg_price * shares
-            pnl = value - cost_basis
+        for stock, row in state.portfolio_mgr.positions.items():
+            shares = row["shares"]
+            avg_price = row["avg_price"]
+            current = row["current"]
+            value = row["value"]
+            pnl = row["pnl"]
             pnl_color = (0, 255, 0) if pnl >= 0 else (255, 80, 80)
 
             rect = pygame.Rect(150, start_y, 1500, row_h)
@@ -1438,7 +1446,7 @@ class GameGUI:
             # Register clickable row
             state.portfolio_click_zones[stock] = rect
 
-            ticker = state.tickers[stock]["ticker"]
+            ticker = stock
 
             fields = [
                 ticker,
@@ -1451,7 +1459,7 @@ class GameGUI:
 
             for i, f in enumerate(fields):
                 color = pnl_color if i == 5 else (255, 255, 255)
-                s = font.render(f, True, color)
+                s = render_text(font, f, True, color)
                 screen.blit(s, (col_x[i], start_y + 12))
 
             start_y += row_h + pad
@@ -1460,7 +1468,7 @@ class GameGUI:
         back_rect = pygame.Rect(50, 950, 200, 60)
         pygame.draw.rect(screen, (80, 0, 120), back_rect)
 
-        back_surf = font.render("BACK", True, (255, 255, 255))
+        back_surf = render_text(font, "BACK", True, (255, 255, 255))
         back_text_rect = back_surf.get_rect(center=back_rect.center)
         screen.blit(back_surf, back_text_rect)
 
@@ -1470,15 +1478,14 @@ class GameGUI:
         viz_rect = pygame.Rect(260, 950, 300, 60)
         pygame.draw.rect(screen, (120, 0, 160), viz_rect)
 
-        viz_surf = font.render("VISUALIZE", True, (255, 255, 255))
+        viz_surf = render_text(font, "VISUALIZE", True, (255, 255, 255))
         viz_text_rect = viz_surf.get_rect(center=viz_rect.center)
         screen.blit(viz_surf, viz_text_rect)
 
         state.portfolio_ui["visualize"] = viz_rect
         # register stock rows also
-        for stk, data in state.portfolio_mgr.portfolio.items():
-            if data["shares"] > 0:
-                state.portfolio_ui[stk] = state.portfolio_click_zones[stk]
+        for stk in state.portfolio_mgr.positions:
+            state.portfolio_ui[stk] = state.portfolio_click_zones[stk]
         state.ui.register_portfolio(state.portfolio_ui)
     def render_visualize_screen(self, screen, font, state):
         state.visualize_ui = {}
@@ -1487,26 +1494,17 @@ class GameGUI:
         pygame.draw.rect(screen, (0, 0, 20), (0, 0, 1920, 1080))
 
         # Title
-        title = font.render("PORTFOLIO BREAKDOWN", True, (255,255,255))
+        title = render_text(font, "PORTFOLIO BREAKDOWN", True, (255,255,255))
         screen.blit(title, title.get_rect(center=(1920//2, 80)))
 
-        # Collect portfolio values
-        values = []
-        labels = []
-        total_value = 0
-
-        for stock, info in state.portfolio_mgr.portfolio.items():
-            shares = info["shares"]
-            if shares <= 0:
-                continue
-            current = state.tickers[stock]["current_price"]
-            val = shares * current
-            labels.append(stock)
-            values.append(val)
-            total_value += val
+        # Portfolio values (kept current by PortfolioManager)
+        positions = state.portfolio_mgr.positions
+        labels = list(positions)
+        values = [row["value"] for row in positions.values()]
+        total_value = state.portfolio_mgr.total_value
 
         if total_value == 0:
-            no_data = font.render("NO DATA", True, (255, 80, 80))
+            no_data = render_text(font, "NO DATA", True, (255, 80, 80))
             screen.blit(no_data, no_data.get_rect(center=(960, 540)))
             return
 
@@ -1537,7 +1535,7 @@ class GameGUI:
                 "end": angle_end,
                 "label": labels[i],
                 "value": val,
-                "shares": state.portfolio_mgr.portfolio[labels[i]]["shares"],
+                "shares": positions[labels[i]]["shares"],
                 "percent": portion * 100
             })
 
@@ -1582,7 +1580,7 @@ class GameGUI:
             pygame.draw.line(screen, color, (x0, y0), (x1, y1), 4)
             pygame.draw.line(screen, color, (x1, y1), (x2, y2), 4)
 
-            label = font.render(labels[i], True, (255, 255, 255))
+            label = render_text(font, labels[i], True, (255, 255, 255))
             label_rect = label.get_rect(midbottom=(x2, y2 - 10))
             screen.blit(label, label_rect)
 
@@ -1667,10 +1665,10 @@ class GameGUI:
         if dist <= radius:
             for s in slice_hitboxes:
                 if s["start"] <= ang <= s["end"]:
-                    text1 = font.render(f"{s['label']}", True, (255,255,255))
-                    text2 = font.render(f"Shares: {s['shares']}", True, (255,255,255))
-                    text3 = font.render(f"Value: ${s['value']:.2f}", True, (255,255,255))
-                    text4 = font.render(f"{s['percent']:.1f}% of portfolio", True, (255,255,255))
+                    text1 = render_text(font, f"{s['label']}", True, (255,255,255))
+                    text2 = render_text(font, f"Shares: {s['shares']}", True, (255,255,255))
+                    text3 = render_text(font, f"Value: ${s['value']:.2f}", True, (255,255,255))
+                    text4 = render_text(font, f"{s['percent']:.1f}% of portfolio", True, (255,255,255))
 
                     padding = 10
                     w = max(text1.get_width(), text2.get_width(),
@@ -1690,7 +1688,7 @@ class GameGUI:
         back_rect = pygame.Rect(50, 950, 200, 60)
         pygame.draw.rect(screen, (80, 0, 120), back_rect)
 
-        back_surf = font.render("BACK", True, (255, 255, 255))
+        back_surf = render_text(font, "BACK", True, (255, 255, 255))
         back_text_rect = back_surf.get_rect(center=back_rect.center)
         screen.blit(back_surf, back_text_rect)
 
@@ -1806,7 +1804,7 @@ class GameGUI:
             # --- DRAW INFO PANEL ON TOP ---
             info_panel_renderer(info_font, assets, game_surface, state, y_offset=offset)
 
-            ui.current_chart_surface = chart_surface.copy()
+            ui.current_chart_surface = chart_surface
             return
 
         # =====================================================
@@ -1815,19 +1813,38 @@ class GameGUI:
         game_surface.blit(chart_surface, (0, 0))
         info_panel_renderer(info_font, assets, game_surface, state)
 
-        ui.current_chart_surface = chart_surface.copy()
+        ui.current_chart_surface = chart_surface
 
     def render_chart_to_surface(self, state, assets, font, time_font):
         """
-        Creates a transparent surface and renders the chart onto it.
+        Returns a transparent surface with the chart on it.
         This isolates chart drawing so transitions can animate it.
+
+        While the mouse is off the chart this is the cached chart layer
+        itself; otherwise the layer is copied into chart_frame and the
+        tooltip drawn on top. Both surfaces are reused across frames.
         """
-        surf = pygame.Surface((1920, 1080), pygame.SRCALPHA)
+        self._ensure_chart_surfaces()
+
+        if state.selected_stock is None:
+            self.chart_frame.fill((0, 0, 0, 0))
+            return self.chart_frame
+
+        view = self.update_chart_layer(font, state, time_font)
+        frame = self.chart_frame
+        frame.fill((0, 0, 0, 0))
+
+        if view is None:
+            self._draw_chart_panel(frame, font, state)
+            return frame
 
-        # but onto this isolated surface instead of game_surface.
-        chart_buttons = self.render_chart(font, state, surf,time_font)
+        if not self._chart_hovered():
+            return self.chart_layer
 
-        return surf
+        # frame is fully transparent, so MAX is a straight copy (no alpha math)
+        frame.blit(self.chart_layer, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        self._draw_chart_tooltip(frame, font, state, view)
+        return frame
 
 
 def apply_crt_warp(surface, curve_strength=0.045):
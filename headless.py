@@ -0,0 +1,321 @@
+# ================================================
+# headless.py (BATCH SIMULATION – NO WINDOW, NO AUDIO)
+# ================================================
+#
+#   python headless.py --days 30
+#   python headless.py --days 90 --out history.db --seed 7
+#   python headless.py --days 30 --engine sharded --workers 8
+#
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+import game_config
+from candle_store import CandleStore
+from market_state import MarketState, DB_PATH
+from sharded_engine import ShardedMarketEngine
+
+
+class HeadlessMarket(MarketState):
+    """
+    MarketState that can also be seeded from game/tickers.json
+    instead of the tickers table.
+    """
+    def __init__(self, db_path=DB_PATH, from_json=False):
+        self.from_json = from_json
+        super().__init__(db_path)
+
+    def load_from_db(self):
+        if not self.from_json:
+            super().load_from_db()
+            return
+
+        self.tickers = {}
+        for t, info in game_config.load("game", "tickers").items():
+            self.tickers[t] = {
+                "ticker": t,
+                "name": info["name"],
+                "sector": info["sector"],
+                "current_price": info["current_price"],
+                "last_price": info["last_price"],
+                "base_price": info["base_price"],
+                "volatility": info["volatility"],
+                "gravity": info["gravity"],
+                "trend": info["trend"],
+                "ath": info["ath"],
+                "atl": info["atl"],
+                "buy_qty": info["buy_qty"],
+                "volume": info["volume"],
+                "avg_volume": info["avg_volume"],
+
+                # Runtime-only fields restored with defaults
+                "volume_cap": info["volume_cap"],
+                "recent_prices": [],
+                "volume_history": [],
+                "day_history": CandleStore(),
+                "ohlc_buffer": [],
+                "last_breakout_time": -9999
+            }
+
+
+class BulkWriter:
+    """
+    Buffers candles as column arrays and writes them with one
+    executemany per flush, inside a single transaction.
+    """
+    def __init__(self, db_path, names):
+        self.conn = sqlite3.connect(db_path)
+        self.names = names
+        self.blocks = []
+        self.candles_written = 0
+
+        tables = {r[0] for r in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        )}
+        missing = {"account", "tickers", "candles"} - tables
+        if missing:
+            self.conn.close()
+            raise SystemExit(
+                f"{db_path} is missing tables {sorted(missing)} – run database_setup.py first"
+            )
+
+    def add_block(self, day, time_, o, h, l, c, v):
+        # copies: ShardedMarketEngine hands out shared views it
+        # overwrites on the next step
+        self.blocks.append((day, time_, o.copy(), h.copy(), l.copy(), c.copy(), v.copy()))
+
+    def flush(self):
+        if not self.blocks:
+            return
+
+        names = self.names
+        rows = []
+        for day, time_, o, h, l, c, v in self.blocks:
+            rows.extend(zip(
+                names,
+                [day] * len(names),
+                [time_] * len(names),
+                o.tolist(), h.tolist(), l.tolist(), c.tolist(), v.tolist()
+            ))
+
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO candles
+                (ticker, day, time, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+        self.candles_written += len(rows)
+        self.blocks = []
+
+    def write_state(self, state, price, last, trend, volume, ath, atl):
+        names = self.names
+        with self.conn:
+            self.conn.executemany("""
+                UPDATE tickers
+                SET current_price=?,
+                    last_price=?,
+                    trend=?,
+                    volume=?,
+                    ath=?,
+                    atl=?
+                WHERE ticker = ?
+            """, zip(
+                price.tolist(), last.tolist(), trend.tolist(),
+                volume.tolist(), ath.tolist(), atl.tolist(), names
+            ))
+
+            self.conn.execute("""
+                UPDATE account
+                SET market_time=?,
+                    market_day=?
+                WHERE id = 1
+            """, (state.market_time, state.game_day))
+
+    def close(self):
+        self.conn.close()
+
+
+def copy_database(src_path, dst_path):
+    """
+    Copy src_path to dst_path through SQLite's backup API, so rows still
+    in src_path's WAL come along. The source is only read.
+    """
+    src = sqlite3.connect(src_path)
+    try:
+        dst = sqlite3.connect(dst_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def run_simulation(days, db_path=DB_PATH, out_path=None, engine="vector",
+                   seed=None, from_json=False, write_candles=True, workers=None):
+    """
+    Simulate `days` full market-clock days without pygame.
+    engine = "vector" (one MarketEngine), "sharded" (MarketEngine split
+    over `workers` processes, default one per CPU) or "stock".
+    All three give the same prices for the same seed.
+    Candles and final ticker state are written to out_path (default: db_path).
+    Returns a small stats dict.
+    """
+    out_path = out_path or db_path
+    if out_path != db_path and os.path.exists(db_path):
+        copy_database(db_path, out_path)
+
+    # the run reads and migrates the copy, so --out never rewrites --db
+    state = HeadlessMarket(out_path, from_json=from_json)
+    names = list(state.tickers_obj.keys())
+    writer = None
+
+    # the bulk connection, the engine's workers and the game connections
+    # (WAL) are released even if the run fails part way
+    try:
+        writer = BulkWriter(out_path, names)
+
+        # same seed -> same prices with either engine
+        if seed is not None:
+            state.reseed(seed)
+        if engine == "vector":
+            state.enable_market_engine()
+        elif engine == "sharded":
+            streams = state.rng_streams
+            state.market_engine = ShardedMarketEngine.from_stocks(
+                state.tickers_obj, state.recently_bought, workers=workers,
+                seed=streams.seed, epoch=streams.epoch
+            )
+
+        ticks_per_day = 1440 // state.minutes_per_tick
+        ath = np.array([s.ath for s in state.tickers_obj.values()], dtype=np.float64)
+        atl = np.array([s.atl for s in state.tickers_obj.values()], dtype=np.float64)
+
+        t0 = time.perf_counter()
+
+        for _ in range(days):
+            for _ in range(ticks_per_day):
+                if engine != "stock":
+                    block = _vector_tick(state)
+                else:
+                    block = _stock_tick(state, names)
+
+                ath = np.maximum(ath, block[1])
+                atl = np.minimum(atl, block[2])
+                if write_candles:
+                    writer.add_block(state.game_day, state.market_time, *block)
+
+            writer.flush()
+
+        elapsed = time.perf_counter() - t0
+
+        # ---------------------------------
+        # FINAL TICKER STATE
+        # ---------------------------------
+        if engine != "stock":
+            eng = state.market_engine
+            writer.write_state(state, eng.current_price, eng.last_price, eng.trend,
+                               eng.volume, ath, atl)
+        else:
+            stocks = list(state.tickers_obj.values())
+            writer.write_state(
+                state,
+                np.array([s.current_price for s in stocks]),
+                np.array([s.last_price for s in stocks]),
+                np.array([s.trend for s in stocks]),
+                np.array([s.volume for s in stocks]),
+                ath, atl
+            )
+    finally:
+        try:
+            if engine == "sharded" and state.market_engine is not None:
+                state.market_engine.close()
+        finally:
+            if writer is not None:
+                writer.close()
+            try:
+                state.db.close()
+            finally:
+                state.price_board.close()
+
+    ticks = days * ticks_per_day
+    return {
+        "days": days,
+        "ticks": ticks,
+        "tickers": len(names),
+        "seconds": elapsed,
+        "ticks_per_sec": ticks / elapsed if elapsed else 0.0,
+        "candles_written": writer.candles_written,
+        "breakout_news": len(state.news.messages),
+        "out": out_path,
+    }
+
+
+def _vector_tick(state):
+    """One engine step; returns (open, high, low, close, volume) columns."""
+    state._advance_clock()
+    eng = state.market_engine
+    eng.step(state)
+
+    # same merge CandleManager.add_price applies in apply_tick_price:
+    # the rounded tick price closes the candle and its volume is added again
+    price = eng.current_price
+    return (
+        eng.candle_open,
+        np.maximum(eng.candle_high, price),
+        np.minimum(eng.candle_low, price),
+        price,
+        eng.candle_volume * 2,
+    )
+
+
+def _stock_tick(state, names):
+    """One classic apply_tick_price; reads the candle each Stock just closed."""
+    state.apply_tick_price()
+    last = [state.tickers_obj[n].day_history[-1] for n in names]
+    return (
+        np.array([c["open"] for c in last]),
+        np.array([c["high"] for c in last]),
+        np.array([c["low"] for c in last]),
+        np.array([c["close"] for c in last]),
+        np.array([c["volume"] for c in last], dtype=np.int64),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the market simulation without a window.")
+    parser.add_argument("--days", type=int, default=1, help="full market-clock days to simulate")
+    parser.add_argument("--db", default=DB_PATH, help="source database (default: game.db)")
+    parser.add_argument("--out", default=None, help="write results here instead of --db")
+    parser.add_argument("--engine", choices=["vector", "sharded", "stock"], default="vector")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for --engine sharded (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--from-json", action="store_true",
+                        help="seed tickers from game/tickers.json instead of the tickers table")
+    parser.add_argument("--no-candles", action="store_true", help="only write final ticker state")
+    args = parser.parse_args(argv)
+
+    stats = run_simulation(
+        args.days,
+        db_path=args.db,
+        out_path=args.out,
+        engine=args.engine,
+        seed=args.seed,
+        from_json=args.from_json,
+        write_candles=not args.no_candles,
+        workers=args.workers,
+    )
+
+    print(f"Simulated {stats['days']} day(s) / {stats['ticks']} ticks "
+          f"for {stats['tickers']} tickers in {stats['seconds']:.2f}s "
+          f"({stats['ticks_per_sec']:.0f} ticks/s)")
+    print(f"Wrote {stats['candles_written']} candles to {stats['out']}")
+
+
+if __name__ == "__main__":
+    main()
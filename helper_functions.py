@@ -1,5 +1,10 @@
 import sqlite3
 
+from database import (
+    ACCOUNT_TABLE_SQL, CANDLES_TABLE_SQL, NEWS_TABLE_SQL, PORTFOLIO_TABLE_SQL, TICKERS_TABLE_SQL,
+    SCHEMA_VERSION, set_schema_version,
+)
+
 DB_PATH = "game.db"
 
 # ---------------------------------------------------------
@@ -14,6 +19,7 @@ cur.execute("DROP TABLE IF EXISTS tickers;")
 cur.execute("DROP TABLE IF EXISTS portfolio;")
 cur.execute("DROP TABLE IF EXISTS candles;")
 cur.execute("DROP TABLE IF EXISTS news;")
+cur.execute("DROP TABLE IF EXISTS schema_version;")
 
 conn.commit()
 
@@ -22,68 +28,15 @@ conn.commit()
 # ---------------------------------------------------------
 print("---- CREATING TABLES ----")
 
-cur.execute("""
-CREATE TABLE tickers (
-    ticker TEXT PRIMARY KEY,
-    name TEXT,
-    sector TEXT,
-    current_price REAL,
-    last_price REAL,
-    base_price REAL,
-    volatility TEXT,
-    gravity REAL,
-    trend REAL,
-    ath REAL,
-    atl REAL,
-    buy_qty INTEGER,
-    volume INTEGER,
-    avg_volume INTEGER
-);
-""")
+cur.execute(TICKERS_TABLE_SQL)
 
-cur.execute("""
-CREATE TABLE candles (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    ticker TEXT,
-    day INTEGER,
-    time INTEGER,
-    open REAL,
-    high REAL,
-    low REAL,
-    close REAL,
-    volume INTEGER
-);
-""")
+cur.execute(CANDLES_TABLE_SQL)
 
-cur.execute("""
-CREATE TABLE portfolio (
-    ticker TEXT PRIMARY KEY,
-    shares INTEGER,
-    bought_at TEXT,
-    sell_qty INTEGER
-);
-""")
+cur.execute(PORTFOLIO_TABLE_SQL)
 
-cur.execute("""
-CREATE TABLE account (
-    id INTEGER PRIMARY KEY,
-    money REAL,
-    market_time INTEGER,
-    market_open INTEGER,
-    market_close INTEGER,
-    market_day INTEGER
-);
-""")
+cur.execute(ACCOUNT_TABLE_SQL)
 
-cur.execute("""
-CREATE TABLE news (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    symbol TEXT,
-    message TEXT,
-    color TEXT,
-    timestamp INTEGER
-);
-""")
+cur.execute(NEWS_TABLE_SQL)
 
 # ---------------------------------------------------------
 # 3. INSERT DEFAULT ACCOUNT
@@ -536,16 +489,18 @@ print("---- INITIALIZING PORTFOLIO ----")
 
 for symbol in TICKERS_JSON.keys():
     cur.execute("""
-        INSERT INTO portfolio (ticker, shares, bought_at, sell_qty)
+        INSERT INTO portfolio (ticker, shares, lots, sell_qty)
         VALUES (?, ?, ?, ?)
     """, (
         symbol,
         0,
-        "[]",     # empty JSON list
+        "[]",     # no lots
         0
     ))
     print(f"Portfolio row created for {symbol}")
 
+set_schema_version(conn, SCHEMA_VERSION)
+
 conn.commit()
 conn.close()
 print("---- DATABASE RESET + REBUILD COMPLETE ----")
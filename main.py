@@ -1,36 +1,29 @@
 import sys
-import file_functions as ff
+import game_config
 import pygame
 import time
 import gui
-import sqlite3
-import json
-from stock import Stock
 from gui import apply_cached_pixelation
-from candle_manager import CandleManager
-from portfolio_manager import PortfolioManager
 from UiEventManager import UiEventManager
 from news_manager import NewsManager
 from gui import GameGUI
+from market_state import MarketState
+from database import get_database
+from profiler import FrameProfiler
+from persistence import SaveError
+from text_cache import TEXT_CACHE
 DB_PATH = "game.db"
+SNAPSHOT_PATH = "game.snap"  # binary snapshot for fast startup (snapshot.py)
+USE_VECTOR_ENGINE = False  # step all tickers in one NumPy batch (MarketEngine)
 
 def db_connect():
-    return sqlite3.connect(DB_PATH)
+    return get_database(DB_PATH).reader()
 
-class GameState:
-    def __init__(self):
+class GameState(MarketState):
+    def __init__(self, db_path=DB_PATH, snapshot=None):
         # =====================================================
-        # 1. BASE STRUCTS – overwritten by load_from_db()
+        # 1. AUDIO + FONTS
         # =====================================================
-        self.account = {
-            "money": 0,
-            "market_time": 0,
-            "market_open": 570,
-            "market_close": 960,
-            "market_day": 1
-        }
-        self.portfolio = {}
-        self.recently_bought = {}
         self.sounds = {
             "chart": pygame.mixer.Sound("assets/sounds/chart_pop.mp3"),
             "buy": pygame.mixer.Sound("assets/sounds/purchase_sound.mp3"),
@@ -49,46 +42,23 @@ class GameState:
         }
 
         # =====================================================
-        # 2. LOAD EVERYTHING FROM SQLITE
+        # 2. MARKET STATE (snapshot or SQLite load, Stock objects, clock)
         # =====================================================
-        self.candles = CandleManager("game.db")
-        self.load_from_db()
+        super().__init__(db_path, snapshot=snapshot)
+
         # ========================================
         # INIT CLASSES
         #========================================
-        self.portfolio_mgr = PortfolioManager(self)
         self.ui = UiEventManager(self)
         self.gui = None  # set after GameGUI() created
         self.game_assets = GameAssets()
         self.gui_system = GameGUI()
 
-
-        # Build Stock objects from loaded ticker dicts
-        self.tickers_obj = {
-            name: Stock(name, attrs)
-            for name, attrs in self.tickers.items()
-        }
-
-        # Sync core time values from DB
-        self.game_day = self.account["market_day"]
-        self.market_time = self.account["market_time"]
-        self.market_open = self.account["market_open"]
-        self.market_close = self.account["market_close"]
-
         # =====================================================
-        # 3. RUNTIME FIELDS
+        # 3. UI & GAME STATE FLAGS
         # =====================================================
-        # order flow tracking
-        for stock_name in self.tickers.keys():
-            self.recently_bought[stock_name] = {
-                "order_force_time_delta": 0
-            }
-
-        # =====================================================
-        # 4. UI & GAME STATE FLAGS
-        # =====================================================
-        self.global_events = ff.get_json("game", "global_events")
-        self.company_events = ff.get_json("game", "company_events")
+        self.global_events = game_config.load("game", "global_events")
+        self.company_events = game_config.load("game", "company_events")
         self.selected_stock = None
         self.news = NewsManager(font=self.fonts["ticker_font"])
 
@@ -145,7 +115,7 @@ class GameState:
         self.slice_anim_timer = 0
 
         # =====================================================
-        # 5. CHART INTERACTION SYSTEM
+        # 4. CHART INTERACTION SYSTEM
         # =====================================================
         self.chart_zoom = 1
         self.chart_offset = 0
@@ -156,363 +126,22 @@ class GameState:
         self.slider_pos = 100
 
         # =====================================================
-        # 6. GAME CLOCK & MARKET SYSTEM
+        # 5. REAL-TIME TICK PACING
         # =====================================================
-        self.game_season = 1
-        self.day_in_season = 1
-        self.days_per_season = 10
-        self.total_seasons = 4
-        self.total_days_in_year = self.days_per_season * self.total_seasons
-
         self.tick_interval = 2
         self.tick_timer = 0
 
-        self.minutes_per_tick = 5
-
-        self.is_market_open = False
-        self.market_events = []
-
-        # (Unused now, but harmless)
-        self.trend_decay_rate = 0.1
-
-        self.open_orders = []
-
-        # =====================================================
-        # 7. SEASONAL MODELS
-        # =====================================================
-        self.season_profiles = {
-            1: {"trend_bias":  0.001,  "volatility_mult": 1.1, "volume_mult": 1.1},
-            2: {"trend_bias":  0.0,    "volatility_mult": 1.0, "volume_mult": 1.0},
-            3: {"trend_bias": -0.0015, "volatility_mult": 1.4, "volume_mult": 1.2},
-            4: {"trend_bias": -0.0005, "volatility_mult": 1.2, "volume_mult": 1.0},
-        }
-
-        # =====================================================
-        # 8. SECTOR SENTIMENT SYSTEM
-        # =====================================================
-        self.sector_sentiment = {}
-        for stock in self.tickers_obj.values():
-            self.sector_sentiment[stock.sector] = 0.0
-
-        self.market_mood = 0.0
-
-    def apply_tick_price(self):
-        # ============================
-        # 1. ADVANCE MARKET CLOCK
-        # ============================
-        self.market_time += self.minutes_per_tick
-
-        # rollover into next day
-        while self.market_time >= 1440:
-            self.market_time -= 1440
-            self._advance_game_day()
-
-        self.is_market_open = self.market_open <= self.market_time <= self.market_close
-
-        # ============================
-        # 2. APPLY TICK TO EACH STOCK
-        # ============================
-        for ticker, stock in self.tickers_obj.items():
-            # let the Stock object simulate itself
-            stock.apply_tick(self)
-
-            # ============================
-            # 3. SYNC BACK TO DICT (DB/UI)
-            # ============================
-            d = self.tickers[ticker]
-
-            d["current_price"] = stock.current_price
-            d["last_price"] = stock.last_price
-            d["trend"] = stock.trend
-            d["volume"] = stock.volume
-            d["ath"] = stock.ath
-            d["atl"] = stock.atl
-
-            # synced histories (for charts + DB save)
-            d["day_history"] = stock.day_history
-            d["volume_history"] = stock.volume_history
-            d["recent_prices"] = stock.recent_prices
-            self.candles.add_price(
-                self.tickers[ticker],
-                day=self.game_day,
-                time=self.market_time,
-                price=stock.current_price,
-                volume=stock.volume
-            )
-        self.process_limit_orders()
-
-    def _advance_game_day(self):
-        # Move to next day
-        self.game_day += 1
-        self.day_in_season += 1
-
-        # Season rollover
-        if self.day_in_season > self.days_per_season:
-            self.game_season += 1
-            self.day_in_season = 1
-
-        # Year rollover
-        if self.game_season > self.total_seasons:
-            self.game_season = 1
-            self.game_day = 1
-
-    def process_limit_orders(self):
-
-        # PREVENT EXECUTION AFTER HOURS
-        if not self.is_market_open:
-            return
-
-        new_list = []
-        for order in self.open_orders:
-            ticker = order["ticker"]
-            side = order["side"]
-            qty = order["qty"]
-            limit = order["limit_price"]
-
-            price = self.tickers_obj[ticker].current_price
-
-            # BUY LIMIT FILL
-            if side == "buy" and price <= limit:
-                cost = qty * price
-                if self.account["money"] >= cost:
-                    self.account["money"] -= cost
-                    self.portfolio_mgr.buy_stock(ticker, qty)
-                    print(f"BUY LIMIT FILLED: {qty} {ticker} @ {price:.2f}")
-                    continue
-
-            # SELL LIMIT FILL
-            if side == "sell" and price >= limit:
-                shares = self.portfolio.get(ticker, {}).get("shares", 0)
-                if shares >= qty:
-                    self.portfolio_mgr.sell_stock(ticker, qty)
-                    print(f"SELL LIMIT FILLED: {qty} {ticker} @ {price:.2f}")
-                    continue
-
-            # STILL OPEN — KEEP IT QUEUED
-            new_list.append(order)
-
-        self.open_orders = new_list
-
-    def market_is_open(self):
-        return self.market_open <= self.market_time <= self.market_close
-
-    def load_from_db(self):
-        """
-        Load account, portfolio, tickers, and candle history from SQLite.
-        Produces clean dicts that Stock() will wrap into objects.
-        """
-
-        conn = sqlite3.connect("game.db")
-        cur = conn.cursor()
-
-        # -------------------------------------------------
-        # 1. ACCOUNT
-        # -------------------------------------------------
-        row = cur.execute("""
-                          SELECT money, market_time, market_open, market_close, market_day
-                          FROM account
-                          WHERE id = 1
-                          """).fetchone()
-
-        if row:
-            self.account["money"] = row[0]
-            self.account["market_time"] = row[1]
-            self.account["market_open"] = row[2]
-            self.account["market_close"] = row[3]
-            self.account["market_day"] = row[4]
-
-        # -------------------------------------------------
-        # 2. TICKERS (persistent DB fields)
-        # -------------------------------------------------
-        rows = cur.execute("""
-                           SELECT ticker,
-                                  name,
-                                  sector,
-                                  current_price,
-                                  last_price,
-                                  base_price,
-                                  volatility,
-                                  gravity,
-                                  trend,
-                                  ath,
-                                  atl,
-                                  buy_qty,
-                                  volume,
-                                  avg_volume
-                           FROM tickers
-                           """).fetchall()
-
-        self.tickers = {}
-
-        for row in rows:
-            t = row[0]
-
-            # Build initial ticker dict
-            self.tickers[t] = {
-                "ticker": t,
-                "name": row[1],
-                "sector": row[2],
-                "current_price": row[3],
-                "last_price": row[4],
-                "base_price": row[5],
-                "volatility": row[6],
-                "gravity": row[7],
-                "trend": row[8],
-                "ath": row[9],
-                "atl": row[10],
-                "buy_qty": row[11],
-                "volume": row[12],
-                "avg_volume": row[13],
-
-                # Runtime-only fields restored with defaults
-                "volume_cap": row[13] * 12,
-                "recent_prices": [],
-                "volume_history": [],
-                "day_history": [],
-                "ohlc_buffer": [],
-                "last_breakout_time": -9999
-            }
-
-        # -------------------------------------------------
-        # 3. PORTFOLIO
-        # -------------------------------------------------
-        rows = cur.execute("""
-                           SELECT ticker, shares, bought_at, sell_qty
-                           FROM portfolio
-                           """).fetchall()
-
-        for ticker, shares, bought_at, sell_qty in rows:
-            self.portfolio[ticker] = {
-                "shares": shares,
-                "bought_at": json.loads(bought_at),
-                "sell_qty": sell_qty
-            }
-
-        # -------------------------------------------------
-        # 4. CANDLES (OHLC history)
-        # -------------------------------------------------
-        self.candles.load_all(self.tickers)
-
-        conn.close()
-
-    def autosave(self):
+    def quit_save(self):
         """
-        Save account, portfolio, and ticker fields to SQLite.
-        Candles are saved separately via save_candles_to_db().
+        Final save for every way out of the game (window close, ESC menu).
+        A failed save is reported, not raised, so quitting never crashes.
         """
-
-        # ---------------------------------
-        # 1. Sync account with current runtime state
-        # ---------------------------------
-        self.account["market_time"] = self.market_time
-        self.account["market_open"] = self.market_open
-        self.account["market_close"] = self.market_close
-        self.account["market_day"] = self.game_day
-
-        conn = sqlite3.connect("game.db")
-        cur = conn.cursor()
-
-        # ---------------------------------
-        # 2. SAVE ACCOUNT
-        # ---------------------------------
-        cur.execute("""
-                    UPDATE account
-                    SET money=?,
-                        market_time=?,
-                        market_open=?,
-                        market_close=?,
-                        market_day=?
-                    WHERE id = 1
-                    """, (
-                        self.account["money"],
-                        self.account["market_time"],
-                        self.account["market_open"],
-                        self.account["market_close"],
-                        self.account["market_day"]
-                    ))
-
-        # ---------------------------------
-        # 3. SAVE PORTFOLIO
-        # ---------------------------------
-        for ticker, info in self.portfolio_mgr.portfolio.items():
-            cur.execute("""
-                        UPDATE portfolio
-                        SET shares=?,
-                            bought_at=?,
-                            sell_qty=?
-                        WHERE ticker = ?
-                        """, (
-                            info["shares"],
-                            json.dumps(info["bought_at"]),
-                            info.get("sell_qty", 0),
-                            ticker
-                        ))
-
-        # ---------------------------------
-        # 4. SAVE TICKERS (from Stock objects)
-        # ---------------------------------
-        for name, stock in self.tickers_obj.items():
-            cur.execute("""
-                        UPDATE tickers
-                        SET current_price=?,
-                            last_price=?,
-                            base_price=?,
-                            volatility=?,
-                            gravity=?,
-                            trend=?,
-                            ath=?,
-                            atl=?,
-                            buy_qty=?,
-                            volume=?,
-                            avg_volume=?
-                        WHERE ticker = ?
-                        """, (
-                            stock.current_price,
-                            stock.last_price,
-                            stock.base_price,
-                            stock.volatility,
-                            stock.gravity,
-                            stock.trend,
-                            stock.ath,
-                            stock.atl,
-                            stock.buy_qty,
-                            stock.volume,
-                            stock.avg_volume,
-                            name
-                        ))
-
-        conn.commit()
-        conn.close()
-
-        # ---------------------------------
-        # 5. SAVE CANDLES
-        # ---------------------------------
-        self.candles.save_all(self.tickers_obj)
-
-    def simulate_days(self, days_to_simulate):
-        ticks_per_day = (self.market_close - self.market_open) // self.minutes_per_tick
-
-        for _ in range(days_to_simulate):
-            for _ in range(ticks_per_day):
-                self.apply_tick_price()
-
-            self._advance_game_day()  # or whatever you use for day rollover
-
-        print("Finished sim:", days_to_simulate, "days")
-
-    def format_time(self, minutes):
-        h = minutes // 60
-        m = minutes % 60
-
-        suffix = "AM"
-        if h >= 12:
-            suffix = "PM"
-        if h == 0:
-            h = 12
-        elif h > 12:
-            h -= 12
-
-        return f"{h}:{m:02d} {suffix}"
+        t0 = time.time()
+        try:
+            self.final_save()
+            print("SAVE TIME:", time.time() - t0)
+        except SaveError as e:
+            print("SAVE FAILED:", e)
 
 import pygame
 class GameAssets:
@@ -536,272 +165,76 @@ class GameAssets:
         }
 
 
-pygame.init()
-pygame.mixer.init()
-screen = pygame.display.set_mode((1920,1080), pygame.DOUBLEBUF | pygame.SCALED)
-clock = pygame.time.Clock()
-fps_font = pygame.font.Font("assets/fonts/VCR_OSD_MONO_1.001.ttf", 18)
-
-pixel_cache = None
-pixel_cache_timer = 0
-pixel_update_rate = 4   # update every 4 frames
-
-running = True
-state = GameState()
-assets = GameAssets()
-time_font = assets.fonts["time_label_font"]
-
-gui_system = GameGUI()
-state.gui = gui_system  #Gives access to UI manager
-choice = gui_system.render_main_menu(screen, assets.fonts["menu_font"])
-if choice == "quit":
-    pygame.quit()
-    quit()
-
-ticker_x = 1920  # start fully off-screen to the right
-save_timer = 0
-save_interval = 10  # seconds
-
-backbuffer = pygame.Surface((1920, 1080))
-crt_enabled = False
-frame_counter = 0
-scanlines = pygame.Surface((1920, 1080), pygame.SRCALPHA)
-pixel_surface = pygame.Surface((1920, 1080))
-
-PIXEL_SIZE = 1.2
-for y in range(0, 1080, 3):
-    pygame.draw.line(scanlines, (0, 0, 0, 45), (0, y), (1920, y))
-pending_click = None
-
 # ===========================
-# MAIN LOOP
+# FRAME RENDERING
+# (shared by the main loop and benchmarks/bench_render.py)
 # ===========================
-while running:
-    # =====================================================
-    # EVENT HANDLING
-    # =====================================================
-    for event in pygame.event.get():
-
-        # -------------------------------------------------
-        # QUIT
-        # -------------------------------------------------
-        if event.type == pygame.QUIT:
-            t0 = time.time()
-            state.autosave()
-            print("SAVE TIME:", time.time() - t0)
-            running = False
-            break
-
-        # -------------------------------------------------
-        # KEY INPUT
-        # -------------------------------------------------
-        if event.type == pygame.KEYDOWN:
-            result = state.ui.handle_key(event, screen, assets.fonts['header_font'])
-            if result == "quit":
-                running = False
-                break
+PIXEL_SIZE = 1.2
 
-        # -------------------------------------------------
-        # MOUSE WHEEL
-        # -------------------------------------------------
-        if event.type == pygame.MOUSEWHEEL:
-            state.ui.pending_scroll -= event.y * 10
-
-            max_scroll = max(0, len(state.open_orders) * 22 - 60)
-            state.ui.pending_scroll = max(0, min(state.ui.pending_scroll, max_scroll))
-
-            state.prev_chart_zoom = state.chart_zoom
-            state.chart_zoom *= (1.15 if event.y > 0 else 1 / 1.15)
-            state.chart_zoom = max(0.1, min(200.0, state.chart_zoom))
-
-        # -------------------------------------------------
-        # MOUSE MOTION (DRAGGING)
-        # -------------------------------------------------
-        if event.type == pygame.MOUSEMOTION:
-
-            if state.ui.crt_enabled:
-                unwarped = gui.crt_unwarp(*event.pos)
-                if unwarped is None:
-                    continue
-                mx, my = unwarped
-            else:
-                mx, my = event.pos
-
-            buttons = pygame.mouse.get_pressed()
-            state.ui.handle_mouse_motion(mx, my, buttons)
-
-        # -------------------------------------------------
-        # MOUSE CLICK (BUTTON DOWN)
-        # -------------------------------------------------
-        if event.type == pygame.MOUSEBUTTONDOWN:
-
-            if state.ui.crt_enabled:
-                unwarped = gui.crt_unwarp(*event.pos)
-                if unwarped is None:
-                    continue
-                mx, my = unwarped
-            else:
-                mx, my = event.pos
-
-            pending_click = (mx, my)
-
-    # =====================================================
-    # TICK UPDATE
-    # =====================================================
-    dt = clock.tick(120) / 1000
-
-    for k in state.button_cooldowns:
-        if state.button_cooldowns[k] > 0:
-            state.button_cooldowns[k] -= dt
-
-    state.tick_timer += dt
-    save_timer += dt
-
-    if save_timer >= save_interval:
-        state.autosave()
-        save_timer = 0
-
-    while state.tick_timer >= state.tick_interval:
-        state.apply_tick_price()
-        state.tick_timer -= state.tick_interval
-
-    state.portfolio_value = state.portfolio_mgr.get_portfolio_value()
-    time_left = max(0, state.tick_interval - state.tick_timer)
-
-    # =====================================================
-    # SCREEN TRANSITION HANDLING
-    # =====================================================
-    if state.ui.pending_switch:
-
-        backbuffer.blit(screen, (0, 0))
-        state.ui.current_screen = state.ui.pending_switch
-        state.ui.pending_switch = None
 
-        game_surface = pygame.Surface((1920, 1080))
-        game_surface.fill((0, 0, 0))
-
-        if state.ui.current_screen == "portfolio":
-            gui_system.render_portfolio_screen(game_surface, assets.fonts['header_font'], state)
-
-        elif state.ui.current_screen == "visualize":
-            gui_system.render_visualize_screen(game_surface, assets.fonts['header_font'], state)
-
-        else:
-            # -------- MAIN GAME DURING SCREEN SWITCH --------
-            gui_system.render_header(
-                assets.fonts["header_font"],
-                state.account,
-                game_surface,
-                time_left,
-                state.portfolio_value,
-                state
-            )
-
-            click_zones = gui_system.render_tickers(
-                assets.fonts['ticker_font'], state.tickers_obj, game_surface
-            )
-            state.ui.register_tickers(click_zones)
-
-            sidebar_data = gui_system.render_side_bar(
-                game_surface, assets.fonts['info_bar_font'], state
-            )
-            state.ui.register_sidebar(sidebar_data)
-
-            # ---------- BUILD CHART SURFACE ----------
-            chart_surface = gui_system.render_chart_to_surface(
-                state, assets, assets.fonts["info_font"], time_font
-            )
-
-            # ---------- CHART + INFO PANEL TRANSITION ----------
-            gui_system.chart_transition(
-                game_surface,
-                chart_surface,
-                state.ui,
-                gui_system.render_info_panel,
-                assets.fonts['info_font'],
-                assets,
-                state,
-                time_font=time_font
-            )
-
-            # ---------- NEWS ABOVE EVERYTHING ----------
-            state.news.update_and_draw(game_surface, dt)
-
-        gui_system.screen_transition(screen, backbuffer, game_surface)
-        pygame.display.flip()
-        continue
-    state.ui.caret_timer += dt
-    if state.ui.caret_timer >= 0.5:
-        state.ui.caret_timer = 0
-        state.ui.caret_visible = not state.ui.caret_visible
-
-    # =====================================================
-    # NORMAL RENDERING
-    # =====================================================
-    game_surface = pygame.Surface((1920, 1080))
-    game_surface.fill((0, 0, 0))
+def render_game_screen(gui_system, state, assets, game_surface, time_left, dt):
+    """
+    Draw the current screen onto game_surface. Returns the
+    (sidebar_data, click_zones) clicks are resolved against, or
+    (None, None) on the portfolio / visualize screens.
+    """
+    time_font = assets.fonts["time_label_font"]
 
     # -------- PORTFOLIO --------
     if state.ui.current_screen == "portfolio":
         gui_system.render_portfolio_screen(game_surface, assets.fonts['header_font'], state)
+        return None, None
 
     # -------- VISUALIZE --------
-    elif state.ui.current_screen == "visualize":
+    if state.ui.current_screen == "visualize":
         gui_system.render_visualize_screen(game_surface, assets.fonts['header_font'], state)
+        return None, None
 
     # -------- MAIN GAME --------
-    else:
-        gui_system.render_header(
-            assets.fonts["header_font"],
-            state.account,
-            game_surface,
-            time_left,
-            state.portfolio_value,
-            state
-        )
+    gui_system.render_header(
+        assets.fonts["header_font"],
+        state.account,
+        game_surface,
+        time_left,
+        state.portfolio_value,
+        state
+    )
 
-        click_zones = gui_system.render_tickers(
-            assets.fonts['ticker_font'], state.tickers_obj, game_surface
-        )
-        state.ui.register_tickers(click_zones)
+    click_zones = gui_system.render_tickers(
+        assets.fonts['ticker_font'], state.price_board, game_surface
+    )
+    state.ui.register_tickers(click_zones)
 
-        sidebar_data = gui_system.render_side_bar(
-            game_surface, assets.fonts['info_bar_font'], state
-        )
-        state.ui.register_sidebar(sidebar_data)
+    sidebar_data = gui_system.render_side_bar(
+        game_surface, assets.fonts['info_bar_font'], state
+    )
+    state.ui.register_sidebar(sidebar_data)
 
-        # ---------- BUILD CHART SURFACE ----------
-        chart_surface = gui_system.render_chart_to_surface(
-            state, assets, assets.fonts["info_font"], time_font
-        )
+    # ---------- BUILD CHART SURFACE ----------
+    chart_surface = gui_system.render_chart_to_surface(
+        state, assets, assets.fonts["info_font"], time_font
+    )
 
-        # ---------- CHART + INFO PANEL TRANSITION ----------
-        gui_system.chart_transition(
-            game_surface,
-            chart_surface,
-            state.ui,
-            gui_system.render_info_panel,
-            assets.fonts['info_font'],
-            assets,
-            state,
-            time_font=time_font
-        )
+    # ---------- CHART + INFO PANEL TRANSITION ----------
+    gui_system.chart_transition(
+        game_surface,
+        chart_surface,
+        state.ui,
+        gui_system.render_info_panel,
+        assets.fonts['info_font'],
+        assets,
+        state,
+        time_font=time_font
+    )
 
-        # ---------- NEWS ABOVE EVERYTHING ----------
-        state.news.update_and_draw(game_surface, dt)
+    # ---------- NEWS ABOVE EVERYTHING ----------
+    state.news.update_and_draw(game_surface, dt)
+    return sidebar_data, click_zones
 
-    # ---------- PROCESS CLICK ----------
-    if pending_click:
-        mx, my = pending_click
-        state.ui.handle_mouse(
-            mx, my,
-            sidebar_data if state.ui.current_screen == "normal" else None,
-            click_zones if state.ui.current_screen == "normal" else None
-        )
-        pending_click = None
 
-    # ---------- CRT / NORMAL DRAW ----------
-    if state.ui.crt_enabled:
+def present_frame(screen, game_surface, crt_enabled, pixel_surface, scanlines):
+    """Copy game_surface to the screen, through the CRT filter when it is on."""
+    if crt_enabled:
         warped = gui.apply_crt_warp(game_surface, 0.03)
         apply_cached_pixelation(warped, pixel_surface, PIXEL_SIZE)
         screen.blit(pixel_surface, (0, 0))
@@ -809,15 +242,235 @@ while running:
     else:
         screen.blit(game_surface, (0, 0))
 
-    screen.blit(
-        fps_font.render(f"FPS: {int(clock.get_fps())}", True, (0, 255, 0)),
-        (10, 10)
+
+def instrument_frame(profiler, state, gui_system):
+    """Wrap the per-frame systems in profiler spans (F3 overlay, F4 export)."""
+    profiler.instrument(state, "apply_tick_price", "process_limit_orders", "autosave")
+    profiler.instrument(
+        gui_system,
+        "render_header", "render_tickers", "render_side_bar", "render_chart_to_surface",
+        "chart_transition", "render_info_panel", "render_portfolio_screen",
+        "render_visualize_screen", "screen_transition",
     )
-    pygame.display.flip()
+    profiler.instrument(state.news, "update_and_draw", prefix="news.")
+
+
+def profiler_extra_lines():
+    cache = TEXT_CACHE.stats()
+    return [f"text cache: {cache['entries']} entries, {cache['hit_rate']:.1%} hits"]
+
+
+def main():
+    pygame.init()
+    pygame.mixer.init()
+    screen = pygame.display.set_mode((1920,1080), pygame.DOUBLEBUF | pygame.SCALED)
+    clock = pygame.time.Clock()
+    fps_font = pygame.font.Font("assets/fonts/VCR_OSD_MONO_1.001.ttf", 18)
+
+    running = True
+    state = GameState(snapshot=SNAPSHOT_PATH)
+    if USE_VECTOR_ENGINE and state.market_engine is None:
+        state.enable_market_engine()
+    assets = GameAssets()
+
+    gui_system = GameGUI()
+    state.gui = gui_system  #Gives access to UI manager
+    choice = gui_system.render_main_menu(screen, assets.fonts["menu_font"])
+    if choice == "quit":
+        pygame.quit()
+        quit()
+
+    # SQLite writes happen off the frame thread from here on
+    state.start_save_worker()
+
+    save_timer = 0
+    save_interval = 10  # seconds
+
+    backbuffer = pygame.Surface((1920, 1080))
+    scanlines = gui_system.layers.scanlines(1920, 1080, 3, 45)
+    pixel_surface = pygame.Surface((1920, 1080))
+
+    pending_click = None
+
+    # ===========================
+    # FRAME PROFILER (F3 overlay, F4 export)
+    # ===========================
+    profiler = FrameProfiler()
+    instrument_frame(profiler, state, gui_system)
+
+    # ===========================
+    # MAIN LOOP
+    # ===========================
+    while running:
+        profiler.begin_frame()
+
+        # =====================================================
+        # EVENT HANDLING
+        # =====================================================
+        profiler.start("events")
+        for event in pygame.event.get():
+
+            # -------------------------------------------------
+            # QUIT
+            # -------------------------------------------------
+            if event.type == pygame.QUIT:
+                state.quit_save()
+                running = False
+                break
+
+            # -------------------------------------------------
+            # KEY INPUT
+            # -------------------------------------------------
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+                continue
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                profiler.export_csv("frame_profile.csv")
+                profiler.export_json("frame_profile.json")
+                print("FRAME PROFILE -> frame_profile.csv, frame_profile.json")
+                continue
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                t0 = time.time()
+                state.quick_save()
+                print("QUICK SAVE TIME:", time.time() - t0)
+                continue
+
+            if event.type == pygame.KEYDOWN:
+                result = state.ui.handle_key(event, screen, assets.fonts['header_font'])
+                if result == "quit":
+                    running = False
+                    break
+
+            # -------------------------------------------------
+            # MOUSE WHEEL
+            # -------------------------------------------------
+            if event.type == pygame.MOUSEWHEEL:
+                state.ui.pending_scroll -= event.y * 10
+
+                max_scroll = max(0, len(state.open_orders) * 22 - 60)
+                state.ui.pending_scroll = max(0, min(state.ui.pending_scroll, max_scroll))
+
+                state.prev_chart_zoom = state.chart_zoom
+                state.chart_zoom *= (1.15 if event.y > 0 else 1 / 1.15)
+                state.chart_zoom = max(0.1, min(200.0, state.chart_zoom))
+
+            # -------------------------------------------------
+            # MOUSE MOTION (DRAGGING)
+            # -------------------------------------------------
+            if event.type == pygame.MOUSEMOTION:
+
+                if state.ui.crt_enabled:
+                    unwarped = gui.crt_unwarp(*event.pos)
+                    if unwarped is None:
+                        continue
+                    mx, my = unwarped
+                else:
+                    mx, my = event.pos
+
+                buttons = pygame.mouse.get_pressed()
+                state.ui.handle_mouse_motion(mx, my, buttons)
+
+            # -------------------------------------------------
+            # MOUSE CLICK (BUTTON DOWN)
+            # -------------------------------------------------
+            if event.type == pygame.MOUSEBUTTONDOWN:
+
+                if state.ui.crt_enabled:
+                    unwarped = gui.crt_unwarp(*event.pos)
+                    if unwarped is None:
+                        continue
+                    mx, my = unwarped
+                else:
+                    mx, my = event.pos
+
+                pending_click = (mx, my)
+        profiler.stop("events")
+
+        # quit_save() has closed the database and the price board
+        if not running:
+            break
+
+        # =====================================================
+        # TICK UPDATE
+        # =====================================================
+        with profiler.span("clock_wait"):
+            dt = clock.tick(120) / 1000
+
+        for k in state.button_cooldowns:
+            if state.button_cooldowns[k] > 0:
+                state.button_cooldowns[k] -= dt
+
+        state.tick_timer += dt
+        save_timer += dt
+
+        if save_timer >= save_interval:
+            state.autosave()
+            save_timer = 0
+
+        while state.tick_timer >= state.tick_interval:
+            state.apply_tick_price()
+            state.tick_timer -= state.tick_interval
+
+        state.portfolio_value = state.portfolio_mgr.get_portfolio_value()
+        time_left = max(0, state.tick_interval - state.tick_timer)
+
+        # =====================================================
+        # SCREEN TRANSITION HANDLING
+        # =====================================================
+        if state.ui.pending_switch:
+
+            backbuffer.blit(screen, (0, 0))
+            state.ui.current_screen = state.ui.pending_switch
+            state.ui.pending_switch = None
+
+            game_surface = pygame.Surface((1920, 1080))
+            game_surface.fill((0, 0, 0))
+            render_game_screen(gui_system, state, assets, game_surface, time_left, dt)
 
+            gui_system.screen_transition(screen, backbuffer, game_surface)
+            with profiler.span("display_flip"):
+                pygame.display.flip()
+            continue
+        state.ui.caret_timer += dt
+        if state.ui.caret_timer >= 0.5:
+            state.ui.caret_timer = 0
+            state.ui.caret_visible = not state.ui.caret_visible
+
+        # =====================================================
+        # NORMAL RENDERING
+        # =====================================================
+        game_surface = pygame.Surface((1920, 1080))
+        game_surface.fill((0, 0, 0))
+        sidebar_data, click_zones = render_game_screen(
+            gui_system, state, assets, game_surface, time_left, dt
+        )
+
+        # ---------- PROCESS CLICK ----------
+        if pending_click:
+            mx, my = pending_click
+            state.ui.handle_mouse(mx, my, sidebar_data, click_zones)
+            pending_click = None
+
+        # ---------- CRT / NORMAL DRAW ----------
+        with profiler.span("crt_post" if state.ui.crt_enabled else "present"):
+            present_frame(screen, game_surface, state.ui.crt_enabled, pixel_surface, scanlines)
+
+        screen.blit(
+            fps_font.render(f"FPS: {int(clock.get_fps())}", True, (0, 255, 0)),
+            (10, 10)
+        )
+        profiler.draw_overlay(screen, fps_font, extra=profiler_extra_lines)
+
+        with profiler.span("display_flip"):
+            pygame.display.flip()
+
+    # Shutdown
+    pygame.mixer.quit()
+    pygame.quit()
+    sys.exit()
 
-# Shutdown
-pygame.mixer.quit()
-pygame.quit()
-sys.exit()
 
+if __name__ == "__main__":
+    main()
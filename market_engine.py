@@ -0,0 +1,488 @@
+# market_engine.py
+
+import numpy as np
+
+from rng_streams import RandomStreams, new_seed
+
+
+class MarketEngine:
+    """
+    Column-oriented replacement for the per-Stock tick loop.
+
+    Every ticker's simulation state lives in one NumPy array per field and
+    step() advances the whole universe at once, using the same force model
+    as Stock.apply_tick (mean reversion, momentum, order pressure, sector
+    sentiment, mood, season profile, breakouts and volume regimes).
+    """
+
+    VOLATILITY_BUCKETS = ("low", "medium", "high")
+    SIGMA_RANGES = np.array([
+        [0.003, 0.015],
+        [0.015, 0.06],
+        [0.04, 0.14],
+    ])
+
+    RECENT_WINDOW = 30          # breakout lookback (Stock uses recent_prices[-30:])
+    BREAKOUT_MIN_HISTORY = 20
+    BREAKOUT_COOLDOWN = 120
+
+    MAX_VOLUME_HISTORY = 700
+    MAX_RECENT_PRICES = 200
+
+    def __init__(self, rows, seed=None, streams=None):
+        """
+        rows = list of dicts (or objects via from_stocks) with the persistent
+        ticker fields. Order of rows defines the column index of each ticker.
+        streams = RandomStreams over the same tickers in the same order
+        (shared with the Stock path); otherwise one is built from `seed`.
+        """
+        n = len(rows)
+        self.size = n
+
+        # -----------------------
+        # IDENTITY
+        # -----------------------
+        self.names = [r["ticker"] for r in rows]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        if streams is None:
+            streams = RandomStreams(new_seed() if seed is None else seed, self.names)
+        elif streams.names != self.names:
+            raise ValueError("RandomStreams tickers do not match the engine rows")
+        self.streams = streams
+
+        self.sector_names = sorted({r["sector"] for r in rows})
+        sector_lookup = {s: i for i, s in enumerate(self.sector_names)}
+        self.sector_idx = np.array([sector_lookup[r["sector"]] for r in rows], dtype=np.int64)
+
+        bucket_lookup = {b: i for i, b in enumerate(self.VOLATILITY_BUCKETS)}
+        self.vol_bucket = np.array([bucket_lookup[r["volatility"]] for r in rows], dtype=np.int64)
+        self.sigma_min = self.SIGMA_RANGES[self.vol_bucket, 0]
+        self.sigma_max = self.SIGMA_RANGES[self.vol_bucket, 1]
+
+        # -----------------------
+        # PRICE STATE
+        # -----------------------
+        self.current_price = np.array([r["current_price"] for r in rows], dtype=np.float64)
+        self.last_price = np.array([r["last_price"] for r in rows], dtype=np.float64)
+        self.base_price = np.array([r["base_price"] for r in rows], dtype=np.float64)
+        self.gravity = np.array([r["gravity"] for r in rows], dtype=np.float64)
+        self.trend = np.array([r["trend"] for r in rows], dtype=np.float64)
+        self.ath = np.array([r["ath"] for r in rows], dtype=np.float64)
+        self.atl = np.array([r["atl"] for r in rows], dtype=np.float64)
+
+        # -----------------------
+        # VOLUME STATE
+        # -----------------------
+        self.volume = np.array([r["volume"] for r in rows], dtype=np.int64)
+        self.avg_volume = np.array([r["avg_volume"] for r in rows], dtype=np.float64)
+        self.volume_cap = np.array(
+            [r.get("volume_cap", r["avg_volume"] * 12) for r in rows], dtype=np.float64
+        )
+
+        # constant per-ticker terms, precomputed once
+        self.liquidity = 1 / np.maximum(1.0, np.sqrt(self.avg_volume))
+        self.open_noise_lo = -np.trunc(self.avg_volume * 0.015).astype(np.int64)
+        self.open_noise_hi = np.trunc(self.avg_volume * 0.025).astype(np.int64) + 1
+        self.ah_noise = np.trunc(self.avg_volume * 0.005).astype(np.int64)
+
+        # -----------------------
+        # RUNTIME STATE
+        # -----------------------
+        self.order_delta = np.array(
+            [r.get("order_force_time_delta", 0.0) for r in rows], dtype=np.float64
+        )
+        self.last_breakout_time = np.array(
+            [r.get("last_breakout_time", -9999) for r in rows], dtype=np.float64
+        )
+
+        # NaN = "not chosen yet" (Stock uses None)
+        self.intraday_bias = np.array(
+            [np.nan if r.get("intraday_bias") is None else r["intraday_bias"] for r in rows],
+            dtype=np.float64
+        )
+        self.daily_volume_phase = np.array(
+            [np.nan if r.get("daily_volume_phase") is None else r["daily_volume_phase"] for r in rows],
+            dtype=np.float64
+        )
+
+        # ring buffer of the last RECENT_WINDOW closes, NaN-padded
+        self.recent = np.full((n, self.RECENT_WINDOW), np.nan)
+        self.recent_count = np.zeros(n, dtype=np.int64)
+        self.recent_pos = 0
+        for i, r in enumerate(rows):
+            # right-align existing history so slot 0 is always the oldest
+            tail = list(r.get("recent_prices", []))[-self.RECENT_WINDOW:]
+            if tail:
+                self.recent[i, self.RECENT_WINDOW - len(tail):] = tail
+            self.recent_count[i] = len(r.get("recent_prices", []))
+
+        # -----------------------
+        # LAST CANDLE (output of step)
+        # -----------------------
+        self.candle_day = None
+        self.candle_time = None
+        self.candle_open = np.zeros(n)
+        self.candle_high = np.zeros(n)
+        self.candle_low = np.zeros(n)
+        self.candle_close = np.zeros(n)
+        self.candle_volume = np.zeros(n, dtype=np.int64)
+
+        # tickers that broke out on the last step: (name, is_up)
+        self.breakouts = []
+
+    @classmethod
+    def from_stocks(cls, tickers_obj, recently_bought=None, seed=None, streams=None):
+        """Build the column arrays from existing Stock objects."""
+        return cls(cls.rows_from_stocks(tickers_obj, recently_bought), seed=seed, streams=streams)
+
+    @staticmethod
+    def rows_from_stocks(tickers_obj, recently_bought=None):
+        """Plain (picklable) row dicts for the engine, in tickers_obj order."""
+        rows = []
+        for name, stock in tickers_obj.items():
+            delta = 0.0
+            if recently_bought and name in recently_bought:
+                delta = recently_bought[name]["order_force_time_delta"]
+
+            rows.append({
+                "ticker": name,
+                "sector": stock.sector,
+                "volatility": stock.volatility,
+                "current_price": stock.current_price,
+                "last_price": stock.last_price,
+                "base_price": stock.base_price,
+                "gravity": stock.gravity,
+                "trend": stock.trend,
+                "ath": stock.ath,
+                "atl": stock.atl,
+                "volume": stock.volume,
+                "avg_volume": stock.avg_volume,
+                "volume_cap": stock.volume_cap,
+                "order_force_time_delta": delta,
+                "last_breakout_time": stock.last_breakout_time,
+                "intraday_bias": stock.intraday_bias,
+                "daily_volume_phase": stock.daily_volume_phase,
+                "recent_prices": stock.recent_prices,
+            })
+        return rows
+
+    # =====================================================================
+    # ORDER FLOW
+    # =====================================================================
+    def add_order_force(self, ticker, amount):
+        """Mirror of bumping recently_bought[ticker]['order_force_time_delta']."""
+        i = self.index.get(ticker)
+        if i is not None:
+            self.order_delta[i] += amount
+
+    # =====================================================================
+    # BATCHED TICK
+    # =====================================================================
+    def step(self, gs):
+        """
+        Advance every ticker by one tick.
+        gs supplies the shared inputs: market_time, is_market_open,
+        market_open/close, game_day, game_season, season_profiles,
+        sector_sentiment, market_mood and news.
+        """
+        n = self.size
+        if n == 0:
+            return
+
+        rng = self.streams
+        is_open = gs.is_market_open
+        t = gs.market_time
+        profile = gs.season_profiles[gs.game_season]
+
+        # ----------------------------------------------------
+        # PRICE + TREND
+        # ----------------------------------------------------
+        current_price = self.current_price
+        previous_price = self.last_price
+        self.last_price = current_price
+
+        self.trend = self.trend * 0.9 + (current_price - previous_price) * 0.1
+        momentum_force = self.trend * 0.01
+
+        # ----------------------------------------------------
+        # VOLATILITY MODEL
+        # ----------------------------------------------------
+        sigma_raw = rng.uniform("price", self.sigma_min, self.sigma_max)
+        vol_mult = np.clip(self.volume / self.avg_volume, 0.75, 3.0)
+        sigma = sigma_raw * vol_mult
+
+        # ----------------------------------------------------
+        # MEAN REVERSION
+        # ----------------------------------------------------
+        fair_value_force = (self.base_price - current_price) * (self.gravity * 1.3)
+
+        # ----------------------------------------------------
+        # ORDER PRESSURE
+        # ----------------------------------------------------
+        self.order_delta *= 0.98
+        order_force = self.order_delta * 0.000001 * self.liquidity
+
+        # ----------------------------------------------------
+        # SECTOR SENTIMENT (one lookup per sector, not per ticker)
+        # ----------------------------------------------------
+        sector_values = np.array(
+            [gs.sector_sentiment.get(s, 0) for s in self.sector_names], dtype=np.float64
+        )
+        sector_force = sector_values[self.sector_idx] * 0.003
+
+        # ----------------------------------------------------
+        # GLOBAL NOISE + MOOD
+        # ----------------------------------------------------
+        noise_force = rng.normal("price", 0, 0.003 if is_open else 0.0004)
+        mood_force = gs.market_mood
+
+        # ----------------------------------------------------
+        # SEASONAL EFFECTS
+        # ----------------------------------------------------
+        season_trend = profile["trend_bias"]
+        sigma *= profile["volatility_mult"]
+
+        # ----------------------------------------------------
+        # FINAL PRICE MOVEMENT
+        # ----------------------------------------------------
+        change = (
+                fair_value_force +
+                momentum_force +
+                rng.normal("price", 0, sigma) +
+                order_force +
+                sector_force +
+                noise_force +
+                mood_force +
+                season_trend
+        )
+
+        new_price = np.maximum(0.01, current_price + change)
+        self.current_price = np.round(new_price, 2)
+
+        # ----------------------------------------------------
+        # BREAKOUT LOGIC (only rows off cooldown with history)
+        # ----------------------------------------------------
+        self.breakouts = []
+        ready = ((t - self.last_breakout_time) >= self.BREAKOUT_COOLDOWN) & \
+                (self.recent_count >= self.BREAKOUT_MIN_HISTORY)
+
+        if ready.any():
+            idx = np.flatnonzero(ready)
+            window = self.recent[idx]
+            recent_high = np.nanmax(window, axis=1)
+            recent_low = np.nanmin(window, axis=1)
+            last_close = current_price[idx]
+
+            up = last_close > recent_high * 1.01
+            down = ~up & (last_close < recent_low * 0.99)
+
+            if up.any():
+                hit = idx[up]
+                self.last_breakout_time[hit] = t
+                self.trend[hit] += current_price[hit] * 0.002
+                sigma[hit] *= 1.5
+
+            if down.any():
+                hit = idx[down]
+                self.last_breakout_time[hit] = t
+                self.trend[hit] -= current_price[hit] * 0.002
+                sigma[hit] *= 1.6
+
+            self._announce_breakouts(gs, idx[up], idx[down])
+
+        # store last_close into the recent ring
+        self.recent[:, self.recent_pos] = current_price
+        self.recent_pos = (self.recent_pos + 1) % self.RECENT_WINDOW
+        self.recent_count += 1
+
+        # ----------------------------------------------------
+        # VOLUME SIMULATION
+        # ----------------------------------------------------
+        self.volume = self._step_volume(gs, is_open, t, profile)
+
+        # ----------------------------------------------------
+        # OHLC CANDLE (5 micro prices + the unrounded close)
+        # ----------------------------------------------------
+        micro_sigma = sigma * 0.4
+        micro_price = current_price
+        high = None
+        low = None
+        opening = None
+
+        for _ in range(5):
+            micro_price = np.maximum(0.01, micro_price + rng.normal("micro", 0, micro_sigma))
+            if opening is None:
+                opening = micro_price
+                high = micro_price
+                low = micro_price
+            else:
+                high = np.maximum(high, micro_price)
+                low = np.minimum(low, micro_price)
+
+        self.candle_day = gs.game_day
+        self.candle_time = int(t)
+        self.candle_open = opening
+        self.candle_high = np.maximum(high, new_price)
+        self.candle_low = np.minimum(low, new_price)
+        self.candle_close = new_price
+        self.candle_volume = self.volume
+
+    def _step_volume(self, gs, is_open, t, profile):
+        rng = self.streams
+        base_vol = self.avg_volume
+        vol = self.volume.astype(np.float64)
+
+        # ---------- MARKET OPEN ----------
+        if is_open:
+
+            # 1) Mean reversion toward baseline
+            vol += (base_vol - vol) * rng.uniform("volume", 0.03, 0.07)
+
+            # 2) Small noise
+            vol += rng.integers("volume", self.open_noise_lo, self.open_noise_hi)
+
+            # 3) Intraday personality (picked once)
+            unset = np.isnan(self.intraday_bias)
+            if unset.any():
+                self.intraday_bias[unset] = rng.uniform("volume", 0.85, 1.25, unset)
+            vol *= self.intraday_bias
+
+            # 4) Intraday sine wave
+            if t < 5:
+                self.daily_volume_phase = rng.uniform("volume", -0.5, 0.5)
+            else:
+                unset = np.isnan(self.daily_volume_phase)
+                if unset.any():
+                    self.daily_volume_phase[unset] = rng.uniform("volume", -0.5, 0.5, unset)
+
+            t_ratio = (t - gs.market_open) / max(1, gs.market_close - gs.market_open)
+            vol *= 1.0 + 0.12 * np.sin(6.28 * (t_ratio + self.daily_volume_phase))
+
+            # 5) Opening / midday / closing regimes
+            if 570 <= t <= 620:  # open
+                vol *= rng.uniform("volume", 1.1, 1.4)
+            elif 720 <= t <= 810:  # lull
+                vol *= rng.uniform("volume", 0.85, 1.0)
+            elif 900 <= t <= 960:  # close ramp
+                vol *= rng.uniform("volume", 1.05, 1.35)
+
+            # 6) Occasional surge
+            surge = rng.random("volume") < 0.02
+            if surge.any():
+                vol[surge] *= rng.uniform("volume", 1.15, 1.6, surge)
+
+        # ---------- AFTER HOURS ----------
+        else:
+            target_ah = base_vol * rng.uniform("volume", 0.10, 0.18)
+            vol += (target_ah - vol) * rng.uniform("volume", 0.12, 0.18)
+            vol += rng.integers("volume", -self.ah_noise, self.ah_noise + 1)
+
+        # ---------- SEASON MULTIPLIER ----------
+        vol *= profile["volume_mult"]
+
+        # ----------------------------------------------------
+        # ADAPTIVE CAP GROWTH
+        # ----------------------------------------------------
+        cap = self.volume_cap
+        if is_open:
+            grow = vol > cap * 0.75
+            shrink = ~grow & (vol < cap * 0.35)
+            if grow.any():
+                cap[grow] *= rng.uniform("volume", 1.001, 1.004, grow)
+            if shrink.any():
+                cap[shrink] *= rng.uniform("volume", 0.996, 0.999, shrink)
+            cap *= rng.uniform("volume", 0.999, 1.0015)
+
+        self.volume_cap = np.maximum(base_vol * 5, np.minimum(cap, base_vol * 40))
+
+        # ----------------------------------------------------
+        # SOFT CLAMP + FINALIZE
+        # ----------------------------------------------------
+        over = vol > self.volume_cap
+        vol = np.where(over, self.volume_cap - (self.volume_cap - vol) * 0.35, vol)
+        vol = np.maximum(150, vol)
+
+        return vol.astype(np.int64)
+
+    def _announce_breakouts(self, gs, up_idx, down_idx):
+        news = getattr(gs, "news", None)
+
+        for i in up_idx.tolist():
+            self.breakouts.append((self.names[i], True))
+            if news is not None:
+                news.add_message(
+                    f"{self.names[i]} breaks resistance! Bullish breakout!",
+                    (0, 255, 0)
+                )
+
+        for i in down_idx.tolist():
+            self.breakouts.append((self.names[i], False))
+            if news is not None:
+                news.add_message(
+                    f"{self.names[i]} breaks support! Bearish breakdown!",
+                    (255, 80, 80)
+                )
+
+    # =====================================================================
+    # WRITE-BACK TO STOCK OBJECTS (GUI mode)
+    # =====================================================================
+    def sync_to_stocks(self, gs):
+        """
+        Copy the column state back onto gs.tickers_obj so the GUI, the
+        limit order matcher and autosave keep working unchanged.
+        Price/last/trend/volume go into gs.price_board as whole columns
+        when the board has the same ticker order.
+        Headless runs can skip this and read the arrays directly.
+        """
+        board = getattr(gs, "price_board", None)
+        on_board = board is not None and board.names == self.names
+        if on_board:
+            board.current_price[:] = self.current_price
+            board.last_price[:] = self.last_price
+            board.trend[:] = self.trend
+            board.volume[:] = self.volume
+
+        price = self.current_price.tolist()
+        last = self.last_price.tolist()
+        trend = self.trend.tolist()
+        volume = self.volume.tolist()
+        cap = self.volume_cap.tolist()
+        breakout_time = self.last_breakout_time.tolist()
+        bias = self.intraday_bias.tolist()
+        phase = self.daily_volume_phase.tolist()
+        delta = self.order_delta.tolist()
+
+        o = self.candle_open.tolist()
+        h = self.candle_high.tolist()
+        l = self.candle_low.tolist()
+        c = self.candle_close.tolist()
+
+        for i, name in enumerate(self.names):
+            stock = gs.tickers_obj[name]
+
+            if not on_board:
+                stock.current_price = price[i]
+                stock.last_price = last[i]
+                stock.trend = trend[i]
+                stock.volume = volume[i]
+            stock.volume_cap = cap[i]
+            stock.last_breakout_time = breakout_time[i]
+            stock.intraday_bias = None if bias[i] != bias[i] else bias[i]
+            stock.daily_volume_phase = None if phase[i] != phase[i] else phase[i]
+
+            rb = gs.recently_bought.setdefault(name, {"order_force_time_delta": 0})
+            rb["order_force_time_delta"] = delta[i]
+
+            stock.recent_prices.append(last[i])
+            if len(stock.recent_prices) > self.MAX_RECENT_PRICES:
+                stock.recent_prices.pop(0)
+
+            stock.volume_history.append(volume[i])
+            if len(stock.volume_history) > self.MAX_VOLUME_HISTORY:
+                stock.volume_history.pop(0)
+
+            stock.day_history.append(
+                self.candle_day, self.candle_time,
+                o[i], h[i], l[i], c[i], volume[i]
+            )
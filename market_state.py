@@ -0,0 +1,609 @@
+# ================================================
+# market_state.py (MARKET SIMULATION – NO PYGAME)
+# ================================================
+from stock import Stock
+from candle_manager import CandleManager
+from candle_store import CandleStore
+from portfolio_manager import PortfolioManager
+from order_book import OrderBook
+from cost_basis import Lots
+from market_engine import MarketEngine
+from persistence import SaveWorker
+from database import get_database, migrate
+from rng_streams import RandomStreams, new_seed
+from price_board import PriceBoard
+from snapshot import open_snapshot, restore_records, restore_runtime, save_state
+
+DB_PATH = "game.db"
+
+
+class NewsLog:
+    """
+    Stand-in for NewsManager when nothing is drawn.
+    Keeps the most recent messages so headless runs can still report them.
+    """
+    def __init__(self, max_messages=500):
+        self.max_messages = max_messages
+        self.messages = []
+
+    def add_message(self, text, color=(255, 255, 255)):
+        self.messages.append({"text": text, "color": color})
+        if len(self.messages) > self.max_messages:
+            self.messages.pop(0)
+
+    def clear_messages(self):
+        self.messages.clear()
+
+
+class MarketState:
+    """
+    Account, portfolio, tickers, clock and the tick engine.
+    Everything the simulation needs and nothing that needs a window,
+    a font or an audio device. main.GameState layers the UI on top.
+    """
+    def __init__(self, db_path=DB_PATH, snapshot=None, require_match=True):
+        """
+        snapshot = path of a binary snapshot (snapshot.py) to start from
+        instead of SQLite while the two agree; quick_save() and
+        final_save() keep it current. require_match=False starts from
+        the snapshot regardless (forking a scenario into db_path).
+        """
+        self.db_path = db_path
+        self.snapshot_path = snapshot
+
+        # =====================================================
+        # 1. BASE STRUCTS – overwritten by load_from_db()
+        # =====================================================
+        self.account = {
+            "money": 0,
+            "market_time": 0,
+            "market_open": 570,
+            "market_close": 960,
+            "market_day": 1,
+            "rng_seed": None
+        }
+        self.portfolio = {}
+        self.recently_bought = {}
+
+        # =====================================================
+        # 2. LOAD EVERYTHING FROM THE SNAPSHOT OR SQLITE
+        # =====================================================
+        migrate(self.db_path)
+        self.db = get_database(self.db_path)
+        self.candles = CandleManager(self.db_path)
+        snap = open_snapshot(snapshot, self.db.reader(), require_match)
+        if snap is not None:
+            restore_records(snap, self)
+        else:
+            self.load_from_db()
+        self.portfolio_mgr = PortfolioManager(self)
+
+        # Build Stock objects from loaded ticker dicts
+        self.tickers_obj = {
+            name: Stock(name, attrs)
+            for name, attrs in self.tickers.items()
+        }
+
+        # Price, trend, volume and ATH/ATL live on the shared board from
+        # here on; self.tickers keeps the load-time record (and candles)
+        self.price_board = PriceBoard(list(self.tickers_obj))
+        for stock in self.tickers_obj.values():
+            self.price_board.attach_stock(stock)
+        self.portfolio_mgr.revalue_all()
+
+        # Sync core time values from DB
+        self.game_day = self.account["market_day"]
+        self.market_time = self.account["market_time"]
+        self.market_open = self.account["market_open"]
+        self.market_close = self.account["market_close"]
+
+        # =====================================================
+        # 3. RUNTIME FIELDS
+        # =====================================================
+        # order flow tracking
+        for stock_name in self.tickers.keys():
+            self.recently_bought[stock_name] = {
+                "order_force_time_delta": 0
+            }
+
+        # breakout messages (GameState swaps in the scrolling NewsManager)
+        self.news = NewsLog()
+
+        # =====================================================
+        # 4. GAME CLOCK & MARKET SYSTEM
+        # =====================================================
+        self.game_season = 1
+        self.day_in_season = 1
+        self.days_per_season = 10
+        self.total_seasons = 4
+        self.total_days_in_year = self.days_per_season * self.total_seasons
+
+        self.minutes_per_tick = 5
+
+        self.is_market_open = False
+        self.market_events = []
+
+        # (Unused now, but harmless)
+        self.trend_decay_rate = 0.1
+
+        self.open_orders = OrderBook()
+
+        # =====================================================
+        # 5. SEASONAL MODELS
+        # =====================================================
+        self.season_profiles = {
+            1: {"trend_bias":  0.001,  "volatility_mult": 1.1, "volume_mult": 1.1},
+            2: {"trend_bias":  0.0,    "volatility_mult": 1.0, "volume_mult": 1.0},
+            3: {"trend_bias": -0.0015, "volatility_mult": 1.4, "volume_mult": 1.2},
+            4: {"trend_bias": -0.0005, "volatility_mult": 1.2, "volume_mult": 1.0},
+        }
+
+        # =====================================================
+        # 6. SECTOR SENTIMENT SYSTEM
+        # =====================================================
+        self.sector_sentiment = {}
+        for stock in self.tickers_obj.values():
+            self.sector_sentiment[stock.sector] = 0.0
+
+        self.market_mood = 0.0
+
+        # =====================================================
+        # 7. OPTIONAL VECTORIZED ENGINE
+        # =====================================================
+        self.market_engine = None
+
+        # seeded per-ticker RNG streams (Stock.apply_tick and MarketEngine);
+        # a snapshot brings its own, mid-stream
+        if snap is None:
+            if self.account.get("rng_seed") is None:
+                self.account["rng_seed"] = new_seed()
+            self.reseed(self.account["rng_seed"])
+
+        # =====================================================
+        # 8. SAVE TRACKING (what autosave still has to write)
+        # =====================================================
+        self.dirty_tickers = set()
+        self.dirty_portfolio = set()
+
+        # background writer; None means autosave writes inline
+        self.save_worker = None
+
+        # =====================================================
+        # 9. SNAPSHOT RUNTIME (clock, order flow, RNG, open orders)
+        # =====================================================
+        if snap is not None:
+            restore_runtime(snap, self, matched=require_match)
+            snap.close()
+            self.portfolio_mgr.revalue_all()
+            print(f"Restored from snapshot {snapshot}")
+
+    def reseed(self, seed):
+        """
+        Restart the RNG streams from `seed` (saved as the account's
+        master seed). The clock at this point keys the streams, so a
+        reloaded save continues with fresh numbers instead of replaying.
+        """
+        self.account["rng_seed"] = seed
+        epoch = self.game_day * 1440 + self.market_time
+        self.rng_streams = RandomStreams(seed, self.tickers_obj.keys(), epoch)
+        if self.market_engine is not None:
+            self.market_engine.streams = self.rng_streams
+
+    def enable_market_engine(self, seed=None):
+        """
+        Switch ticking over to the batched MarketEngine.
+        Stock objects stay the source for the GUI; the engine writes back
+        into them after every step. Both draw from the same streams, so a
+        seeded run gives the same prices either way.
+        """
+        if seed is not None:
+            self.reseed(seed)
+        self.market_engine = MarketEngine.from_stocks(
+            self.tickers_obj, self.recently_bought, streams=self.rng_streams
+        )
+
+    def apply_tick_price(self):
+        # ============================
+        # 1. ADVANCE MARKET CLOCK
+        # ============================
+        self._advance_clock()
+
+        # ============================
+        # 2. APPLY TICK TO EACH STOCK
+        # ============================
+        # readers in other processes skip the board while this is odd
+        self.price_board.begin_write()
+
+        if self.market_engine is not None:
+            # whole universe in one batch, written straight into the board
+            self.market_engine.step(self)
+            self.market_engine.sync_to_stocks(self)
+
+        self.dirty_tickers.update(self.tickers_obj)
+
+        for ticker, stock in self.tickers_obj.items():
+            # let the Stock object simulate itself (writes its board row)
+            if self.market_engine is None:
+                stock.apply_tick(self)
+
+            # ============================
+            # 3. CANDLE FOR THIS TICK
+            # ============================
+            self.candles.add_price(
+                self.tickers[ticker],
+                day=self.game_day,
+                time=self.market_time,
+                price=stock.current_price,
+                volume=stock.volume
+            )
+        self.price_board.end_write()
+        self.portfolio_mgr.reprice()
+        self.process_limit_orders()
+
+    def _advance_clock(self):
+        self.market_time += self.minutes_per_tick
+
+        # rollover into next day
+        while self.market_time >= 1440:
+            self.market_time -= 1440
+            self._advance_game_day()
+
+        self.is_market_open = self.market_open <= self.market_time <= self.market_close
+
+    def _advance_game_day(self):
+        # Move to next day
+        self.game_day += 1
+        self.day_in_season += 1
+
+        # Season rollover
+        if self.day_in_season > self.days_per_season:
+            self.game_season += 1
+            self.day_in_season = 1
+
+        # Year rollover
+        if self.game_season > self.total_seasons:
+            self.game_season = 1
+            self.game_day = 1
+
+    def process_limit_orders(self):
+
+        # PREVENT EXECUTION AFTER HOURS
+        if not self.is_market_open:
+            return
+
+        # only orders the new prices cross come off the book,
+        # oldest first (same fill order as placing them)
+        book = self.open_orders
+        for order in book.pop_crossing(self.price_board.price):
+            ticker = order["ticker"]
+            qty = order["qty"]
+            price = self.price_board.price(ticker)
+
+            # BUY LIMIT FILL
+            if order["side"] == "buy":
+                cost = qty * price
+                if self.account["money"] >= cost:
+                    self.account["money"] -= cost
+                    self.portfolio_mgr.buy_stock(ticker, qty)
+                    print(f"BUY LIMIT FILLED: {qty} {ticker} @ {price:.2f}")
+                    book.filled(order)
+                    continue
+
+            # SELL LIMIT FILL
+            else:
+                shares = self.portfolio.get(ticker, {}).get("shares", 0)
+                if shares >= qty:
+                    self.portfolio_mgr.sell_stock(ticker, qty)
+                    print(f"SELL LIMIT FILLED: {qty} {ticker} @ {price:.2f}")
+                    book.filled(order)
+                    continue
+
+            # STILL OPEN — KEEP IT QUEUED
+            book.requeue(order)
+
+    def market_is_open(self):
+        return self.market_open <= self.market_time <= self.market_close
+
+    def load_from_db(self):
+        """
+        Load account, portfolio and tickers from SQLite.
+        Produces clean dicts that Stock() will wrap into objects.
+        Candle history is paged in per ticker by ensure_history().
+        """
+
+        cur = self.db.reader().cursor()
+
+        # -------------------------------------------------
+        # 1. ACCOUNT
+        # -------------------------------------------------
+        row = cur.execute("""
+                          SELECT money, market_time, market_open, market_close, market_day, rng_seed
+                          FROM account
+                          WHERE id = 1
+                          """).fetchone()
+
+        if row:
+            self.account["money"] = row[0]
+            self.account["market_time"] = row[1]
+            self.account["market_open"] = row[2]
+            self.account["market_close"] = row[3]
+            self.account["market_day"] = row[4]
+            self.account["rng_seed"] = row[5]
+
+        # -------------------------------------------------
+        # 2. TICKERS (persistent DB fields)
+        # -------------------------------------------------
+        rows = cur.execute("""
+                           SELECT ticker,
+                                  name,
+                                  sector,
+                                  current_price,
+                                  last_price,
+                                  base_price,
+                                  volatility,
+                                  gravity,
+                                  trend,
+                                  ath,
+                                  atl,
+                                  buy_qty,
+                                  volume,
+                                  avg_volume
+                           FROM tickers
+                           """).fetchall()
+
+        self.tickers = {}
+
+        for row in rows:
+            t = row[0]
+
+            # Build initial ticker dict
+            self.tickers[t] = {
+                "ticker": t,
+                "name": row[1],
+                "sector": row[2],
+                "current_price": row[3],
+                "last_price": row[4],
+                "base_price": row[5],
+                "volatility": row[6],
+                "gravity": row[7],
+                "trend": row[8],
+                "ath": row[9],
+                "atl": row[10],
+                "buy_qty": row[11],
+                "volume": row[12],
+                "avg_volume": row[13],
+
+                # Runtime-only fields restored with defaults
+                "volume_cap": row[13] * 12,
+                "recent_prices": [],
+                "volume_history": [],
+                "day_history": CandleStore(),
+                "ohlc_buffer": [],
+                "last_breakout_time": -9999
+            }
+
+        # -------------------------------------------------
+        # 3. PORTFOLIO
+        # -------------------------------------------------
+        rows = cur.execute("""
+                           SELECT ticker, shares, lots, sell_qty
+                           FROM portfolio
+                           """).fetchall()
+
+        for ticker, shares, lots, sell_qty in rows:
+            self.portfolio[ticker] = {
+                "shares": shares,
+                "lots": Lots.from_json(lots),
+                "sell_qty": sell_qty
+            }
+
+    def ensure_history(self, ticker):
+        """Make sure `ticker` has its candle history in RAM (chart/info panel)."""
+        self.candles.ensure_loaded(ticker, self.tickers_obj, current_day=self.game_day)
+
+    def autosave(self):
+        """
+        Save only what changed since the last save: the account row,
+        dirty portfolio rows, dirty tickers and newly closed candles,
+        all in one transaction. If the save worker is running the
+        delta is handed off and written on that thread.
+        """
+        delta = self.collect_save_delta()
+        if self.save_worker is not None:
+            self.save_worker.submit(delta)
+        else:
+            self.write_save_delta(delta)
+
+    def start_save_worker(self):
+        """Move autosave SQLite writes onto a background thread."""
+        if self.save_worker is None:
+            self.save_worker = SaveWorker(self.write_save_delta)
+            self.save_worker.start()
+
+    def final_save(self):
+        """
+        Save on quit. With a worker running this blocks until every
+        queued delta (plus this last one) is on disk. Closing the
+        connections afterwards checkpoints the WAL into game.db.
+        Raises SaveError (or the write's own error) if something could
+        not be saved; the connections and the shared-memory price board
+        are released either way.
+        """
+        try:
+            if self.save_worker is None:
+                self.autosave()
+            else:
+                worker, self.save_worker = self.save_worker, None
+                worker.stop(self.collect_save_delta())
+
+            if self.snapshot_path is not None:
+                self.save_snapshot()
+        finally:
+            try:
+                self.db.close()
+            finally:
+                self.price_board.close()
+
+    def save_snapshot(self, path=None):
+        """Write the whole state to a binary snapshot (default: snapshot_path)."""
+        save_state(self, path or self.snapshot_path)
+
+    def quick_save(self):
+        """
+        Autosave, then snapshot the state it just saved, so the next
+        start can come up from the snapshot. The snapshot records the
+        account row it goes with; with the worker running, the row may
+        still be in flight, which is fine: startup compares the two.
+        """
+        self.autosave()
+        if self.snapshot_path is not None:
+            self.save_snapshot()
+
+    def mark_portfolio_dirty(self, ticker):
+        self.dirty_portfolio.add(ticker)
+
+    def collect_save_delta(self):
+        """
+        Gather the rows autosave needs to write and clear the dirty sets.
+        Returns plain tuples only, so the result no longer references
+        live game objects.
+        """
+
+        # ---------------------------------
+        # 1. Sync account with current runtime state
+        # ---------------------------------
+        self.account["market_time"] = self.market_time
+        self.account["market_open"] = self.market_open
+        self.account["market_close"] = self.market_close
+        self.account["market_day"] = self.game_day
+
+        account_row = (
+            self.account["money"],
+            self.account["market_time"],
+            self.account["market_open"],
+            self.account["market_close"],
+            self.account["market_day"],
+            self.account["rng_seed"]
+        )
+
+        # ---------------------------------
+        # 2. DIRTY PORTFOLIO ROWS
+        # ---------------------------------
+        portfolio_rows = []
+        for ticker in self.dirty_portfolio:
+            info = self.portfolio_mgr.portfolio.get(ticker)
+            if info is None:
+                continue
+            portfolio_rows.append((
+                info["shares"],
+                info["lots"].to_json(),
+                info.get("sell_qty", 0),
+                ticker
+            ))
+        self.dirty_portfolio.clear()
+
+        # ---------------------------------
+        # 3. DIRTY TICKERS (from Stock objects)
+        # ---------------------------------
+        ticker_rows = []
+        for name in self.dirty_tickers:
+            stock = self.tickers_obj[name]
+            ticker_rows.append((
+                stock.current_price,
+                stock.last_price,
+                stock.base_price,
+                stock.volatility,
+                stock.gravity,
+                stock.trend,
+                stock.ath,
+                stock.atl,
+                stock.buy_qty,
+                stock.volume,
+                stock.avg_volume,
+                name
+            ))
+        self.dirty_tickers.clear()
+
+        # ---------------------------------
+        # 4. CANDLES CLOSED SINCE LAST SAVE
+        # ---------------------------------
+        candle_rows, candle_marks = self.candles.new_candle_rows(self.tickers_obj)
+
+        return {
+            "account": account_row,
+            "portfolio": portfolio_rows,
+            "tickers": ticker_rows,
+            "candles": candle_rows,
+            "candle_marks": candle_marks,
+        }
+
+    def write_save_delta(self, delta):
+        """One transaction on the shared writer connection (any thread)."""
+        with self.db.write() as conn:
+            conn.execute("""
+                         UPDATE account
+                         SET money=?,
+                             market_time=?,
+                             market_open=?,
+                             market_close=?,
+                             market_day=?,
+                             rng_seed=?
+                         WHERE id = 1
+                         """, delta["account"])
+
+            if delta["portfolio"]:
+                conn.executemany("""
+                                 UPDATE portfolio
+                                 SET shares=?,
+                                     lots=?,
+                                     sell_qty=?
+                                 WHERE ticker = ?
+                                 """, delta["portfolio"])
+
+            if delta["tickers"]:
+                conn.executemany("""
+                                 UPDATE tickers
+                                 SET current_price=?,
+                                     last_price=?,
+                                     base_price=?,
+                                     volatility=?,
+                                     gravity=?,
+                                     trend=?,
+                                     ath=?,
+                                     atl=?,
+                                     buy_qty=?,
+                                     volume=?,
+                                     avg_volume=?
+                                 WHERE ticker = ?
+                                 """, delta["tickers"])
+
+            if delta["candles"]:
+                self.candles.insert_rows(conn, delta["candles"])
+
+        # only now may the frame thread trim these candles from RAM
+        self.candles.mark_committed(delta["candle_marks"])
+
+    def simulate_days(self, days_to_simulate):
+        # apply_tick_price rolls the day over itself at midnight,
+        # so one simulated day is one full turn of the market clock
+        ticks_per_day = 1440 // self.minutes_per_tick
+
+        for _ in range(days_to_simulate):
+            for _ in range(ticks_per_day):
+                self.apply_tick_price()
+
+        print("Finished sim:", days_to_simulate, "days")
+
+    def format_time(self, minutes):
+        h = minutes // 60
+        m = minutes % 60
+
+        suffix = "AM"
+        if h >= 12:
+            suffix = "PM"
+        if h == 0:
+            h = 12
+        elif h > 12:
+            h -= 12
+
+        return f"{h}:{m:02d} {suffix}"
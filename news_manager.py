@@ -1,6 +1,6 @@
 import pygame
 
-import pygame
+from text_cache import render_text
 
 class NewsManager:
     def __init__(self, font):
@@ -61,12 +61,12 @@ class NewsManager:
 
         # Separator between messages
         separator_text = "   |   "
-        separator_surface = self.font.render(separator_text, True, (230, 230, 230))
+        separator_surface = render_text(self.font, separator_text, True, (230, 230, 230))
 
         # Pre-render all message surfaces
         rendered_segments = []
         for message in self.messages:
-            text_surface = self.font.render(message["text"], True, message["color"])
+            text_surface = render_text(self.font, message["text"], True, message["color"])
             rendered_segments.append((text_surface, message))
             rendered_segments.append((separator_surface, None))
 
@@ -0,0 +1,144 @@
+# ================================================
+# order_book.py (PRICE-INDEXED LIMIT ORDER BOOK)
+# ================================================
+#
+#   Resting limit orders per ticker: buys in a max-heap on limit price,
+#   sells in a min-heap. A tick only looks at the top of each heap, so
+#   it touches the orders the new price crosses and nothing else.
+#
+#   Orders stay plain dicts (ticker, side, qty, limit_price, id) and
+#   iterating the book yields them in the order they were placed, which
+#   is what the pending-orders panel shows. cancel(order_id) drops the
+#   order at once; its heap entry is skipped when it reaches the top.
+#
+import heapq
+
+
+class OrderBook:
+    def __init__(self):
+        self.orders = {}        # id -> order, in placement order
+        self.buys = {}          # ticker -> [(-limit, id)]
+        self.sells = {}         # ticker -> [(limit, id)]
+        self.stale = 0          # cancelled entries still in the heaps
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __iter__(self):
+        return iter(list(self.orders.values()))
+
+    def __bool__(self):
+        return bool(self.orders)
+
+    @classmethod
+    def restore(cls, orders, next_id):
+        """Rebuild a book from saved orders (placement order) and the next id."""
+        book = cls()
+        for order in orders:
+            book.orders[order["id"]] = order
+            book._push(order)
+        book.next_id = next_id
+        return book
+
+    # ----------------------------------------------------
+    # PLACE / CANCEL
+    # ----------------------------------------------------
+    def place(self, ticker, side, qty, limit_price):
+        """Queue a limit order; returns it (with its new "id")."""
+        if side not in ("buy", "sell"):
+            raise ValueError(f"unknown order side: {side}")
+
+        order = {
+            "id": self.next_id,
+            "ticker": ticker,
+            "side": side,
+            "qty": qty,
+            "limit_price": limit_price,
+        }
+        self.next_id += 1
+        self.orders[order["id"]] = order
+        self._push(order)
+        return order
+
+    def cancel(self, order_id):
+        """Remove a resting order; returns it, or None if it is gone."""
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self.stale += 1
+            if self.stale > len(self.orders) + 64:
+                self._compact()
+        return order
+
+    def get(self, order_id):
+        return self.orders.get(order_id)
+
+    def _push(self, order):
+        if order["side"] == "buy":
+            heap = self.buys.setdefault(order["ticker"], [])
+            heapq.heappush(heap, (-order["limit_price"], order["id"]))
+        else:
+            heap = self.sells.setdefault(order["ticker"], [])
+            heapq.heappush(heap, (order["limit_price"], order["id"]))
+
+    def _compact(self):
+        # rebuild the heaps from the live orders (drops every stale entry)
+        self.buys = self._heaps("buy")
+        self.sells = self._heaps("sell")
+        self.stale = 0
+
+    def _heaps(self, side):
+        sign = -1.0 if side == "buy" else 1.0
+        heaps = {}
+        for order in self.orders.values():
+            if order["side"] == side:
+                heaps.setdefault(order["ticker"], []).append(
+                    (sign * order["limit_price"], order["id"]))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+        return heaps
+
+    # ----------------------------------------------------
+    # MATCHING
+    # ----------------------------------------------------
+    def pop_crossing(self, price_of):
+        """
+        Take every order the current prices cross off the heaps
+        (buy limit >= price, sell limit <= price) and return them in
+        placement order. price_of(ticker) -> current price.
+
+        Each returned order must be handed back through filled() or
+        requeue(); until then it still shows in the book.
+        """
+        crossed = []
+        for heaps, sign in ((self.buys, -1.0), (self.sells, 1.0)):
+            empty = []
+            for ticker, heap in heaps.items():
+                price = price_of(ticker)
+                while heap:
+                    key, order_id = heap[0]
+                    if order_id not in self.orders:
+                        heapq.heappop(heap)
+                        self.stale -= 1
+                        continue
+                    # buys: -limit <= -price, sells: limit <= price
+                    if key > sign * price:
+                        break
+                    heapq.heappop(heap)
+                    crossed.append(self.orders[order_id])
+                if not heap:
+                    empty.append(ticker)
+            for ticker in empty:
+                del heaps[ticker]
+
+        crossed.sort(key=lambda order: order["id"])
+        return crossed
+
+    def filled(self, order):
+        """Drop an order returned by pop_crossing()."""
+        self.orders.pop(order["id"], None)
+
+    def requeue(self, order):
+        """Put back an order returned by pop_crossing() that didn't fill."""
+        if order["id"] in self.orders:
+            self._push(order)
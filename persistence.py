@@ -0,0 +1,138 @@
+# ================================================
+# persistence.py (BACKGROUND SAVE WORKER)
+# ================================================
+#
+#   The frame thread builds a save delta (plain tuples, see
+#   MarketState.collect_save_delta) and hands it off here;
+#   all SQLite work happens on the worker thread.
+#
+import queue
+import threading
+import time
+
+
+def merge_save_deltas(older, newer):
+    """
+    Fold two save deltas into one.
+    Account/portfolio/ticker rows are last-write-wins (the key is the
+    last tuple field); candle rows are append-only so they concatenate
+    and their commit marks only move forward.
+    """
+    portfolio = {row[-1]: row for row in older["portfolio"]}
+    portfolio.update((row[-1], row) for row in newer["portfolio"])
+
+    tickers = {row[-1]: row for row in older["tickers"]}
+    tickers.update((row[-1], row) for row in newer["tickers"])
+
+    return {
+        "account": newer["account"],
+        "portfolio": list(portfolio.values()),
+        "tickers": list(tickers.values()),
+        "candles": older["candles"] + newer["candles"],
+        "candle_marks": {**older["candle_marks"], **newer["candle_marks"]},
+    }
+
+
+class SaveError(RuntimeError):
+    """The worker stopped with a save delta it could not write."""
+
+
+class SaveWorker(threading.Thread):
+    """
+    Writes save deltas on its own thread.
+
+    submit() never blocks: if the queue is full the delta is merged into
+    a held-back backlog and retried on the next submit. The worker also
+    drains everything queued before writing, so saves that back up turn
+    into a single transaction. A delta whose write fails is kept and
+    merged into the next one, so its rows are retried rather than lost;
+    stop() raises SaveError if one is still unwritten at the end.
+    """
+    _STOP = object()
+
+    def __init__(self, write_fn, max_pending=4):
+        super().__init__(name="SaveWorker", daemon=True)
+        self.write_fn = write_fn
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.backlog = None
+        self.failed = None          # delta whose last write raised
+
+        self.saves_written = 0
+        self.saves_coalesced = 0
+        self.last_save_time = 0.0
+        self.last_error = None
+
+    # ----------------------------------------------------
+    # FRAME THREAD
+    # ----------------------------------------------------
+    def submit(self, delta):
+        if self.backlog is not None:
+            delta = merge_save_deltas(self.backlog, delta)
+            self.backlog = None
+
+        try:
+            self.queue.put_nowait(delta)
+        except queue.Full:
+            self.backlog = delta
+            self.saves_coalesced += 1
+
+    def stop(self, final_delta=None, timeout=None):
+        """Queue the last delta, write everything still pending and join."""
+        if final_delta is not None:
+            self.submit(final_delta)
+
+        if self.backlog is not None:
+            self.queue.put(self.backlog)
+            self.backlog = None
+
+        self.queue.put(self._STOP)
+        self.join(timeout)
+
+        if self.failed is not None:
+            raise SaveError(f"autosave could not be written: {self.last_error}")
+
+    # ----------------------------------------------------
+    # WORKER THREAD
+    # ----------------------------------------------------
+    def run(self):
+        stopping = False
+
+        while not stopping:
+            delta = self.queue.get()
+            if delta is self._STOP:
+                break
+
+            # coalesce whatever else backed up behind it
+            while True:
+                try:
+                    nxt = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is self._STOP:
+                    stopping = True
+                    break
+                delta = merge_save_deltas(delta, nxt)
+                self.saves_coalesced += 1
+
+            self._write(delta)
+
+        # a failed delta nothing else came along to carry gets one last try
+        if self.failed is not None:
+            self._write(None)
+
+    def _write(self, delta):
+        if self.failed is not None:
+            delta = self.failed if delta is None else merge_save_deltas(self.failed, delta)
+            self.failed = None
+
+        t0 = time.perf_counter()
+        try:
+            self.write_fn(delta)
+        except Exception as e:
+            # keep the thread alive and the rows: they go out with the next delta
+            self.failed = delta
+            self.last_error = e
+            print("Autosave failed (will retry):", e)
+            return
+        self.last_save_time = time.perf_counter() - t0
+        self.saves_written += 1
@@ -1,4 +1,16 @@
+from cost_basis import Lots
+
+
+def new_position():
+    """Empty portfolio entry for a ticker."""
+    return {"shares": 0, "lots": Lots(), "sell_qty": 0}
+
+
 class PortfolioManager:
+    # which purchase lots a sale uses up: "lifo" (newest first, as the
+    # old per-share list did) or "fifo"
+    LOT_METHOD = "lifo"
+
     def __init__(self, state):
         """
         Holds all portfolio data & logic.
@@ -10,15 +22,74 @@ class PortfolioManager:
         self.state = state
         self.portfolio = state.portfolio  # direct reference
 
+        # valuation cache: one row per held ticker (shares > 0), in
+        # portfolio order; kept current by reprice() on every tick and
+        # revalue_position() on every buy/sell
+        self.positions = {}
+        self.held_rows = []
+        self.total_value = 0.0
+        self.total_cost = 0.0
+        self.total_pnl = 0.0
+
 
     # --------------- VALUE CALCULATION ---------------
     def get_portfolio_value(self):
-        total = 0
+        return self.total_value
+
+    def revalue_all(self):
+        """Rebuild the valuation cache (after load, or a position opened/closed)."""
+        board = self.state.price_board
+        self.positions = {}
         for ticker, entry in self.portfolio.items():
-            shares = entry["shares"]
-            price = self.state.tickers_obj[ticker].current_price
-            total += price * shares
-        return total
+            if entry["shares"] > 0:
+                self.positions[ticker] = {"current": None}
+                self._value_row(ticker, board.price(ticker))
+        self.held_rows = [board.index[t] for t in self.positions]
+        self._sum_totals()
+
+    def reprice(self):
+        """Pick up this tick's prices for held tickers only."""
+        if not self.positions:
+            return
+        prices = self.state.price_board.current_price[self.held_rows].tolist()
+        changed = False
+        for ticker, price in zip(self.positions, prices):
+            if price != self.positions[ticker]["current"]:
+                self._value_row(ticker, price)
+                changed = True
+        if changed:
+            self._sum_totals()
+
+    def revalue_position(self, ticker):
+        """A position changed (buy, sell or limit fill)."""
+        held = self.portfolio.get(ticker, {}).get("shares", 0) > 0
+        if held != (ticker in self.positions):
+            self.revalue_all()
+            return
+        if held:
+            self._value_row(ticker, self.state.price_board.price(ticker))
+            self._sum_totals()
+
+    def _value_row(self, ticker, price):
+        entry = self.portfolio[ticker]
+        shares = entry["shares"]
+        avg_price = entry["lots"].avg_price
+        value = price * shares
+        cost_basis = avg_price * shares
+        self.positions[ticker].update(
+            shares=shares,
+            avg_price=avg_price,
+            current=price,
+            value=value,
+            cost_basis=cost_basis,
+            pnl=value - cost_basis,
+        )
+
+    def _sum_totals(self):
+        rows = self.positions.values()
+        self.total_value = float(sum(row["value"] for row in rows))
+        self.total_cost = float(sum(row["cost_basis"] for row in rows))
+        self.total_pnl = self.total_value - self.total_cost
 
     # --------------- BUY LOGIC ---------------
     def buy_stock(self, stock_name, amount=1):
@@ -35,17 +106,23 @@ class PortfolioManager:
 
         # ensure exists
         if stock_name not in self.portfolio:
-            self.portfolio[stock_name] = {"shares": 0, "bought_at": [], "sell_qty": 0}
+            self.portfolio[stock_name] = new_position()
 
         # add shares
         self.portfolio[stock_name]["shares"] += amount
-        for _ in range(amount):
-            self.portfolio[stock_name]["bought_at"].append(price)
+        self.portfolio[stock_name]["lots"].add(amount, price)
+        self.revalue_position(stock_name)
 
         # bump recently_bought
         rb = self.state.recently_bought.setdefault(stock_name, {"order_force_time_delta": 0})
         rb["order_force_time_delta"] += amount
 
+        engine = getattr(self.state, "market_engine", None)
+        if engine is not None:
+            engine.add_order_force(stock_name, amount)
+
+        self.state.mark_portfolio_dirty(stock_name)
+
         print(f"Bought {amount} share(s) of {stock_name} @ {price:.2f}")
         return True
 
@@ -67,9 +144,10 @@ class PortfolioManager:
         self.state.account["money"] += price * amount
 
         # remove from cost basis
-        for _ in range(amount):
-            if self.portfolio[stock_name]["bought_at"]:
-                self.portfolio[stock_name]["bought_at"].pop()
+        self.portfolio[stock_name]["lots"].remove(amount, self.LOT_METHOD)
+        self.revalue_position(stock_name)
+
+        self.state.mark_portfolio_dirty(stock_name)
 
         print(f"Sold {amount} share(s) of {stock_name} @ {price:.2f}")
         return True
@@ -0,0 +1,214 @@
+# ================================================
+# price_board.py (SHARED-MEMORY PRICE BOARD)
+# ================================================
+#
+#   One row per ticker (price, last price, trend, volume, ATH/ATL) in a
+#   numpy structured array that lives in multiprocessing.shared_memory.
+#   It is the only copy of those fields: Stock reads and writes its row
+#   through BoardField, MarketEngine writes whole columns, and the GUI,
+#   PortfolioManager and limit orders read it directly. Other processes
+#   can attach by name and read it live (see PriceBoard.attach).
+#
+#   Writers bump a sequence number before and after each tick (odd =
+#   write in progress), so readers in other processes can take a
+#   consistent snapshot() without locks.
+#
+import atexit
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# smallest ticker field; a board widens it (in 8-byte steps) to fit
+# its longest name, so names are never cut short
+NAME_BYTES = 16
+
+
+def row_dtype(name_bytes=NAME_BYTES):
+    """Numeric fields first (fixed slots), the ticker name last."""
+    return np.dtype([
+        ("current_price", np.float64),
+        ("last_price", np.float64),
+        ("trend", np.float64),
+        ("volume", np.int64),
+        ("ath", np.float64),
+        ("atl", np.float64),
+        ("ticker", f"S{name_bytes}"),
+    ])
+
+
+ROW_DTYPE = row_dtype()
+
+FIELDS = ROW_DTYPE.names[:-1]
+
+# every field is 8 bytes wide and sits at the same offset whatever the
+# name width, so a field is one fixed 8-byte slot in a row of
+# board.row_slots; BoardField reads through flat memoryviews
+SLOT = {f: ROW_DTYPE.fields[f][1] // 8 for f in FIELDS}
+
+# header: magic, row count, sequence number, ticker field width
+_MAGIC = 0x5452414445424F41    # "TRADEBOA"
+_HEADER = 4
+_HEADER_BYTES = _HEADER * 8
+
+
+class BoardField:
+    """
+    Stock attribute stored in the price board once the Stock is attached
+    (falls back to the instance dict before that). Values come back as
+    plain Python floats/ints.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = SLOT[name]
+        self.view = "_board_i64" if ROW_DTYPE.fields[name][0].kind == "i" else "_board_f64"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        d = obj.__dict__
+        base = d.get("_board_base")
+        if base is None:
+            return d[self.name]
+        return d[self.view][base + self.slot]
+
+    def __set__(self, obj, value):
+        d = obj.__dict__
+        base = d.get("_board_base")
+        if base is None:
+            d[self.name] = value
+        else:
+            d[self.view][base + self.slot] = value
+
+
+class PriceBoard:
+    def __init__(self, names, name=None, _shm=None):
+        """
+        Create a board for `names` (the owner), or wrap an existing block
+        via attach(). The owner unlinks the block at exit.
+        """
+        if _shm is None:
+            n = len(names)
+            encoded = [t.encode() for t in names]
+            longest = max(map(len, encoded), default=0)
+            name_bytes = max(NAME_BYTES, (longest + 7) // 8 * 8)
+            size = _HEADER_BYTES + max(n, 1) * row_dtype(name_bytes).itemsize
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = _shm
+            self.owner = False
+
+        self.header = np.ndarray((_HEADER,), dtype=np.int64, buffer=self.shm.buf)
+        if self.owner:
+            self.header[:] = (_MAGIC, len(names), 0, name_bytes)
+        elif self.header[0] != _MAGIC:
+            raise ValueError(f"{self.shm.name} is not a price board")
+
+        n = int(self.header[1])
+        self.dtype = row_dtype(int(self.header[3]))
+        self.row_slots = self.dtype.itemsize // 8
+        self.rows = np.ndarray((n,), dtype=self.dtype, buffer=self.shm.buf,
+                               offset=_HEADER_BYTES)
+        if self.owner:
+            self.rows["ticker"] = encoded
+
+        self.names = [t.decode() for t in self.rows["ticker"].tolist()]
+        self.index = {t: i for i, t in enumerate(self.names)}
+
+        # zero-copy column views: board.columns["current_price"][i]
+        self.columns = {f: self.rows[f] for f in FIELDS}
+
+        # the same bytes as flat 8-byte slots (for BoardField)
+        self._buf = self.shm.buf[_HEADER_BYTES:_HEADER_BYTES + n * self.dtype.itemsize]
+        self.f64 = self._buf.cast("d")
+        self.i64 = self._buf.cast("q")
+
+        if self.owner:
+            atexit.register(self.close)
+
+    @classmethod
+    def attach(cls, name):
+        """Open a board another process created (read it with snapshot())."""
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # otherwise this process's resource tracker would unlink the
+            # owner's board when we exit
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(None, _shm=shm)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getattr__(self, field):
+        # board.current_price -> column view
+        columns = self.__dict__.get("columns")
+        if columns is not None and field in columns:
+            return columns[field]
+        raise AttributeError(field)
+
+    # ----------------------------------------------------
+    # WRITER SIDE
+    # ----------------------------------------------------
+    def attach_stock(self, stock):
+        """Move a Stock's price fields onto its board row."""
+        i = self.index[stock.ticker]
+        values = {f: stock.__dict__.pop(f) for f in FIELDS if f in stock.__dict__}
+        stock._board = self
+        stock._board_row = i
+        stock._board_f64 = self.f64
+        stock._board_i64 = self.i64
+        stock._board_base = i * self.row_slots
+        for f, value in values.items():
+            self.columns[f][i] = value
+
+    def begin_write(self):
+        self.header[2] += 1
+
+    def end_write(self):
+        self.header[2] += 1
+
+    # ----------------------------------------------------
+    # READER SIDE
+    # ----------------------------------------------------
+    def price(self, ticker):
+        return self.columns["current_price"][self.index[ticker]].item()
+
+    def snapshot(self, retries=100):
+        """Copy of all rows taken between two writes (for other processes)."""
+        for _ in range(retries):
+            before = int(self.header[2])
+            if before % 2 == 0:
+                rows = self.rows.copy()
+                if int(self.header[2]) == before:
+                    return rows
+        raise RuntimeError("price board kept changing during snapshot")
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.columns = {}
+        self.rows = None
+        self.header = None
+        for view in (self.f64, self.i64, self._buf):
+            try:
+                view.release()
+            except BufferError:
+                pass
+        try:
+            self.shm.close()
+        except BufferError:
+            pass    # a caller still holds a column view; unlink anyway
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            atexit.unregister(self.close)
+        self.shm = None
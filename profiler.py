@@ -0,0 +1,193 @@
+# ================================================
+# profiler.py (FRAME-TIME SPANS + OVERLAY)
+# ================================================
+#
+#   Named timing spans around each part of a frame. A span's total for
+#   one frame goes into a rolling window (the last WINDOW frames it ran
+#   in) that p50/p95/p99 are read from. Spans are inclusive, so an outer
+#   span ("chart_transition") also counts the ones it calls
+#   ("render_info_panel"); "frame" is the wall time between two
+#   begin_frame() calls, frame-limiter wait included.
+#
+#   instrument() wraps methods on one instance, so the code being timed
+#   doesn't change. main.py binds F3 to the overlay and F4 to
+#   export_csv()/export_json().
+#
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+
+class FrameProfiler:
+    WINDOW = 600            # frames kept per span (~5 s at 120 FPS)
+    REFRESH_FRAMES = 30     # the overlay table is rebuilt this often
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.samples = {}                       # span -> deque of ms
+        self.frames = deque(maxlen=window)      # (frame number, {span: ms})
+        self.frame_number = 0
+
+        self.current = {}
+        self.frame_start = None
+        self.open_spans = {}
+
+        self.overlay_visible = False
+        self._overlay = None
+        self._overlay_age = 0
+
+    # ----------------------------------------------------
+    # RECORDING
+    # ----------------------------------------------------
+    def begin_frame(self):
+        """Start a frame (closes the previous one if still open)."""
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self._close_frame(now)
+        self.current = {}
+        self.frame_start = now
+
+    def end_frame(self):
+        if self.frame_start is not None:
+            self._close_frame(time.perf_counter())
+
+    def _close_frame(self, now):
+        self.current["frame"] = (now - self.frame_start) * 1000.0
+        for name, ms in self.current.items():
+            q = self.samples.get(name)
+            if q is None:
+                q = self.samples[name] = deque(maxlen=self.window)
+            q.append(ms)
+        self.frames.append((self.frame_number, self.current))
+        self.frame_number += 1
+        self.frame_start = None
+        self._overlay_age += 1
+
+    def add(self, name, ms):
+        """Add `ms` to span `name` for this frame (a span may run several times)."""
+        self.current[name] = self.current.get(name, 0.0) + ms
+
+    @contextmanager
+    def span(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000.0)
+
+    def start(self, name):
+        """span() for code that can't be wrapped in a with-block."""
+        self.open_spans[name] = time.perf_counter()
+
+    def stop(self, name):
+        t0 = self.open_spans.pop(name, None)
+        if t0 is not None:
+            self.add(name, (time.perf_counter() - t0) * 1000.0)
+
+    def wrap(self, func, name):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, (time.perf_counter() - t0) * 1000.0)
+        return timed
+
+    def instrument(self, obj, *methods, prefix=""):
+        """Time obj.method(...) calls as spans named prefix + method."""
+        for method in methods:
+            setattr(obj, method, self.wrap(getattr(obj, method), prefix + method))
+
+    # ----------------------------------------------------
+    # STATS / EXPORT
+    # ----------------------------------------------------
+    def stats(self):
+        """span -> count, mean, p50, p95, p99, max and last (ms) over the window."""
+        out = {}
+        for name, q in self.samples.items():
+            a = np.fromiter(q, dtype=np.float64, count=len(q))
+            p50, p95, p99 = np.percentile(a, (50, 95, 99)).tolist()
+            out[name] = {
+                "count": len(a),
+                "mean": float(a.mean()),
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+                "max": float(a.max()),
+                "last": float(a[-1]),
+            }
+        return out
+
+    def export_json(self, path):
+        """Percentiles per span plus every frame in the window."""
+        data = {
+            "window": self.window,
+            "spans": self.stats(),
+            "frames": [{"frame_no": n, **spans} for n, spans in self.frames],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def export_csv(self, path):
+        """One row per frame in the window, one column (ms) per span."""
+        names = list(self.samples)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame_no"] + names)
+            for n, spans in self.frames:
+                writer.writerow([n] + [f"{spans[s]:.3f}" if s in spans else "" for s in names])
+
+    # ----------------------------------------------------
+    # OVERLAY
+    # ----------------------------------------------------
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self._overlay = None
+
+    def draw_overlay(self, screen, font, pos=(10, 40), extra=None):
+        """
+        Blit the span table (frame first, then slowest p95 first).
+        `extra` is an optional callable returning more lines to show.
+        """
+        if not self.overlay_visible or not self.samples:
+            return
+        if self._overlay is None or self._overlay_age >= self.REFRESH_FRAMES:
+            lines = self._table_lines()
+            if extra is not None:
+                lines += [""] + list(extra())
+            self._overlay = self._render_lines(font, lines)
+            self._overlay_age = 0
+        screen.blit(self._overlay, pos)
+
+    def _table_lines(self):
+        stats = self.stats()
+        order = sorted(stats, key=lambda s: (s != "frame", -stats[s]["p95"]))
+        lines = [f"{'span (ms)':<26}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+        for name in order:
+            s = stats[name]
+            lines.append(f"{name[:26]:<26}{s['p50']:>8.2f}{s['p95']:>8.2f}"
+                         f"{s['p99']:>8.2f}{s['max']:>8.2f}")
+        return lines
+
+    @staticmethod
+    def _render_lines(font, lines):
+        import pygame
+
+        # rendered straight from the font: the numbers change every
+        # refresh and would only churn the shared text cache
+        surfs = [font.render(line, True, (0, 255, 0)) for line in lines]
+        line_h = font.get_linesize()
+        w = max(s.get_width() for s in surfs) + 16
+        h = line_h * len(surfs) + 12
+
+        panel = pygame.Surface((w, h), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 190))
+        for i, surf in enumerate(surfs):
+            panel.blit(surf, (8, 6 + i * line_h))
+        return panel
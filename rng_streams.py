@@ -0,0 +1,203 @@
+# ================================================
+# rng_streams.py (SEEDED PER-TICKER RANDOM STREAMS)
+# ================================================
+#
+#   Every (ticker, subsystem) pair gets its own counter-based stream:
+#   draw k of a stream is a hash of (master seed, ticker name,
+#   subsystem, epoch, k). Nothing is shared between tickers, so a seeded
+#   run draws the same numbers whether tickers are stepped one at a time
+#   (Stock.apply_tick), in a NumPy batch (MarketEngine) or split across
+#   workers that each build streams for their own tickers.
+#
+#   The scalar (Stream) and batched (RandomStreams.uniform/...) paths
+#   produce bit-identical values: the hash is exact integer math and the
+#   float transforms go through the same NumPy functions.
+#
+import hashlib
+import random
+
+import numpy as np
+
+SUBSYSTEMS = ("price", "volume", "micro", "events")
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_NORMAL_SALT = 0xD1B54A32D192ED03
+_TO_UNIT = 2.0 ** -52
+_TWO_PI = 2.0 * np.pi
+
+_STEP = np.uint64(_GOLDEN)
+_SHIFT = (np.uint64(30), np.uint64(27), np.uint64(31), np.uint64(12))
+_MULT = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+_SALT = np.uint64(_NORMAL_SALT)
+
+
+def new_seed():
+    """Fresh 63-bit master seed (fits an SQLite INTEGER)."""
+    return random.SystemRandom().getrandbits(63)
+
+
+def _mix(x):
+    """SplitMix64 finalizer on a Python int."""
+    x &= _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def _mix_array(x):
+    """SplitMix64 finalizer on a uint64 array (wraps like _mix)."""
+    x = x ^ (x >> _SHIFT[0])
+    x *= _MULT[0]
+    x ^= x >> _SHIFT[1]
+    x *= _MULT[1]
+    x ^= x >> _SHIFT[2]
+    return x
+
+
+def _name_hash(name):
+    # hash() is salted per process; this is not
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+def stream_key(seed, ticker, subsystem, epoch=0):
+    sub = SUBSYSTEMS.index(subsystem) + 1
+    key = _mix(seed)
+    key = _mix(key ^ _name_hash(ticker))
+    key = _mix(key ^ (sub * _GOLDEN))
+    return _mix(key ^ (epoch * _NORMAL_SALT))
+
+
+def _unit(bits):
+    """Top 52 bits -> float in (0, 1), exact (never 0 or 1)."""
+    return ((bits >> 12) + 0.5) * _TO_UNIT
+
+
+def _unit_array(bits):
+    u = (bits >> _SHIFT[3]).astype(np.float64)
+    u += 0.5
+    u *= _TO_UNIT
+    return u
+
+
+def _normal(u1, u2):
+    # Box-Muller; NumPy's log/cos for both paths (math.log can
+    # differ from np.log in the last bit)
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(_TWO_PI * u2)
+
+
+class Stream:
+    """
+    One ticker's stream for one subsystem, with the same draw methods
+    Stock used from the `random` module. The position lives in the
+    owning RandomStreams, so scalar and batched draws stay in step.
+    """
+    __slots__ = ("state", "i")
+
+    def __init__(self, state, i):
+        self.state = state
+        self.i = i
+
+    def _next(self):
+        x = int(self.state[self.i])
+        self.state[self.i] = (x + _GOLDEN) & _MASK
+        return x
+
+    def random(self):
+        return _unit(_mix(self._next()))
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def gauss(self, mu, sigma):
+        x = self._next()
+        z = _normal(_unit(_mix(x)), _unit(_mix(x ^ _NORMAL_SALT)))
+        return mu + sigma * float(z)
+
+    def randint(self, a, b):
+        """Integer in [a, b], both ends included (like random.randint)."""
+        span = b - a + 1
+        return a + min(int(self.random() * span), span - 1)
+
+
+class RandomStreams:
+    """
+    Streams for a fixed list of tickers. `epoch` separates sessions that
+    start from the same seed (MarketState passes the saved clock), so a
+    reload doesn't replay the numbers of the previous session.
+    """
+    def __init__(self, seed, names, epoch=0):
+        self.seed = seed
+        self.epoch = epoch
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        # draw k of a stream hashes key + k * _GOLDEN; `state` holds that
+        # sum for the next draw (a Weyl sequence, wrapping at 2**64)
+        self.state = {
+            sub: np.array([stream_key(seed, name, sub, epoch) for name in self.names],
+                          dtype=np.uint64)
+            for sub in SUBSYSTEMS
+        }
+
+        self._streams = {}
+
+    @classmethod
+    def restore(cls, seed, names, epoch, state):
+        """
+        Streams at saved positions (subsystem -> uint64 array, one entry
+        per name). Skips hashing the stream keys, which is most of the
+        cost of a fresh RandomStreams on a big universe.
+        """
+        streams = cls.__new__(cls)
+        streams.seed = seed
+        streams.epoch = epoch
+        streams.names = list(names)
+        streams.index = {name: i for i, name in enumerate(streams.names)}
+        streams.state = {sub: np.array(state[sub], dtype=np.uint64) for sub in SUBSYSTEMS}
+        streams._streams = {}
+        return streams
+
+    def stream(self, ticker, subsystem):
+        s = self._streams.get((ticker, subsystem))
+        if s is None:
+            i = self.index[ticker]
+            s = Stream(self.state[subsystem], i)
+            self._streams[(ticker, subsystem)] = s
+        return s
+
+    # ----------------------------------------------------
+    # BATCHED DRAWS (one value per selected ticker)
+    # ----------------------------------------------------
+    def _next(self, subsystem, where):
+        """
+        Stream positions of the selected tickers, then advance them.
+        where = None (every ticker), a boolean mask or an index array.
+        """
+        state = self.state[subsystem]
+        if where is None:
+            x = state.copy()
+            state += _STEP
+            return x
+
+        x = state[where]
+        state[where] = x + _STEP
+        return x
+
+    def random(self, subsystem, where=None):
+        return _unit_array(_mix_array(self._next(subsystem, where)))
+
+    def uniform(self, subsystem, low, high, where=None):
+        return low + (high - low) * self.random(subsystem, where)
+
+    def normal(self, subsystem, loc, scale, where=None):
+        x = self._next(subsystem, where)
+        u1 = _unit_array(_mix_array(x))
+        u2 = _unit_array(_mix_array(x ^ _SALT))
+        return loc + scale * _normal(u1, u2)
+
+    def integers(self, subsystem, low, high, where=None):
+        """Integers in [low, high) (like Generator.integers)."""
+        span = high - low
+        u = self.random(subsystem, where)
+        return low + np.minimum((u * span).astype(np.int64), span - 1)
@@ -0,0 +1,270 @@
+# ================================================
+# sharded_engine.py (MARKETENGINE ACROSS A PROCESS POOL)
+# ================================================
+#
+#   The ticker universe is cut into contiguous shards, one worker
+#   process per shard, each running its own MarketEngine. Per tick the
+#   parent writes the shared inputs (clock, season, sector sentiment,
+#   mood, new order force) into one shared memory block, wakes every
+#   worker, and waits; workers step and copy their compact outputs
+#   (price, trend, volume, candle, breakout flag) into their slice of
+#   the same block. The output arrays are views on that block, so
+#   headless reads them without any copy or pickling.
+#
+#   Every shard draws from rng_streams for its own tickers, so a sharded
+#   run is bit-identical to a single MarketEngine with the same seed.
+#
+#   Headless only: Stock objects are not synced back (no sync_to_stocks).
+#
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from market_engine import MarketEngine
+from rng_streams import RandomStreams
+
+# scalar inputs, one float64 slot each
+CLOCK_FIELDS = (
+    "market_time", "is_market_open", "market_open", "market_close", "game_day",
+    "market_mood", "trend_bias", "volatility_mult", "volume_mult",
+)
+
+# per-ticker outputs
+OUTPUT_FIELDS = (
+    ("current_price", np.float64),
+    ("last_price", np.float64),
+    ("trend", np.float64),
+    ("volume", np.int64),
+    ("candle_open", np.float64),
+    ("candle_high", np.float64),
+    ("candle_low", np.float64),
+    ("candle_close", np.float64),
+    ("candle_volume", np.int64),
+    ("breakout", np.int64),          # 1 up, -1 down, 0 none
+)
+
+_STEP = "step"
+_STOP = "stop"
+
+
+def _layout(n, n_sectors):
+    """name -> (offset, dtype, length) inside the shared block (8-byte slots)."""
+    fields = [("clock", np.float64, len(CLOCK_FIELDS)),
+              ("sector_sentiment", np.float64, n_sectors),
+              ("order_force", np.float64, n)]
+    fields += [(name, dtype, n) for name, dtype in OUTPUT_FIELDS]
+
+    layout = {}
+    offset = 0
+    for name, dtype, length in fields:
+        layout[name] = (offset, dtype, length)
+        offset += 8 * length
+    return layout, max(offset, 8)
+
+
+def _views(buf, layout):
+    return {
+        name: np.ndarray((length,), dtype=dtype, buffer=buf, offset=offset)
+        for name, (offset, dtype, length) in layout.items()
+    }
+
+
+class _ShardInputs:
+    """The slice of GameState that MarketEngine.step reads, rebuilt per tick."""
+    news = None
+    game_season = 1
+
+    def __init__(self, clock, sector_names, sector_values):
+        c = dict(zip(CLOCK_FIELDS, clock.tolist()))
+        self.market_time = int(c["market_time"])
+        self.is_market_open = bool(c["is_market_open"])
+        self.market_open = int(c["market_open"])
+        self.market_close = int(c["market_close"])
+        self.game_day = int(c["game_day"])
+        self.market_mood = c["market_mood"]
+        self.season_profiles = {1: {
+            "trend_bias": c["trend_bias"],
+            "volatility_mult": c["volatility_mult"],
+            "volume_mult": c["volume_mult"],
+        }}
+        self.sector_sentiment = dict(zip(sector_names, sector_values.tolist()))
+
+
+def _shard_worker(conn, shm_name, n, sector_names, lo, hi, rows, seed, epoch):
+    # the parent owns (and unlinks) the block; we only attach. Spawned
+    # children share the parent's resource tracker, so nothing leaks.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    v = None
+
+    try:
+        layout, _ = _layout(n, len(sector_names))
+        v = _views(shm.buf, layout)
+        names = [r["ticker"] for r in rows]
+        engine = MarketEngine(rows, streams=RandomStreams(seed, names, epoch))
+        index = engine.index
+
+        while True:
+            msg = conn.recv()
+            if msg == _STOP:
+                break
+
+            try:
+                engine.order_delta += v["order_force"][lo:hi]
+                engine.step(_ShardInputs(v["clock"], sector_names, v["sector_sentiment"]))
+
+                for name, _ in OUTPUT_FIELDS:
+                    if name != "breakout":
+                        v[name][lo:hi] = getattr(engine, name)
+
+                flags = v["breakout"][lo:hi]
+                flags[:] = 0
+                for name, up in engine.breakouts:
+                    flags[index[name]] = 1 if up else -1
+
+                conn.send(None)
+            except Exception:
+                conn.send(traceback.format_exc())
+    finally:
+        v = None    # views must go before the buffer is released
+        shm.close()
+        conn.close()
+
+
+class ShardedMarketEngine:
+    """
+    MarketEngine's step()/output interface, with the tickers split over
+    `workers` processes. Call close() (or use it as a context manager)
+    to stop the pool and free the shared memory.
+    """
+    def __init__(self, rows, workers, seed, epoch=0, sector_names=None):
+        n = len(rows)
+        self.size = n
+        self.names = [r["ticker"] for r in rows]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.sector_names = sector_names or sorted({r["sector"] for r in rows})
+        self.breakouts = []
+        self.candle_day = None
+        self.candle_time = None
+
+        layout, nbytes = _layout(n, len(self.sector_names))
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._views = _views(self.shm.buf, layout)
+        for name, _ in OUTPUT_FIELDS:
+            setattr(self, name, self._views[name])
+
+        # starting state, readable before the first step
+        self.current_price[:] = [r["current_price"] for r in rows]
+        self.last_price[:] = [r["last_price"] for r in rows]
+        self.trend[:] = [r["trend"] for r in rows]
+        self.volume[:] = [r["volume"] for r in rows]
+
+        workers = max(1, min(workers, n))
+        bounds = np.linspace(0, n, workers + 1).astype(int).tolist()
+
+        # spawn: the parent may already run threads (SaveWorker)
+        ctx = mp.get_context("spawn")
+        self.conns = []
+        self.procs = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_shard_worker,
+                args=(child, self.shm.name, n, self.sector_names, lo, hi,
+                      rows[lo:hi], seed, epoch),
+                name=f"MarketShard-{lo}",
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    @classmethod
+    def from_stocks(cls, tickers_obj, recently_bought=None, workers=None, seed=0, epoch=0):
+        """Same rows as MarketEngine.from_stocks, split over `workers` processes."""
+        rows = MarketEngine.rows_from_stocks(tickers_obj, recently_bought)
+        return cls(rows, workers or mp.cpu_count(), seed, epoch)
+
+    # =====================================================================
+    # ORDER FLOW
+    # =====================================================================
+    def add_order_force(self, ticker, amount):
+        """Queued in shared memory; the owning worker applies it next step."""
+        i = self.index.get(ticker)
+        if i is not None:
+            self._views["order_force"][i] += amount
+
+    # =====================================================================
+    # BATCHED TICK
+    # =====================================================================
+    def step(self, gs):
+        profile = gs.season_profiles[gs.game_season]
+        clock = {
+            "market_time": gs.market_time,
+            "is_market_open": 1.0 if gs.is_market_open else 0.0,
+            "market_open": gs.market_open,
+            "market_close": gs.market_close,
+            "game_day": gs.game_day,
+            "market_mood": gs.market_mood,
+            "trend_bias": profile["trend_bias"],
+            "volatility_mult": profile["volatility_mult"],
+            "volume_mult": profile["volume_mult"],
+        }
+        self._views["clock"][:] = [clock[name] for name in CLOCK_FIELDS]
+        self._views["sector_sentiment"][:] = [
+            gs.sector_sentiment.get(s, 0) for s in self.sector_names
+        ]
+
+        for conn in self.conns:
+            conn.send(_STEP)
+        errors = [err for err in (conn.recv() for conn in self.conns) if err]
+        if errors:
+            self.close()
+            raise RuntimeError("market shard failed:\n" + errors[0])
+
+        self._views["order_force"][:] = 0.0
+        self.candle_day = gs.game_day
+        self.candle_time = int(gs.market_time)
+        self._announce_breakouts(gs)
+
+    def _announce_breakouts(self, gs):
+        # same order as MarketEngine: every bullish break, then bearish
+        flags = self.breakout
+        up_idx = np.flatnonzero(flags == 1)
+        down_idx = np.flatnonzero(flags == -1)
+        self.breakouts = []
+        MarketEngine._announce_breakouts(self, gs, up_idx, down_idx)
+
+    # =====================================================================
+    # SHUTDOWN
+    # =====================================================================
+    def close(self):
+        if self.shm is None:
+            return
+
+        for conn, proc in zip(self.conns, self.procs):
+            try:
+                conn.send(_STOP)
+            except (BrokenPipeError, OSError):
+                pass
+            proc.join(5)
+            if proc.is_alive():
+                proc.terminate()
+            conn.close()
+
+        # drop the numpy views before releasing the buffer
+        self._views = None
+        for name, _ in OUTPUT_FIELDS:
+            setattr(self, name, None)
+
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,426 @@
+# ================================================
+# snapshot.py (BINARY GAME-STATE SNAPSHOTS)
+# ================================================
+#
+#   The whole market state in one file: tickers, the candle windows in
+#   RAM, volume_history / recent_prices, portfolio lots, open orders,
+#   the clock and the RNG stream positions. Written atomically (temp
+#   file, fsync, rename) and memory-mapped on load, so a cold start is
+#   numpy slices instead of SQLite queries and per-row dict building.
+#
+#   SQLite stays the durable store. A snapshot records the account row
+#   that was saved with it, and MarketState only starts from it while
+#   the database still holds that row (nothing was saved since). With
+#   require_match=False it starts from the snapshot regardless and
+#   marks everything dirty, so the next save writes the snapshot's
+#   state over the database: that forks a scenario from the moment the
+#   snapshot was taken (use a copy of game.db for the fork).
+#
+#   File:
+#     prefix   MAGIC, format version, header length      (<8sIQ)
+#     header   JSON: scalars, string columns and the block table
+#              {name: [dtype, count, offset from the first block]}
+#     blocks   1-D little-endian arrays, each 8-byte aligned
+#
+#   Per-ticker lists (candles, recent prices, lots, ...) are stored CSR
+#   style: a values block plus "<name>.offsets" with n + 1 entries.
+#
+import json
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict, deque
+from itertools import chain
+
+import numpy as np
+
+from candle_store import COLUMNS, CandleStore
+from cost_basis import Lots
+from database import SCHEMA_VERSION
+from order_book import OrderBook
+from rng_streams import SUBSYSTEMS, RandomStreams
+
+MAGIC = b"TSSNAPSH"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sIQ")
+
+# per-ticker scalar columns
+TICKER_FLOAT = (
+    "current_price", "last_price", "base_price", "gravity", "trend", "ath", "atl",
+    "volume_cap", "intraday_bias", "daily_volume_phase", "seasonal_bias", "order_force",
+)
+TICKER_INT = ("buy_qty", "volume", "avg_volume", "last_breakout_time")
+TICKER_TEXT = ("name", "sector", "volatility")
+
+ACCOUNT_ROW_SQL = """
+    SELECT money, market_time, market_open, market_close, market_day, rng_seed
+    FROM account
+    WHERE id = 1
+"""
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def _ragged(lists, dtype):
+    """CSR pair (values, offsets) for a list of lists."""
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum([len(x) for x in lists], out=offsets[1:])
+    values = np.fromiter(chain.from_iterable(lists), dtype=dtype, count=int(offsets[-1]))
+    return values, offsets
+
+
+def _nan_if_none(x):
+    return np.nan if x is None else x
+
+
+# ====================================================
+# FILE FORMAT
+# ====================================================
+def write_snapshot(path, header, arrays):
+    """
+    Write `header` (JSON-able dict) and `arrays` (name -> 1-D array) to
+    `path` atomically: a reader sees the old file or the new one.
+    """
+    blocks, data, pos = {}, [], 0
+    for name, a in arrays.items():
+        a = np.ascontiguousarray(a, dtype=np.asarray(a).dtype.newbyteorder("<"))
+        blocks[name] = [a.dtype.str, len(a), pos]
+        data.append(a)
+        pos += _align(a.nbytes)
+
+    raw = json.dumps(dict(header, blocks=blocks)).encode()
+    head = _PREFIX.size + len(raw)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(raw)))
+        f.write(raw)
+        f.write(b"\0" * (_align(head) - head))
+        for a in data:
+            f.write(a.data)
+            f.write(b"\0" * (_align(a.nbytes) - a.nbytes))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Snapshot:
+    """A snapshot file, memory-mapped read-only."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_len = _PREFIX.unpack_from(self.map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a snapshot")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path}: snapshot format {version}, expected {FORMAT_VERSION}")
+            self.header = json.loads(self.map[_PREFIX.size:_PREFIX.size + header_len])
+        except (struct.error, ValueError):
+            self.map.close()
+            raise
+        self.data_start = _align(_PREFIX.size + header_len)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getitem__(self, key):
+        return self.header[key]
+
+    def array(self, name):
+        """Read-only view of one block, straight from the map."""
+        dtype, count, offset = self.header["blocks"][name]
+        return np.frombuffer(self.map, dtype=dtype, count=count, offset=self.data_start + offset)
+
+    def ragged(self, name):
+        """Per-ticker Python lists from a CSR block pair."""
+        values = self.array(name).tolist()
+        offsets = self.array(name + ".offsets").tolist()
+        return [values[a:b] for a, b in zip(offsets, offsets[1:])]
+
+    def matches(self, conn):
+        """True while the database still holds the account row saved with this snapshot."""
+        row = conn.execute(ACCOUNT_ROW_SQL).fetchone()
+        return row is not None and list(row) == self.header["account_row"]
+
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:
+            pass    # views still point into it; unmapped once they go
+
+
+def open_snapshot(path, conn, require_match=True):
+    """
+    The snapshot at `path` if the game can start from it, else None
+    (missing, unreadable, or older than the database behind `conn`).
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snap = Snapshot(path)
+    except (OSError, ValueError) as e:
+        print(f"Snapshot {path} not used ({e}); loading from SQLite")
+        return None
+
+    if snap["schema_version"] != SCHEMA_VERSION or (require_match and not snap.matches(conn)):
+        print(f"Snapshot {path} is out of step with the database; loading from SQLite")
+        snap.close()
+        return None
+    return snap
+
+
+# ====================================================
+# CAPTURE
+# ====================================================
+def capture(state):
+    """(header, arrays) for the whole of a MarketState."""
+    names = list(state.tickers_obj)
+    stocks = [state.tickers_obj[name] for name in names]
+    arrays = {}
+
+    # ---------------------------------
+    # CLOCK + ACCOUNT
+    # ---------------------------------
+    account = dict(state.account)
+    account.update(market_time=state.market_time, market_open=state.market_open,
+                   market_close=state.market_close, market_day=state.game_day)
+    account_row = [account["money"], account["market_time"], account["market_open"],
+                   account["market_close"], account["market_day"], account["rng_seed"]]
+
+    # ---------------------------------
+    # TICKERS
+    # ---------------------------------
+    for field in TICKER_FLOAT:
+        if field == "order_force":
+            values = [state.recently_bought[name]["order_force_time_delta"] for name in names]
+        else:
+            values = [_nan_if_none(getattr(stock, field)) for stock in stocks]
+        arrays["tickers." + field] = np.array(values, dtype=np.float64)
+    for field in TICKER_INT:
+        arrays["tickers." + field] = np.array([getattr(s, field) for s in stocks], dtype=np.int64)
+
+    for field, dtype in (("recent_prices", np.float64), ("volume_history", np.int64),
+                         ("ohlc_buffer", np.float64)):
+        values, offsets = _ragged([getattr(s, field) for s in stocks], dtype)
+        arrays["tickers." + field] = values
+        arrays["tickers." + field + ".offsets"] = offsets
+
+    # ---------------------------------
+    # CANDLE WINDOWS (what is in RAM, not the SQLite history)
+    # ---------------------------------
+    stores = [stock.day_history for stock in stocks]
+    offsets = np.zeros(len(stores) + 1, dtype=np.int64)
+    np.cumsum([len(store) for store in stores], out=offsets[1:])
+    for name in COLUMNS:
+        parts = [store.column(name) for store in stores]
+        arrays["candles." + name] = np.concatenate(parts) if parts else np.zeros(0)
+    arrays["candles.offsets"] = offsets
+    arrays["candles.appended"] = np.array([s.appended for s in stores], dtype=np.int64)
+    arrays["candles.capacity"] = np.array([s.capacity for s in stores], dtype=np.int64)
+    saved = state.candles.saved_counts
+    arrays["candles.unsaved"] = np.array(
+        [store.appended - saved.get(name, 0) for name, store in zip(names, stores)], dtype=np.int64)
+
+    # ---------------------------------
+    # PORTFOLIO
+    # ---------------------------------
+    held = list(state.portfolio)
+    positions = [state.portfolio[t] for t in held]
+    arrays["portfolio.shares"] = np.array([p["shares"] for p in positions], dtype=np.int64)
+    arrays["portfolio.sell_qty"] = np.array([p.get("sell_qty", 0) for p in positions], dtype=np.int64)
+    arrays["portfolio.total_cost"] = np.array([p["lots"].total_cost for p in positions], dtype=np.float64)
+    lots = [p["lots"].lots for p in positions]
+    arrays["portfolio.lot_qty"], arrays["portfolio.lot_qty.offsets"] = _ragged(
+        [[qty for qty, _ in lot] for lot in lots], np.int64)
+    arrays["portfolio.lot_price"], arrays["portfolio.lot_price.offsets"] = _ragged(
+        [[price for _, price in lot] for lot in lots], np.float64)
+
+    # ---------------------------------
+    # OPEN ORDERS (placement order)
+    # ---------------------------------
+    orders = list(state.open_orders)
+    index = {name: i for i, name in enumerate(names)}
+    arrays["orders.id"] = np.array([o["id"] for o in orders], dtype=np.int64)
+    arrays["orders.ticker"] = np.array([index[o["ticker"]] for o in orders], dtype=np.int64)
+    arrays["orders.sell"] = np.array([o["side"] == "sell" for o in orders], dtype=np.int8)
+    arrays["orders.qty"] = np.array([o["qty"] for o in orders], dtype=np.int64)
+    arrays["orders.limit_price"] = np.array([o["limit_price"] for o in orders], dtype=np.float64)
+
+    # ---------------------------------
+    # RNG STREAM POSITIONS (in `names` order)
+    # ---------------------------------
+    streams = state.rng_streams
+    order = [streams.index[name] for name in names]
+    for sub in SUBSYSTEMS:
+        arrays["rng." + sub] = streams.state[sub][order]
+
+    header = {
+        "created": time.time(),
+        "schema_version": SCHEMA_VERSION,
+        "account": account,
+        "account_row": account_row,
+        "clock": {
+            "game_day": state.game_day,
+            "market_time": state.market_time,
+            "market_open": state.market_open,
+            "market_close": state.market_close,
+            "game_season": state.game_season,
+            "day_in_season": state.day_in_season,
+            "is_market_open": state.is_market_open,
+        },
+        "market_mood": state.market_mood,
+        "sector_sentiment": state.sector_sentiment,
+        "tickers": names,
+        "ticker_text": {field: [getattr(s, field) for s in stocks] for field in TICKER_TEXT},
+        "portfolio": held,
+        "next_order_id": state.open_orders.next_id,
+        "rng": {"seed": streams.seed, "epoch": streams.epoch},
+        "candles_loaded": list(state.candles.loaded),
+        "engine": state.market_engine is not None,
+    }
+    return header, arrays
+
+
+def save_state(state, path):
+    header, arrays = capture(state)
+    write_snapshot(path, header, arrays)
+
+
+# ====================================================
+# RESTORE
+# ====================================================
+def restore_records(snap, state):
+    """
+    Stand-in for load_from_db(): account, ticker dicts (with their
+    candle stores) and portfolio, read from the snapshot.
+    """
+    state.account.update(snap["account"])
+    names = snap["tickers"]
+    text = snap["ticker_text"]
+    cols = {field: snap.array("tickers." + field).tolist() for field in TICKER_FLOAT + TICKER_INT}
+
+    offsets = snap.array("candles.offsets").tolist()
+    appended = snap.array("candles.appended").tolist()
+    capacity = snap.array("candles.capacity").tolist()
+    candle_cols = {name: snap.array("candles." + name) for name in COLUMNS}
+
+    state.tickers = {}
+    for i, t in enumerate(names):
+        a, b = offsets[i], offsets[i + 1]
+        store = CandleStore(capacity[i])
+        store.appended = appended[i] - (b - a)
+        store.load_columns({name: col[a:b] for name, col in candle_cols.items()})
+
+        state.tickers[t] = {
+            "ticker": t,
+            "name": text["name"][i],
+            "sector": text["sector"][i],
+            "current_price": cols["current_price"][i],
+            "last_price": cols["last_price"][i],
+            "base_price": cols["base_price"][i],
+            "volatility": text["volatility"][i],
+            "gravity": cols["gravity"][i],
+            "trend": cols["trend"][i],
+            "ath": cols["ath"][i],
+            "atl": cols["atl"][i],
+            "buy_qty": cols["buy_qty"][i],
+            "volume": cols["volume"][i],
+            "avg_volume": cols["avg_volume"][i],
+            "volume_cap": cols["volume_cap"][i],
+            "recent_prices": [],
+            "volume_history": [],
+            "day_history": store,
+            "ohlc_buffer": [],
+            "last_breakout_time": cols["last_breakout_time"][i],
+        }
+
+    shares = snap.array("portfolio.shares").tolist()
+    sell_qty = snap.array("portfolio.sell_qty").tolist()
+    total_cost = snap.array("portfolio.total_cost").tolist()
+    lot_qty = snap.ragged("portfolio.lot_qty")
+    lot_price = snap.ragged("portfolio.lot_price")
+
+    state.portfolio = {}
+    for j, t in enumerate(snap["portfolio"]):
+        lots = Lots()
+        lots.lots = deque([qty, price] for qty, price in zip(lot_qty[j], lot_price[j]))
+        lots.shares = sum(lot_qty[j])
+        lots.total_cost = total_cost[j]
+        state.portfolio[t] = {"shares": shares[j], "lots": lots, "sell_qty": sell_qty[j]}
+
+
+def restore_runtime(snap, state, matched=True):
+    """
+    Everything MarketState.__init__ would otherwise reset: clock,
+    per-stock runtime lists, order flow, RNG positions, open orders and
+    the candle save markers. matched=False (a fork) marks everything
+    dirty so the next save writes it all.
+    """
+    clock = snap["clock"]
+    for key, value in clock.items():
+        setattr(state, key, value)
+    state.market_mood = snap["market_mood"]
+    state.sector_sentiment = dict(snap["sector_sentiment"])
+
+    names = snap["tickers"]
+    recent = snap.ragged("tickers.recent_prices")
+    volume_history = snap.ragged("tickers.volume_history")
+    ohlc_buffer = snap.ragged("tickers.ohlc_buffer")
+    bias = snap.array("tickers.intraday_bias").tolist()
+    phase = snap.array("tickers.daily_volume_phase").tolist()
+    seasonal = snap.array("tickers.seasonal_bias").tolist()
+    force = snap.array("tickers.order_force").tolist()
+
+    for i, name in enumerate(names):
+        stock = state.tickers_obj[name]
+        stock.recent_prices = recent[i]
+        stock.volume_history = volume_history[i]
+        stock.ohlc_buffer = ohlc_buffer[i]
+        stock.intraday_bias = None if bias[i] != bias[i] else bias[i]
+        stock.daily_volume_phase = None if phase[i] != phase[i] else phase[i]
+        stock.seasonal_bias = seasonal[i]
+        state.recently_bought[name]["order_force_time_delta"] = force[i]
+
+    rng = snap["rng"]
+    state.rng_streams = RandomStreams.restore(
+        rng["seed"], names, rng["epoch"], {sub: snap.array("rng." + sub) for sub in SUBSYSTEMS})
+
+    sides = ("buy", "sell")
+    state.open_orders = OrderBook.restore(
+        [
+            {"id": order_id, "ticker": names[t], "side": sides[sell], "qty": qty, "limit_price": limit}
+            for order_id, t, sell, qty, limit in zip(
+                snap.array("orders.id").tolist(), snap.array("orders.ticker").tolist(),
+                snap.array("orders.sell").tolist(), snap.array("orders.qty").tolist(),
+                snap.array("orders.limit_price").tolist())
+        ],
+        snap["next_order_id"],
+    )
+
+    appended = snap.array("candles.appended").tolist()
+    unsaved = snap.array("candles.unsaved").tolist()
+    candles = state.candles
+    if matched:
+        candles.saved_counts = {name: appended[i] - unsaved[i] for i, name in enumerate(names)}
+    else:
+        # nothing in the target database can be trusted to match
+        candles.saved_counts = {
+            name: appended[i] - len(state.tickers_obj[name].day_history)
+            for i, name in enumerate(names)
+        }
+        state.dirty_tickers = set(names)
+        state.dirty_portfolio = set(state.portfolio)
+    candles.committed_counts = dict(candles.saved_counts)
+    candles.loaded = OrderedDict((name, True) for name in snap["candles_loaded"])
+
+    if snap["engine"]:
+        state.enable_market_engine()
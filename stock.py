@@ -1,6 +1,18 @@
-import random, math
+import math
+
+import numpy as np
+from candle_store import CandleStore
+from price_board import BoardField
 
 class Stock:
+    # live on MarketState.price_board once attached
+    current_price = BoardField()
+    last_price = BoardField()
+    trend = BoardField()
+    volume = BoardField()
+    ath = BoardField()
+    atl = BoardField()
+
     def __init__(self, ticker, info):
         """
         info comes from DB and contains ONLY persistent fields.
@@ -40,7 +52,7 @@ class Stock:
         self.recent_prices = []                 # rolling last X prices
 
         # OHLC candle history (7-day charts, etc.)
-        self.day_history = info.get("day_history", [])
+        self.day_history = CandleStore.coerce(info.get("day_history"))
 
         # buffer for building each 5-minute candle
         self.ohlc_buffer = []
@@ -62,6 +74,11 @@ class Stock:
         GameState only advances time and calls this.
         """
 
+        # per-ticker seeded streams (same draws as MarketEngine)
+        price_rng = gs.rng_streams.stream(self.ticker, "price")
+        volume_rng = gs.rng_streams.stream(self.ticker, "volume")
+        micro_rng = gs.rng_streams.stream(self.ticker, "micro")
+
         # ----------------------------------------------------
         # PRICE + TREND
         # ----------------------------------------------------
@@ -86,7 +103,7 @@ class Stock:
         }
         sigma_min, sigma_max = vol_map[self.volatility]
 
-        sigma_raw = random.uniform(sigma_min, sigma_max)
+        sigma_raw = price_rng.uniform(sigma_min, sigma_max)
 
         vol_mult = max(0.75, min(3.0, self.volume / self.avg_volume))
         sigma = sigma_raw * vol_mult
@@ -114,7 +131,7 @@ class Stock:
         # ----------------------------------------------------
         # GLOBAL NOISE + MOOD
         # ----------------------------------------------------
-        noise_force = random.gauss(0, 0.003 if gs.is_market_open else 0.0004)
+        noise_force = price_rng.gauss(0, 0.003 if gs.is_market_open else 0.0004)
         mood_force = gs.market_mood
 
         # ----------------------------------------------------
@@ -130,7 +147,7 @@ class Stock:
         change = (
                 fair_value_force +
                 momentum_force +
-                random.gauss(0, sigma) +
+                price_rng.gauss(0, sigma) +
                 order_force +
                 sector_force +
                 noise_force +
@@ -139,7 +156,8 @@ class Stock:
         )
 
         new_price = max(0.01, current_price + change)
-        self.current_price = round(new_price, 2)
+        # rint(x * 100) / 100 like np.round; round(x, 2) differs at ties
+        self.current_price = round(new_price * 100) / 100
 
         # ----------------------------------------------------
         # BREAKOUT LOGIC (trend + volatility boost)
@@ -190,42 +208,42 @@ class Stock:
         if gs.is_market_open:
 
             # 1) Mean reversion toward baseline
-            vol += (base_vol - vol) * random.uniform(0.03, 0.07)
+            vol += (base_vol - vol) * volume_rng.uniform(0.03, 0.07)
 
             # 2) Small noise
-            vol += random.randint(-int(base_vol * 0.015), int(base_vol * 0.025))
+            vol += volume_rng.randint(-int(base_vol * 0.015), int(base_vol * 0.025))
 
             # 3) Intraday personality (one per day)
             if self.intraday_bias is None:
-                self.intraday_bias = random.uniform(0.85, 1.25)
+                self.intraday_bias = volume_rng.uniform(0.85, 1.25)
             vol *= self.intraday_bias
 
             # 4) Intraday sine wave (reduced amplitude)
             if self.daily_volume_phase is None or t < 5:
-                self.daily_volume_phase = random.uniform(-0.5, 0.5)
+                self.daily_volume_phase = volume_rng.uniform(-0.5, 0.5)
 
             phase = self.daily_volume_phase
             t_ratio = (t - gs.market_open) / max(1, gs.market_close - gs.market_open)
-            sin_wave = 1.0 + 0.12 * math.sin(6.28 * (t_ratio + phase))
+            sin_wave = 1.0 + 0.12 * float(np.sin(6.28 * (t_ratio + phase)))
             vol *= sin_wave
 
             # 5) Opening / midday / closing regimes
             if 570 <= t <= 620:  # open
-                vol *= random.uniform(1.1, 1.4)
+                vol *= volume_rng.uniform(1.1, 1.4)
             elif 720 <= t <= 810:  # lull
-                vol *= random.uniform(0.85, 1.0)
+                vol *= volume_rng.uniform(0.85, 1.0)
             elif 900 <= t <= 960:  # close ramp
-                vol *= random.uniform(1.05, 1.35)
+                vol *= volume_rng.uniform(1.05, 1.35)
 
             # 6) Occasional surge (still random, but not insane)
-            if random.random() < 0.02:
-                vol *= random.uniform(1.15, 1.6)
+            if volume_rng.random() < 0.02:
+                vol *= volume_rng.uniform(1.15, 1.6)
 
         # ---------- AFTER HOURS ----------
         else:
-            target_ah = base_vol * random.uniform(0.10, 0.18)
-            vol += (target_ah - vol) * random.uniform(0.12, 0.18)
-            vol += random.randint(-int(base_vol * 0.005), int(base_vol * 0.005))
+            target_ah = base_vol * volume_rng.uniform(0.10, 0.18)
+            vol += (target_ah - vol) * volume_rng.uniform(0.12, 0.18)
+            vol += volume_rng.randint(-int(base_vol * 0.005), int(base_vol * 0.005))
 
         # ---------- SEASON MULTIPLIER ----------
         vol *= profile["volume_mult"]
@@ -237,14 +255,14 @@ class Stock:
 
             # If close to cap → tiny growth
             if vol > self.volume_cap * 0.75:
-                self.volume_cap *= random.uniform(1.001, 1.004)
+                self.volume_cap *= volume_rng.uniform(1.001, 1.004)
 
             # If far below cap → tiny shrinkage
             elif vol < self.volume_cap * 0.35:
-                self.volume_cap *= random.uniform(0.996, 0.999)
+                self.volume_cap *= volume_rng.uniform(0.996, 0.999)
 
             # Very small natural drift
-            self.volume_cap *= random.uniform(0.999, 1.0015)
+            self.volume_cap *= volume_rng.uniform(0.999, 1.0015)
 
         # Cap stays within sane bounds
         self.volume_cap = max(base_vol * 5, min(self.volume_cap, base_vol * 40))
@@ -271,7 +289,7 @@ class Stock:
         micro_prices = []
 
         for _ in range(5):
-            micro_change = random.gauss(0, sigma * 0.4)
+            micro_change = micro_rng.gauss(0, sigma * 0.4)
             micro_price = max(0.01, micro_price + micro_change)
             micro_prices.append(micro_price)
 
@@ -280,18 +298,14 @@ class Stock:
 
         prices = self.ohlc_buffer
 
-        entry = {
-            "day": gs.game_day,
-            "time": int(gs.market_time),
-            "open": prices[0],
-            "high": max(prices),
-            "low": min(prices),
-            "close": prices[-1],
-            "volume": self.volume
-        }
-
-        self.day_history.append(entry)
+        # CandleStore drops the oldest candle once it is full
+        self.day_history.append(
+            gs.game_day,
+            int(gs.market_time),
+            prices[0],
+            max(prices),
+            min(prices),
+            prices[-1],
+            self.volume
+        )
         self.ohlc_buffer = []
-
-        if len(self.day_history) > 2000:
-            self.day_history.pop(0)
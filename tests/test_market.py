@@ -0,0 +1,615 @@
+# ================================================
+# tests/test_market.py (MARKET SIMULATION TESTS)
+# ================================================
+#
+#   python -m pytest -q
+#
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+from persistence import SaveError, SaveWorker
+
+
+# ====================================================
+# SAVE WORKER
+# ====================================================
+def _delta(money, tickers=(), candles=()):
+    return {
+        "account": (money,),
+        "portfolio": [],
+        "tickers": [(money, t) for t in tickers],
+        "candles": list(candles),
+        "candle_marks": {row[0]: row[1] for row in candles},
+    }
+
+
+def test_failed_save_is_merged_into_next_write():
+    written, fail = [], [True]
+
+    def write(delta):
+        if fail[0]:
+            fail[0] = False
+            raise OSError("disk full")
+        written.append(delta)
+
+    worker = SaveWorker(write)
+    worker.start()
+    worker.submit(_delta(1, ["A"], [("A", 1)]))
+    worker.stop(_delta(2, ["B"], [("B", 2)]))
+
+    rows = [row for delta in written for row in delta["candles"]]
+    tickers = {row[-1] for delta in written for row in delta["tickers"]}
+    assert rows == [("A", 1), ("B", 2)]
+    assert tickers == {"A", "B"}
+    assert written[-1]["account"] == (2,)
+    assert worker.failed is None
+
+
+def test_stop_raises_when_a_delta_stays_unwritten():
+    def write(delta):
+        raise OSError("read-only")
+
+    worker = SaveWorker(write)
+    worker.start()
+    worker.submit(_delta(1))
+    with pytest.raises(SaveError):
+        worker.stop(_delta(2))
+    assert worker.failed["account"] == (2,)
+
+
+def test_pause_menu_quit_reports_a_failed_save(capsys):
+    import types
+
+    import pygame
+
+    import main
+    from UiEventManager import UiEventManager
+
+    class State:
+        gui_system = types.SimpleNamespace(render_pause_menu=lambda *args: "quit")
+        quit_save = main.GameState.quit_save
+
+        def final_save(self):
+            raise SaveError("1 save delta could not be written")
+
+    ui = UiEventManager(State())
+    event = types.SimpleNamespace(key=pygame.K_ESCAPE)
+    assert ui.handle_key(event, None, None) == "quit"
+    assert "SAVE FAILED" in capsys.readouterr().out
+
+
+# ====================================================
+# CANDLE PAGING WHILE A SAVE IS IN FLIGHT
+# ====================================================
+@pytest.fixture
+def market(tmp_path):
+    from benchmarks.common import build_universe
+    from market_state import MarketState
+
+    db_path = str(tmp_path / "game.db")
+    build_universe(db_path, 4, history=100)
+    state = MarketState(db_path)
+    yield state
+    state.price_board.close()
+    state.db.close()
+
+
+def _ticks(state, n):
+    from benchmarks.common import open_clock
+    for _ in range(n):
+        open_clock(state)
+        state.apply_tick_price()
+
+
+def test_history_has_no_gap_when_opened_before_the_save_commits(market):
+    name = next(iter(market.tickers_obj))
+    _ticks(market, 40)
+
+    pending = market.collect_save_delta()       # handed to the worker, not written yet
+    _ticks(market, 5)
+    later = market.collect_save_delta()
+    market.ensure_history(name)                 # chart opened in between
+    market.write_save_delta(pending)
+    market.write_save_delta(later)
+
+    history = market.tickers_obj[name].day_history
+    rows = market.db.reader().execute(
+        "SELECT day, time, open, high, low, close, volume FROM candles WHERE ticker = ?"
+        " ORDER BY day, time", (name,)).fetchall()
+    assert history.tuples() == rows[-len(history):]
+    assert len(history) == len(rows)
+
+
+def test_unviewed_tickers_trim_only_committed_candles(market):
+    name = next(iter(market.tickers_obj))
+    _ticks(market, 40)
+    pending = market.collect_save_delta()
+    market.collect_save_delta()
+    assert len(market.tickers_obj[name].day_history) == 40
+
+    market.write_save_delta(pending)
+    market.collect_save_delta()
+    assert len(market.tickers_obj[name].day_history) == market.candles.TAIL_CANDLES
+
+
+# ====================================================
+# RNG STREAMS
+# ====================================================
+NAMES = ["AAA", "BBB", "CCC", "DDD"]
+
+
+def _draws(streams, ticker, n=50):
+    s = streams.stream(ticker, "price")
+    return [s.random() for _ in range(n)] + [s.gauss(0.0, 1.0) for _ in range(n)]
+
+
+def test_same_seed_gives_same_draws_per_ticker():
+    from rng_streams import RandomStreams
+
+    a = RandomStreams(7, NAMES, epoch=3)
+    b = RandomStreams(7, list(reversed(NAMES)), epoch=3)
+    # drawing order across tickers (and their order in the list) does not matter
+    first = {t: _draws(a, t) for t in NAMES}
+    second = {t: _draws(b, t) for t in reversed(NAMES)}
+    assert first == second
+    assert first["AAA"] != first["BBB"]
+    assert _draws(RandomStreams(8, NAMES, epoch=3), "AAA") != first["AAA"]
+    assert _draws(RandomStreams(7, NAMES, epoch=4), "AAA") != first["AAA"]
+
+
+def test_scalar_and_batched_draws_match():
+    from rng_streams import RandomStreams
+
+    scalar = RandomStreams(11, NAMES)
+    batched = RandomStreams(11, NAMES)
+    for _ in range(20):
+        expected = [scalar.stream(t, "volume").uniform(2.0, 5.0) for t in NAMES]
+        assert batched.uniform("volume", 2.0, 5.0).tolist() == expected
+        expected = [scalar.stream(t, "micro").gauss(1.0, 0.5) for t in NAMES]
+        assert batched.normal("micro", 1.0, 0.5).tolist() == expected
+
+
+def test_restore_resumes_the_exact_sequence():
+    from rng_streams import SUBSYSTEMS, RandomStreams
+
+    streams = RandomStreams(5, NAMES, epoch=9)
+    _draws(streams, "CCC")
+    streams.normal("events", 0.0, 1.0)
+
+    saved = {sub: streams.state[sub].copy() for sub in SUBSYSTEMS}
+    restored = RandomStreams.restore(5, NAMES, 9, saved)
+    for t in NAMES:
+        assert _draws(restored, t) == _draws(streams, t)
+    assert restored.normal("events", 0.0, 1.0).tolist() == streams.normal("events", 0.0, 1.0).tolist()
+
+
+def test_integers_and_randint_cover_the_same_span():
+    from rng_streams import RandomStreams
+
+    low, high = -3, 4
+    scalar = RandomStreams(21, NAMES)
+    batched = RandomStreams(21, NAMES)
+    seen = set()
+    for _ in range(400):
+        expected = [scalar.stream(t, "events").randint(low, high - 1) for t in NAMES]
+        got = batched.integers("events", low, high).tolist()
+        assert got == expected
+        seen.update(got)
+    assert seen == set(range(low, high))
+
+
+def test_draws_are_roughly_uniform_and_normal():
+    from rng_streams import RandomStreams
+
+    names = [f"T{i}" for i in range(2000)]
+    streams = RandomStreams(3, names)
+    u = np.concatenate([streams.random("price") for _ in range(20)])
+    z = np.concatenate([streams.normal("volume", 0.0, 1.0) for _ in range(20)])
+
+    assert 0.0 < u.min() and u.max() < 1.0
+    assert abs(u.mean() - 0.5) < 0.01
+    assert np.histogram(u, bins=10, range=(0, 1))[0].min() > 0.9 * len(u) / 10
+    assert abs(z.mean()) < 0.02 and abs(z.std() - 1.0) < 0.02
+
+
+# ====================================================
+# ORDER BOOK
+# ====================================================
+def _crosses(order, price):
+    if order["side"] == "buy":
+        return order["limit_price"] >= price
+    return order["limit_price"] <= price
+
+
+def test_order_book_matches_a_brute_force_scan():
+    import random
+    from order_book import OrderBook
+
+    rng = random.Random(17)
+    tickers = ["AAA", "BBB", "CCC"]
+    prices = {t: 100.0 for t in tickers}
+    book = OrderBook()
+    naive = []      # live orders, placement order
+
+    for step in range(2000):
+        action = rng.random()
+        if action < 0.45:
+            t = rng.choice(tickers)
+            side = rng.choice(("buy", "sell"))
+            # coarse limits so many orders share a price level
+            limit = round(prices[t] + rng.choice((-1, 1)) * rng.randint(0, 6) * 0.5, 2)
+            naive.append(book.place(t, side, rng.randint(1, 9), limit))
+        elif action < 0.6 and naive:
+            victim = rng.choice(naive)
+            assert book.cancel(victim["id"]) is victim
+            naive.remove(victim)
+            assert book.cancel(victim["id"]) is None
+        else:
+            for t in tickers:
+                prices[t] = round(prices[t] + rng.choice((-1.0, -0.5, 0.0, 0.5, 1.0)), 2)
+
+            crossed = book.pop_crossing(prices.__getitem__)
+            expected = [o for o in naive if _crosses(o, prices[o["ticker"]])]
+            assert [o["id"] for o in crossed] == [o["id"] for o in expected]
+
+            for order in crossed:
+                if rng.random() < 0.5:
+                    book.filled(order)
+                    naive.remove(order)
+                else:
+                    book.requeue(order)
+
+        assert list(book) == naive
+        assert len(book) == len(naive)
+
+
+def test_order_book_price_then_time_priority():
+    from order_book import OrderBook
+
+    book = OrderBook()
+    a = book.place("AAA", "buy", 1, 10.0)
+    b = book.place("AAA", "buy", 1, 12.0)
+    c = book.place("AAA", "buy", 1, 12.0)
+    d = book.place("AAA", "sell", 1, 15.0)
+    e = book.place("AAA", "sell", 1, 14.0)
+
+    # best bid first, ties by placement; best ask first
+    assert book.buys["AAA"][0] == (-12.0, b["id"])
+    assert book.sells["AAA"][0] == (14.0, e["id"])
+
+    assert book.pop_crossing(lambda t: 12.0) == [b, c]
+    book.requeue(b)
+    book.filled(c)
+    assert book.pop_crossing(lambda t: 14.5) == [e]
+    book.filled(e)
+    assert list(book) == [a, b, d]
+    assert book.pop_crossing(lambda t: 9.0) == [a, b]
+
+
+def test_order_book_cancel_is_lazy_and_compacts():
+    from order_book import OrderBook
+
+    book = OrderBook()
+    orders = [book.place("AAA", "buy", 1, 10.0 + i * 0.01) for i in range(200)]
+    for order in orders[:100]:
+        book.cancel(order["id"])
+
+    # cancelled entries linger in the heap until compaction or the top
+    assert len(book) == 100
+    assert book.stale + len(book) == len(book.buys["AAA"])
+    for order in orders[100:180]:
+        book.cancel(order["id"])
+    # compacted once stale outgrew the live orders (plus slack)
+    assert len(book.buys["AAA"]) == len(book) + book.stale < len(orders)
+
+    crossed = book.pop_crossing(lambda t: 0.0)
+    assert crossed == orders[180:]
+
+
+# ====================================================
+# COST-BASIS LOTS
+# ====================================================
+def _per_share(lots):
+    return [price for qty, price in lots.lots for _ in range(qty)]
+
+
+@pytest.mark.parametrize("method", ["fifo", "lifo"])
+def test_lots_match_a_per_share_list(method):
+    import random
+    from cost_basis import Lots
+
+    rng = random.Random(method)
+    lots, naive = Lots(), []
+
+    for _ in range(3000):
+        if rng.random() < 0.55 or not naive:
+            qty = rng.randint(1, 20)
+            price = rng.choice((10.0, 10.5, 11.25, 12.0)) if rng.random() < 0.5 else round(rng.uniform(5, 15), 2)
+            lots.add(qty, price)
+            naive.extend([price] * qty)
+        else:
+            qty = rng.randint(1, len(naive) + 5)     # sometimes more than is held
+            if method == "fifo":
+                taken, naive = naive[:qty], naive[qty:]
+            else:
+                taken, naive = naive[max(len(naive) - qty, 0):], naive[:max(len(naive) - qty, 0)]
+            assert lots.remove(qty, method) == pytest.approx(sum(taken))
+
+        assert _per_share(lots) == naive
+        assert lots.shares == len(naive)
+        assert lots.total_cost == pytest.approx(sum(naive))
+        assert lots.avg_price == pytest.approx(sum(naive) / len(naive) if naive else 0.0)
+        # adjacent lots never share a price (buys at the newest price merge)
+        prices = [price for _, price in lots.lots]
+        assert all(a != b for a, b in zip(prices, prices[1:]))
+
+
+def test_lots_storage_round_trips():
+    from cost_basis import Lots
+
+    prices = [34.9, 34.9, 34.9, 35.1, 34.9, 40.0, 40.0]
+    lots = Lots.from_prices(prices)
+    assert _per_share(lots) == prices
+    assert [tuple(lot) for lot in lots.lots] == [(3, 34.9), (1, 35.1), (1, 34.9), (2, 40.0)]
+
+    again = Lots.from_json(lots.to_json())
+    assert list(again.lots) == list(lots.lots)
+    assert again.shares == lots.shares and again.total_cost == lots.total_cost
+    assert Lots.from_json("").shares == 0 and Lots.from_json(None).shares == 0
+
+    with pytest.raises(ValueError):
+        lots.remove(1, "average")
+
+
+def test_migration_v3_turns_bought_at_into_lots(tmp_path):
+    import json
+    import sqlite3
+    from cost_basis import Lots
+    from database import PORTFOLIO_TABLE_SQL, SCHEMA_VERSION, get_schema_version, migrate, set_schema_version
+
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE portfolio (ticker TEXT PRIMARY KEY, shares INTEGER,"
+                 " bought_at TEXT, sell_qty INTEGER)")
+    old = {
+        "MEGA": (3, [34.9, 34.9, 34.9], 1),
+        "GRNV": (0, [], 0),
+        "NEOT": (4, [10.0, 11.0, 11.0, 10.0], 0),
+        "AQUA": (0, None, 0),
+    }
+    conn.executemany("INSERT INTO portfolio VALUES (?, ?, ?, ?)",
+                     [(t, s, None if b is None else json.dumps(b), q) for t, (s, b, q) in old.items()])
+    set_schema_version(conn, 2)
+    conn.commit()
+    conn.close()
+
+    migrate(path)
+
+    conn = sqlite3.connect(path)
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    columns = [r[1] for r in conn.execute("PRAGMA table_info(portfolio)")]
+    expected = [r[1] for r in sqlite3.connect(":memory:").execute(PORTFOLIO_TABLE_SQL).execute(
+        "PRAGMA table_info(portfolio)")]
+    assert columns == expected
+
+    rows = {t: (s, Lots.from_json(lots), q) for t, s, lots, q in
+            conn.execute("SELECT ticker, shares, lots, sell_qty FROM portfolio")}
+    conn.close()
+    assert set(rows) == set(old)
+    for ticker, (shares, bought_at, sell_qty) in old.items():
+        got_shares, lots, got_sell = rows[ticker]
+        assert (got_shares, got_sell) == (shares, sell_qty)
+        assert _per_share(lots) == (bought_at or [])
+    assert [tuple(lot) for lot in rows["NEOT"][1].lots] == [(1, 10.0), (2, 11.0), (1, 10.0)]
+
+
+# ====================================================
+# PORTFOLIO VALUATION CACHE
+# ====================================================
+def _full_valuation(state):
+    rows = {}
+    for ticker, entry in state.portfolio.items():
+        if entry["shares"] > 0:
+            price = state.tickers_obj[ticker].current_price
+            avg_price = entry["lots"].avg_price
+            rows[ticker] = {
+                "shares": entry["shares"],
+                "avg_price": avg_price,
+                "current": price,
+                "value": price * entry["shares"],
+                "cost_basis": avg_price * entry["shares"],
+                "pnl": price * entry["shares"] - avg_price * entry["shares"],
+            }
+    return rows
+
+
+def test_valuation_cache_matches_a_full_recompute(market, capsys):
+    import random
+
+    rng = random.Random(19)
+    mgr = market.portfolio_mgr
+    names = list(market.tickers_obj)
+    most_held = 0
+
+    for step in range(400):
+        action = rng.random()
+        ticker = rng.choice(names)
+        if action < 0.3:
+            mgr.buy_stock(ticker, rng.randint(1, 50))
+        elif action < 0.55:
+            held = market.portfolio.get(ticker, {}).get("shares", 0)
+            if held:
+                # whole position now and then, so rows come and go
+                mgr.sell_stock(ticker, held if rng.random() < 0.3 else rng.randint(1, held))
+        elif action < 0.8:
+            _ticks(market, 1)
+        else:
+            # price moves outside a tick (e.g. another writer on the board)
+            stock = market.tickers_obj[ticker]
+            stock.current_price = round(stock.current_price * rng.uniform(0.9, 1.1), 2)
+            mgr.reprice()
+
+        expected = _full_valuation(market)
+        assert list(mgr.positions) == list(expected)
+        assert mgr.positions == expected
+        assert mgr.total_value == pytest.approx(sum(r["value"] for r in expected.values()))
+        assert mgr.total_cost == pytest.approx(sum(r["cost_basis"] for r in expected.values()))
+        assert mgr.total_pnl == pytest.approx(mgr.total_value - mgr.total_cost)
+        assert mgr.get_portfolio_value() == mgr.total_value
+        most_held = max(most_held, len(mgr.positions))
+    assert most_held >= 3
+    capsys.readouterr()
+
+
+# ====================================================
+# PRICE BOARD
+# ====================================================
+def test_price_board_keeps_long_ticker_names():
+    from price_board import FIELDS, BoardField, PriceBoard
+
+    class Quote:
+        current_price = BoardField()
+        last_price = BoardField()
+        trend = BoardField()
+        volume = BoardField()
+        ath = BoardField()
+        atl = BoardField()
+
+        def __init__(self, ticker, i):
+            self.ticker = ticker
+            for k, f in enumerate(FIELDS):
+                setattr(self, f, i * 100 + k)
+
+    names = ["AAA", "A_TICKER_NAME_WELL_PAST_16_BYTES", "A_TICKER_NAME_WELL_PAST_16_BYTES_2", "ÉNERGIE"]
+    board = PriceBoard(names)
+    try:
+        assert board.names == names
+        quotes = [Quote(t, i) for i, t in enumerate(names)]
+        for q in quotes:
+            board.attach_stock(q)
+        quotes[2].current_price = 7.5
+        quotes[3].volume = 99
+
+        reader = PriceBoard.attach(board.name)
+        try:
+            assert reader.names == names
+            rows = reader.snapshot()
+            assert rows["ticker"].tolist() == [t.encode() for t in names]
+            assert reader.price("A_TICKER_NAME_WELL_PAST_16_BYTES_2") == 7.5
+            assert rows["volume"].tolist() == [3, 103, 203, 99]
+            assert rows["atl"].tolist() == [5.0, 105.0, 205.0, 305.0]
+        finally:
+            reader.close()
+    finally:
+        board.close()
+
+
+def _shm_exists(name):
+    from price_board import PriceBoard
+
+    try:
+        board = PriceBoard.attach(name)
+    except FileNotFoundError:
+        return False
+    board.close()
+    return True
+
+
+def test_final_save_releases_the_price_board(market):
+    name = market.price_board.name
+    assert _shm_exists(name)
+    market.final_save()
+    assert market.price_board.shm is None
+    assert not _shm_exists(name)
+
+
+# ====================================================
+# HEADLESS RUNS
+# ====================================================
+def test_headless_run_closes_connections_when_it_fails(tmp_path, monkeypatch):
+    import headless
+    from benchmarks.common import build_universe
+
+    db_path = str(tmp_path / "game.db")
+    build_universe(db_path, 4)
+    closed = []
+    close = headless.BulkWriter.close
+    monkeypatch.setattr(headless.BulkWriter, "close", lambda self: (closed.append(self), close(self)))
+
+    def broken_tick(state):
+        raise RuntimeError("engine blew up")
+    monkeypatch.setattr(headless, "_vector_tick", broken_tick)
+
+    boards = []
+    init = headless.HeadlessMarket.__init__
+
+    def tracked_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        boards.append(self.price_board.name)
+    monkeypatch.setattr(headless.HeadlessMarket, "__init__", tracked_init)
+
+    with pytest.raises(RuntimeError, match="engine blew up"):
+        headless.run_simulation(1, db_path=db_path, out_path=str(tmp_path / "out.db"))
+    assert len(closed) == 1
+    assert not _shm_exists(boards[0])
+    # last connection closed -> WAL checkpointed and removed
+    assert not os.path.exists(str(tmp_path / "out.db") + "-wal")
+
+
+def test_headless_run_with_out_leaves_the_source_untouched(tmp_path):
+    import hashlib
+    import sqlite3
+
+    import headless
+    from benchmarks.common import build_universe
+    from database import SCHEMA_VERSION, get_schema_version, set_schema_version
+
+    db_path = str(tmp_path / "game.db")
+    out_path = str(tmp_path / "out.db")
+    build_universe(db_path, 4)
+    conn = sqlite3.connect(db_path)
+    set_schema_version(conn, SCHEMA_VERSION - 1)    # one migration behind
+    conn.commit()
+    conn.close()
+
+    def digest():
+        with open(db_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    before = digest()
+
+    headless.run_simulation(1, db_path=db_path, out_path=out_path, seed=1)
+
+    assert digest() == before
+    conn = sqlite3.connect(out_path)
+    try:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM candles").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+# ====================================================
+# BENCHMARK SMOKE TEST
+# ====================================================
+def test_engine_benchmark_runs_on_a_tiny_universe(tmp_path, capsys):
+    import json
+
+    from benchmarks import bench_engine
+
+    out = str(tmp_path / "engine.json")
+    bench_engine.main(["--tickers", "4", "--history", "8", "--budget", "0.01",
+                       "--min-ticks", "1", "--max-ticks", "2",
+                       "--out", out, "--compare", out])
+
+    with open(out) as f:
+        results = json.load(f)["results"]
+    assert [r["case"] for r in results] == ["4x8"]
+    assert "error" not in results[0]
+    for key in ("tick_stock", "tick_vector", "save", "snapshot"):
+        assert key in results[0]
+    assert "new/old" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+# ================================================
+# text_cache.py (SHARED LRU CACHE FOR font.render)
+# ================================================
+#
+#   render_text(font, text, antialias, color[, background]) has the same
+#   signature as font.render with the font moved to the front. Surfaces
+#   are shared between callers, so never draw on or set_alpha() a
+#   returned surface – copy it first.
+#
+from collections import OrderedDict
+
+
+class TextCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, color, background=None):
+        key = (font, text, antialias, tuple(color),
+               tuple(background) if background is not None else None)
+
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        if background is None:
+            surf = font.render(text, antialias, color)
+        else:
+            surf = font.render(text, antialias, color, background)
+
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+
+        return surf
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# one cache shared by GameGUI and NewsManager
+TEXT_CACHE = TextCache()
+
+
+def render_text(font, text, antialias, color, background=None):
+    return TEXT_CACHE.render(font, text, antialias, color, background)
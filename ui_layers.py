@@ -0,0 +1,141 @@
+# ================================================
+# ui_layers.py (PRE-RENDERED STATIC UI SURFACES)
+# ================================================
+#
+#   Gradients, rounded masks and scanlines that never change between
+#   frames. Each one is drawn once with the exact same draw calls the
+#   GUI used to issue every frame, then blitted. Call invalidate() after
+#   a resize or theme change and they are rebuilt on next use.
+#
+import pygame
+
+
+class UILayerCache:
+    def __init__(self):
+        self.layers = {}
+        self.builds = 0
+
+    def invalidate(self):
+        self.layers.clear()
+
+    def _get(self, key, builder):
+        surf = self.layers.get(key)
+        if surf is None:
+            surf = builder()
+            self.layers[key] = surf
+            self.builds += 1
+        return surf
+
+    # ----------------------------------------------------
+    # HEADER / SIDEBAR
+    # ----------------------------------------------------
+    def header(self, w, h):
+        """Top bar gradient (same math as the sidebar buttons)."""
+        def build():
+            surf = pygame.Surface((w, h))
+            for i in range(h):
+                shade = 50 + int(30 * (i / h))
+                pygame.draw.line(surf, (shade, 0, 90), (0, i), (w, i))
+            return surf
+        return self._get(("header", w, h), build)
+
+    def sidebar_background(self, w, h):
+        def build():
+            surf = pygame.Surface((w, h))
+            surf.fill((45, 0, 70))
+            for y in range(h):
+                shade = 45 + (y / h) * 20
+                pygame.draw.line(surf, (shade, 0, shade), (0, y), (w, y))
+            return surf
+        return self._get(("sidebar_background", w, h), build)
+
+    def button(self, w, h, base, span):
+        """
+        Purple gloss button with its rounded outline (sidebar + keypad).
+        One pixel wider than the button: the gradient lines always
+        spilled one column past the outline.
+        """
+        def build():
+            surf = pygame.Surface((w + 1, h))
+            for i in range(h):
+                shade = base + int(span * (i / h))
+                pygame.draw.line(surf, (shade, 0, 90), (0, i), (w, i))
+            pygame.draw.rect(surf, (200, 200, 255), (0, 0, w, h), 2, border_radius=6)
+            return surf
+        return self._get(("button", w, h, base, span), build)
+
+    def confirm_button(self, w, h, radius):
+        def build():
+            surf = pygame.Surface((w + 1, h))
+            for i in range(h):
+                shade = 120 + int(40 * (i / h))
+                pygame.draw.line(surf, (shade, shade, 255), (0, i), (w, i))
+
+            pygame.draw.rect(surf, (0, 0, 0), (0, 0, w, h), 3, border_radius=radius)
+
+            glow = pygame.Surface((w, h), pygame.SRCALPHA)
+            pygame.draw.rect(glow, (100, 120, 255, 80), glow.get_rect(), border_radius=radius)
+            surf.blit(glow, (0, 0))
+            return surf
+        return self._get(("confirm_button", w, h, radius), build)
+
+    # ----------------------------------------------------
+    # DRAWER
+    # ----------------------------------------------------
+    def drawer_shadow(self, w, h, radius):
+        def build():
+            surf = pygame.Surface((w, h), pygame.SRCALPHA)
+            pygame.draw.rect(surf, (0, 0, 0, 160), surf.get_rect(), border_radius=radius)
+            return surf
+        return self._get(("drawer_shadow", w, h, radius), build)
+
+    def drawer_panel(self, w, h, radius):
+        """Gradient, rounded mask, scanlines and border in one surface."""
+        def build():
+            panel = pygame.Surface((w, h), pygame.SRCALPHA)
+            temp = pygame.Surface((w, h))
+
+            for i in range(h):
+                pct = i / h
+                r = int(200 - pct * 70)
+                g = int(185 - pct * 85)
+                b = int(255 - pct * 40)
+                pygame.draw.line(temp, (r, g, b), (0, i), (w, i))
+
+            mask = pygame.Surface((w, h), pygame.SRCALPHA)
+            pygame.draw.rect(mask, (255, 255, 255), mask.get_rect(), border_radius=radius)
+
+            panel.blit(temp, (0, 0))
+            panel.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MIN)
+
+            panel.blit(self.scanlines(w, h, 4, 40), (0, 0))
+
+            pygame.draw.rect(panel, (0, 0, 0), panel.get_rect(), 3, border_radius=radius)
+            return panel
+        return self._get(("drawer_panel", w, h, radius), build)
+
+    def drawer_handle(self, w, h):
+        """Metallic handle with highlights and border (gradient runs one row past it)."""
+        def build():
+            surf = pygame.Surface((w, h + 1))
+
+            for i in range(w):
+                shade = 160 + int(40 * (i / w))
+                pygame.draw.line(surf, (shade, shade, shade), (i, 0), (i, h))
+
+            pygame.draw.line(surf, (255, 255, 255), (2, 3), (w - 2, 3), 2)
+            pygame.draw.line(surf, (200, 200, 200), (2, h - 4), (w - 2, h - 4), 2)
+            pygame.draw.rect(surf, (0, 0, 0), (0, 0, w, h), 3, border_radius=4)
+            return surf
+        return self._get(("drawer_handle", w, h), build)
+
+    # ----------------------------------------------------
+    # OVERLAYS
+    # ----------------------------------------------------
+    def scanlines(self, w, h, spacing, alpha):
+        def build():
+            surf = pygame.Surface((w, h), pygame.SRCALPHA)
+            for y in range(0, h, spacing):
+                pygame.draw.line(surf, (0, 0, 0, alpha), (0, y), (w, y))
+            return surf
+        return self._get(("scanlines", w, h, spacing, alpha), build)